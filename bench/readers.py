@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark rass under diagnostics storms of several servers, their
+messages read on the event loop or by reader threads.  Reader threads
+only pay off under free-threaded Python, with a core per server.
+
+    PYTHONPATH=src python bench/readers.py [--servers 1,2,4,8] [--files N]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from rassumfrassum.json import (
+    flush,
+    read_frame,
+    read_message_sync,
+    write_message,
+    write_message_sync,
+)
+
+
+def serve(files: int, diagnostics: int) -> None:
+    """Be a server publishing diagnostics for FILES files when a
+    document opens, then saying it's done."""
+    out = sys.stdout.buffer
+    while (message := read_message_sync()) is not None:
+        method = message.get('method')
+        if method == 'initialize':
+            write_message_sync(
+                {'jsonrpc': '2.0', 'id': message['id'], 'result': {
+                    'capabilities': {'textDocumentSync': 1}
+                }}
+            )
+        elif method == 'textDocument/didOpen':
+            for i in range(files):
+                content = json.dumps({
+                    'jsonrpc': '2.0',
+                    'method': 'textDocument/publishDiagnostics',
+                    'params': {
+                        'uri': f'file:///bench/f{i}.py',
+                        'diagnostics': [
+                            {
+                                'range': {
+                                    'start': {'line': j, 'character': 0},
+                                    'end': {'line': j, 'character': 8},
+                                },
+                                'severity': 2,
+                                'message': f'Warning {j} in file {i}',
+                            }
+                            for j in range(diagnostics)
+                        ],
+                    },
+                }).encode()
+                out.write(b'Content-Length: %d\r\n\r\n' % len(content))
+                out.write(content)
+            write_message_sync({'jsonrpc': '2.0', 'method': 'bench/done'})
+        elif method == 'shutdown':
+            write_message_sync(
+                {'jsonrpc': '2.0', 'id': message['id'], 'result': None}
+            )
+            break
+
+
+async def bench(servers: int, threads: bool, args) -> float:
+    """Get the number of diagnostics notifications per second a client
+    of rass gets from SERVERS servers."""
+    command = [sys.executable, '-m', 'rassumfrassum.main', '--log-level',
+               'warn', '--quiet-server']
+    if threads:
+        command.append('--reader-threads')
+    for _ in range(servers):
+        command += ['--', sys.executable, __file__, '--serve',
+                    '--files', str(args.files),
+                    '--diagnostics', str(args.diagnostics)]
+    rass = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        limit=1024 * 1024,
+    )
+    assert rass.stdin and rass.stdout
+    await write_message(rass.stdin, {
+        'jsonrpc': '2.0', 'id': 1, 'method': 'initialize',
+        'params': {'capabilities': {}},
+    })
+    while json.loads(await read_frame(rass.stdout) or b'{}').get('id') != 1:
+        pass
+    await write_message(rass.stdin, {
+        'jsonrpc': '2.0', 'method': 'initialized', 'params': {},
+    })
+    t0 = time.monotonic()
+    await write_message(rass.stdin, {
+        'jsonrpc': '2.0', 'method': 'textDocument/didOpen', 'params': {
+            'textDocument': {'uri': 'file:///bench/open.py',
+                             'languageId': 'python', 'version': 1,
+                             'text': ''}
+        },
+    })
+    done = received = 0
+    while done < servers:
+        content = await read_frame(rass.stdout)
+        assert content is not None
+        if b'"bench/done"' in content:
+            done += 1
+        else:
+            received += 1
+    elapsed = time.monotonic() - t0
+    await write_message(rass.stdin, {
+        'jsonrpc': '2.0', 'id': 2, 'method': 'shutdown',
+    })
+    while json.loads(await read_frame(rass.stdout) or b'{}').get('id') != 2:
+        pass
+    await write_message(rass.stdin, {'jsonrpc': '2.0', 'method': 'exit'})
+    flush(rass.stdin)
+    rass.stdin.close()
+    await rass.wait()
+    return received / elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--servers', default='1,2,4,8')
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--diagnostics', type=int, default=20)
+    parser.add_argument('--serve', action='store_true')
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.files, args.diagnostics)
+        return
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(
+        f"{args.files} files of {args.diagnostics} diagnostics per server, "
+        f"{'with' if gil else 'without'} the GIL"
+    )
+    print(f"{'servers':>8} {'loop':>12} {'threads':>12}  (notifications/s)")
+    for n in [int(s) for s in args.servers.split(',')]:
+        loop = await bench(n, False, args)
+        threads = await bench(n, True, args)
+        print(f"{n:>8} {loop:>12.0f} {threads:>12.0f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark rass's stdio paths: frames echoed by a child process that
+reads and writes them with the threaded bridge, or connected straight
+to its stdio.
+
+    PYTHONPATH=src python bench/stdio.py [--frames N] [--size BYTES]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from rassumfrassum.stdio import (
+    create_stdin_reader,
+    create_stdout_writer,
+    enlarge_pipe,
+)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read a whole frame, without parsing it, so that only the
+    transport is measured."""
+    header = await reader.readuntil(b'\r\n\r\n')
+    length = int(header.split(b':')[1].split(b'\r')[0])
+    return header + await reader.readexactly(length)
+
+
+async def echo(threaded: bool) -> None:
+    """Echo frames from stdin to stdout until EOF."""
+    reader = await create_stdin_reader(threaded)
+    writer = await create_stdout_writer(threaded)
+    while True:
+        writer.write(await read_frame(reader))
+        await writer.drain()
+
+
+async def bench(mode: str, frames: int, size: int) -> float:
+    """Get the throughput of MODE, in MB/s."""
+    child = await asyncio.create_subprocess_exec(
+        sys.executable,
+        __file__,
+        '--echo',
+        mode,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        limit=2 * size,
+    )
+    assert child.stdin and child.stdout
+    if mode == 'direct':
+        enlarge_pipe(child.stdin.get_extra_info('pipe').fileno())
+    body = json.dumps({'jsonrpc': '2.0', 'method': 'bench', 'params': 'x' * size})
+    frame = f'Content-Length: {len(body)}\r\n\r\n{body}'.encode()
+
+    async def send():
+        for _ in range(frames):
+            child.stdin.write(frame)  # pyright: ignore
+            await child.stdin.drain()  # pyright: ignore
+
+    t0 = time.monotonic()
+    sender = asyncio.create_task(send())
+    for _ in range(frames):
+        await read_frame(child.stdout)  # pyright: ignore
+    elapsed = time.monotonic() - t0
+    await sender
+    child.stdin.close()
+    await child.wait()
+    return frames * size / elapsed / 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--size', type=int, default=1024 * 1024)
+    parser.add_argument('--echo', choices=['threaded', 'direct'])
+    args = parser.parse_args()
+    if args.echo:
+        try:
+            await echo(args.echo == 'threaded')
+        except asyncio.IncompleteReadError:
+            pass
+        return
+    print(f"{args.frames} frames of {args.size} bytes, echoed")
+    for mode in ['threaded', 'direct']:
+        rate = await bench(mode, args.frames, args.size)
+        print(f"{mode:>10}: {rate:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Overload protection: track a server's outstanding requests and recent
+timeouts, and tell when to leave it alone for a while.
+"""
+
+import time
+from collections import deque
+
+# The timeout rate of a server is that of its last WINDOW timed
+# requests
+WINDOW = 10
+
+# A server is left alone once at least MIN_TIMEOUTS of its recent
+# timed requests, and at least TRIP_RATE of them, timed out
+MIN_TIMEOUTS = 3
+TRIP_RATE = 0.5
+
+
+class CircuitBreaker:
+    """Outstanding requests and recent timeouts of a server.
+
+    Closed, the breaker lets the server take part in all aggregations.
+    It opens after too many timeouts, leaving the server out of them
+    for COOLDOWN_S seconds, 0 meaning never.  Then, half-open, it lets
+    one probe request through: answered in time, the breaker closes
+    again, otherwise it reopens.
+    """
+
+    def __init__(self, cooldown_s: float = 30.0):
+        self.cooldown_s = cooldown_s
+        # Ids of requests sent and not answered yet, and of those
+        # subject to a timeout
+        self.outstanding: set = set()
+        self.timed: set = set()
+        # Recent timed requests, True for those which timed out
+        self.outcomes: deque[bool] = deque(maxlen=WINDOW)
+        self.open_until: float | None = None
+        self.probe = None
+
+    @property
+    def state(self) -> str:
+        if self.open_until is None:
+            return 'closed'
+        if self.probe is not None or time.monotonic() >= self.open_until:
+            return 'half-open'
+        return 'open'
+
+    @property
+    def timeout_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def admits(self) -> bool:
+        """Tell if the server should take part in the next aggregation."""
+        if self.open_until is None:
+            return True
+        return self.probe is None and time.monotonic() >= self.open_until
+
+    def sent(self, req_id, timed: bool) -> None:
+        """Note that request REQ_ID was sent, TIMED if subject to a
+        timeout.  A timed request sent while half-open is the probe."""
+        self.outstanding.add(req_id)
+        if timed:
+            self.timed.add(req_id)
+            if self.open_until is not None and self.probe is None:
+                self.probe = req_id
+
+    def answered(self, req_id) -> None:
+        """Note that request REQ_ID was answered."""
+        self.outstanding.discard(req_id)
+        if req_id in self.timed:
+            self.timed.discard(req_id)
+            self._outcome(req_id, False)
+
+    def expired(self, req_id) -> bool:
+        """Note that request REQ_ID timed out.  Return True if that
+        opened the breaker."""
+        if req_id not in self.timed:
+            return False
+        self.timed.discard(req_id)
+        was_closed = self.open_until is None
+        self._outcome(req_id, True)
+        return was_closed and self.open_until is not None
+
+    def forget(self, req_id) -> None:
+        """Forget request REQ_ID, which won't be answered."""
+        self.outstanding.discard(req_id)
+        self.timed.discard(req_id)
+        if self.probe == req_id:
+            self.probe = None
+
+    def reset(self) -> None:
+        """Start over, for a new server process."""
+        self.outstanding.clear()
+        self.timed.clear()
+        self.outcomes.clear()
+        self.open_until = self.probe = None
+
+    def _outcome(self, req_id, timed_out: bool) -> None:
+        self.outcomes.append(timed_out)
+        if req_id == self.probe:
+            self.probe = None
+            if timed_out:
+                self.open_until = time.monotonic() + self.cooldown_s
+            else:
+                self.open_until = None
+                self.outcomes.clear()
+        elif (
+            self.open_until is None
+            and self.cooldown_s > 0
+            and sum(self.outcomes) >= MIN_TIMEOUTS
+            and self.timeout_rate >= TRIP_RATE
+        ):
+            self.open_until = time.monotonic() + self.cooldown_s
+
+    def to_json(self) -> dict:
+        return {
+            'outstanding': len(self.outstanding),
+            'timeout-rate': round(self.timeout_rate, 2),
+            'breaker': self.state,
+        }
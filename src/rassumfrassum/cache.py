@@ -0,0 +1,216 @@
+"""
+Caches for results of LSP requests.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any
+
+from .stats import bump
+
+
+class ResponseCache:
+    """Bounded LRU cache of response payloads, by request key.
+
+    Keys are tuples (method, uri, version, ...) as produced by
+    `LspLogic.get_request_key`.
+    """
+
+    def __init__(self, capacity: int = 128, name: str = "response-cache"):
+        self.capacity = capacity
+        self.name = name
+        self.entries: OrderedDict[tuple, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple) -> tuple[Any] | None:
+        """Get a 1-tuple with the payload cached for KEY, or None."""
+        if key not in self.entries:
+            bump(f"{self.name}.misses")
+            return None
+        bump(f"{self.name}.hits")
+        self.entries.move_to_end(key)
+        return (self.entries[key],)
+
+    def put(self, key: tuple, payload: Any) -> None:
+        """Cache PAYLOAD for KEY, evicting the oldest entries if full."""
+        if self.capacity <= 0:
+            return
+        self.entries[key] = payload
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            bump(f"{self.name}.evictions")
+
+    def invalidate(self, uri: str | None = None) -> None:
+        """Forget entries for URI, or all entries if URI is None."""
+        if uri is None:
+            self.entries.clear()
+            return
+        for key in [k for k in self.entries if k[1] == uri]:
+            del self.entries[key]
+
+    def invalidate_methods(self, methods) -> None:
+        """Forget entries for requests of any of METHODS."""
+        for key in [k for k in self.entries if k[0] in methods]:
+            del self.entries[key]
+
+
+Position = tuple[int, int]
+Span = tuple[Position, Position]
+
+
+def _pos(p: dict) -> Position:
+    return (p.get('line', 0), p.get('character', 0))
+
+
+def _span(rng: dict) -> Span:
+    return (_pos(rng.get('start', {})), _pos(rng.get('end', {})))
+
+
+def _range(span: Span) -> dict:
+    (sl, sc), (el, ec) = span
+    return {
+        'start': {'line': sl, 'character': sc},
+        'end': {'line': el, 'character': ec},
+    }
+
+
+class InlayHintCache:
+    """Inlay hints of document versions, and the ranges they cover.
+
+    For each URI, remembers a version, a sorted list of disjoint
+    covered spans and the hints found in them.
+    """
+
+    def __init__(self):
+        self.docs: dict[str, tuple[Any, list[Span], dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def missing(self, uri: str, version: Any, rng: dict) -> dict | None:
+        """Get the part of RNG not covered for URI at VERSION.
+
+        Returns None if RNG is fully covered.  If the uncovered parts
+        are several, returns the smallest range containing all of them.
+        """
+        start, end = want = _span(rng)
+        probe = self.docs.get(uri)
+        if not probe or probe[0] != version:
+            return rng
+        gaps: list[Span] = []
+        cur = start
+        for s, e in probe[1]:
+            if e < cur:
+                continue
+            if s > end:
+                break
+            if s > cur:
+                gaps.append((cur, s))
+            cur = max(cur, e)
+        if cur < end or (
+            start == end and not any(s <= start <= e for s, e in probe[1])
+        ):
+            gaps.append((cur, end))
+        if not gaps:
+            return None
+        if (missing := (gaps[0][0], gaps[-1][1])) == want:
+            return rng
+        return _range(missing)
+
+    def add(self, uri: str, version: Any, rng: dict, hints: list) -> None:
+        """Record that HINTS are all hints in RNG for URI at VERSION."""
+        probe = self.docs.get(uri)
+        if not probe or probe[0] != version:
+            probe = self.docs[uri] = (version, [], {})
+        _, spans, known = probe
+        merged: list[Span] = []
+        new_start, new_end = _span(rng)
+        for s, e in sorted(spans + [(new_start, new_end)]):
+            if merged and s <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+            else:
+                merged.append((s, e))
+        spans[:] = merged
+        for hint in hints:
+            known[json.dumps(hint, sort_keys=True)] = hint
+
+    def slice(self, uri: str, rng: dict) -> list:
+        """Get the known hints for URI positioned in RNG."""
+        start, end = _span(rng)
+        probe = self.docs.get(uri)
+        hints = probe[2].values() if probe else []
+        return sorted(
+            (h for h in hints if start <= _pos(h.get('position', {})) <= end),
+            key=lambda h: _pos(h.get('position', {})),
+        )
+
+    def invalidate(self, uri: str | None = None) -> None:
+        """Forget hints for URI, or for all documents if URI is None."""
+        if uri is None:
+            self.docs.clear()
+        else:
+            self.docs.pop(uri, None)
+
+
+class SemanticTokensCache:
+    """Last semantic tokens sent to the client, by document.
+
+    Used to answer `textDocument/semanticTokens/full/delta` requests
+    for servers that only know how to compute full token arrays.
+    """
+
+    def __init__(self):
+        self.docs: dict[str, tuple[str, list[int]]] = {}
+        self.next_result_id = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def remember(self, uri: str, data: list[int]) -> str:
+        """Remember DATA as the tokens of URI, return a new result id."""
+        self.next_result_id += 1
+        result_id = f"rass-{self.next_result_id}"
+        self.docs[uri] = (result_id, data)
+        return result_id
+
+    def previous(self, uri: str, result_id: str | None) -> list[int] | None:
+        """Get the tokens of URI sent with RESULT_ID, if we have them."""
+        if (probe := self.docs.get(uri)) and probe[0] == result_id:
+            return probe[1]
+        return None
+
+    def forget(self, uri: str) -> None:
+        self.docs.pop(uri, None)
+
+
+def semantic_tokens_edits(old: list[int], new: list[int]) -> list[dict]:
+    """Compute SemanticTokensEdits turning OLD into NEW.
+
+    Finds the longest common prefix and suffix of whole tokens (groups
+    of 5 integers) and replaces what lies between them.
+    """
+
+    def same(i: int, j: int) -> bool:
+        return old[i : i + 5] == new[j : j + 5]
+
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix + 5 <= limit and same(prefix, prefix):
+        prefix += 5
+    suffix = 0
+    while prefix + suffix + 5 <= limit and same(
+        len(old) - suffix - 5, len(new) - suffix - 5
+    ):
+        suffix += 5
+    if prefix == len(old) == len(new):
+        return []
+    return [
+        {
+            'start': prefix,
+            'deleteCount': len(old) - prefix - suffix,
+            'data': new[prefix : len(new) - suffix],
+        }
+    ]
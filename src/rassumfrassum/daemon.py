@@ -0,0 +1,687 @@
+"""
+Daemon mode: one long-lived rass keeping servers warm across client
+sessions.
+
+'rass --attach ...' is a thin shim between the client's stdio and the
+daemon's Unix socket, starting the daemon if needed.  Sessions with
+the same command line and workspace root share a warm set of servers,
+run by a multiplexer of their own, so reopening a project or opening
+a second editor on it doesn't pay for server startup again.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+from .json import JSON, flush, read_message, write_message
+from .rassum import run_multiplexer
+from .stdio import create_stdin_reader, create_stdout_writer
+from .transport import STREAM_LIMIT, open_streams, tune
+from .util import debug, event, log, warn
+
+# How long the shim waits for a daemon it started to listen
+DAEMON_START_TIMEOUT_S = 5.0
+
+# Methods whose results, or params for server requests, may hold edits
+# to versioned documents
+EDIT_METHODS = frozenset(
+    {
+        "textDocument/rename",
+        "textDocument/codeAction",
+        "codeAction/resolve",
+        "workspace/executeCommand",
+        "workspace/willCreateFiles",
+        "workspace/willRenameFiles",
+        "workspace/willDeleteFiles",
+        "workspace/applyEdit",
+    }
+)
+
+# How many of its recent versions of a document a session remembers
+VERSION_HISTORY = 32
+
+
+def default_socket_path() -> str:
+    """Get the path of the daemon's socket, unless given.  Outside
+    $XDG_RUNTIME_DIR, it's in a private directory of ours, which
+    others can't squat."""
+    if base := os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(base, f"rassumfrassum-{os.getuid()}.sock")
+    base = os.path.join(tempfile.gettempdir(), f"rassumfrassum-{os.getuid()}")
+    try:
+        os.mkdir(base, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(base)
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or st.st_uid != os.getuid()
+        or stat.S_IMODE(st.st_mode) & 0o077
+    ):
+        raise RuntimeError(f"{base} isn't a private directory of ours")
+    return os.path.join(base, "daemon.sock")
+
+
+def peer_uid(sock: socket.socket) -> int | None:
+    """Get the user id of the process at the other end of Unix socket
+    SOCK, or None if the platform won't tell."""
+    if hasattr(socket, "SO_PEERCRED"):
+        # Linux: struct ucred {pid, uid, gid}
+        creds = sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        return struct.unpack("3i", creds)[1]
+    if hasattr(socket, "LOCAL_PEERCRED"):
+        # BSDs and macOS: struct xucred {version, uid, ...}, at level
+        # SOL_LOCAL, 0
+        creds = sock.getsockopt(0, socket.LOCAL_PEERCRED, 128)
+        return struct.unpack_from("2I", creds)[1]
+    return None
+
+
+def workspace_root(params: JSON) -> str | None:
+    """Get the workspace root from initialize PARAMS."""
+    if folders := params.get("workspaceFolders"):
+        return folders[0].get("uri")
+    return params.get("rootUri") or params.get("rootPath")
+
+
+class Session:
+    """A client attached to the daemon."""
+
+    def __init__(self, number: int, writer: asyncio.StreamWriter):
+        self.name = f"session#{number}"
+        self.writer = writer
+        # Documents this client has open
+        self.open_docs: set[str] = set()
+        # This client's ids of in-flight requests -> the warm set's
+        self.request_ids: dict[Any, int] = {}
+        # URIs -> recent versions of ours -> this client's versions
+        self.versions: dict[str, dict[int, Any]] = {}
+
+    def note_version(self, uri: str, ours: int, theirs: Any) -> None:
+        """Remember that version OURS of URI is version THEIRS for this
+        client."""
+        versions = self.versions.setdefault(uri, {})
+        versions[ours] = theirs
+        if len(versions) > VERSION_HISTORY:
+            del versions[next(iter(versions))]
+
+    def their_versions(self, value: Any) -> Any:
+        """Get VALUE, part of a message for this client, with versions
+        of documents in it translated from ours to this client's.
+        Versions from another client's edits stay as they are, and
+        the client will rightly refuse edits of them."""
+        if isinstance(value, list):
+            return [self.their_versions(v) for v in value]
+        if not isinstance(value, dict):
+            return value
+        value = {k: self.their_versions(v) for k, v in value.items()}
+        doc = value.get("textDocument")
+        if (
+            isinstance(doc, dict)
+            and isinstance(uri := doc.get("uri"), str)
+            and isinstance(version := doc.get("version"), int)
+            and (theirs := self.versions.get(uri, {}).get(version))
+            is not None
+        ):
+            value["textDocument"] = {**doc, "version": theirs}
+        return value
+
+    async def send(self, message: JSON) -> None:
+        try:
+            await write_message(self.writer, message)
+        except (BrokenPipeError, ConnectionResetError):
+            debug(f"{self.name} went away")
+
+
+class WarmSet:
+    """
+    Servers kept warm for one command line and workspace root, and
+    the client sessions sharing them.
+
+    The multiplexer sees a single client: session request ids are
+    mapped to ids of our own, documents are reference counted and
+    their versions renumbered.  Server requests go to the most
+    recently active session, registrations to all of them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        specs: list,
+        opts: argparse.Namespace,
+        forget: Callable[[], None],
+    ):
+        self.name = name
+        self.specs = specs
+        self.opts = opts
+        # Called to stop handing this set to new sessions
+        self.forget = forget
+        self.sessions: list[Session] = []
+        self.last_active: Session | None = None
+        # Our request ids -> (session, its request id, method).  Our
+        # own requests have no session.
+        self.requests: dict[int, tuple[Session | None, Any, str]] = {}
+        self.ids = itertools.count()
+        # Server request ids -> sessions that may still answer
+        self.server_requests: dict[Any, set[Session]] = {}
+        # Response to the first session's initialize, for the others
+        self.init_result: asyncio.Future | None = None
+        self.initialized = False
+        # Registration ids -> live registrations, for joining sessions
+        self.registrations: dict[str, JSON] = {}
+        # Progress tokens -> sessions that created them
+        self.progress_owners: dict[Any, Session] = {}
+        # URIs -> number of sessions having them open, and versions
+        self.doc_refs: dict[str, int] = {}
+        self.doc_versions: dict[str, int] = {}
+        self.linger: asyncio.TimerHandle | None = None
+        self.closed = False
+
+    async def start(self) -> None:
+        """Start the multiplexer, talking to it through a socket pair."""
+        ours, theirs = socket.socketpair()
+        tune(ours)
+        tune(theirs)
+        self.reader, self.writer = await asyncio.open_connection(
+            sock=ours, limit=STREAM_LIMIT
+        )
+        mux = await asyncio.open_connection(sock=theirs, limit=STREAM_LIMIT)
+
+        async def multiplex():
+            try:
+                await run_multiplexer(self.specs, self.opts, mux)
+            except Exception as e:
+                warn(f"Servers of {self.name} failed: {e}")
+            finally:
+                flush(mux[1])
+                mux[1].close()
+
+        self.tasks = [
+            asyncio.create_task(multiplex()),
+            asyncio.create_task(self._pump()),
+        ]
+
+    async def _send(self, message: JSON) -> None:
+        try:
+            await write_message(self.writer, message)
+        except (BrokenPipeError, ConnectionResetError):
+            debug(f"Servers of {self.name} are gone")
+
+    def _our_id(
+        self, session: Session | None, their_id: Any, method: str
+    ) -> int:
+        our_id = next(self.ids)
+        self.requests[our_id] = (session, their_id, method)
+        return our_id
+
+    def _active(self) -> Session:
+        if self.last_active in self.sessions:
+            return self.last_active  # pyright: ignore
+        return self.sessions[-1]
+
+    def _bump_version(self, uri: str) -> int:
+        self.doc_versions[uri] = self.doc_versions.get(uri, 0) + 1
+        return self.doc_versions[uri]
+
+    async def attach(self, session: Session, initialize: JSON) -> None:
+        """Attach SESSION, answering its INITIALIZE request."""
+        t0 = time.monotonic()
+        if self.linger:
+            self.linger.cancel()
+            self.linger = None
+        self.sessions.append(session)
+        if self.init_result is None:
+            self.init_result = asyncio.get_running_loop().create_future()
+            await self._send(
+                {**initialize, "id": self._our_id(None, "initialize", "initialize")}
+            )
+        response = await asyncio.shield(self.init_result)
+        await session.send(
+            {"jsonrpc": "2.0", "id": initialize.get("id"), **response}
+        )
+        event(
+            f"{session.name} attached to {self.name} in "
+            f"{round((time.monotonic() - t0) * 1000)}ms"
+        )
+
+    async def detach(self, session: Session) -> None:
+        """Detach SESSION, closing its documents for the servers."""
+        if session not in self.sessions:
+            return
+        self.sessions.remove(session)
+        event(f"{session.name} detached from {self.name}")
+        for uri in session.open_docs:
+            if close := self._release(uri):
+                await self._send(close)
+        session.open_docs.clear()
+        for token, owner in list(self.progress_owners.items()):
+            if owner is session:
+                del self.progress_owners[token]
+        # Server requests nobody else can answer fail
+        for req_id, asked in list(self.server_requests.items()):
+            asked.discard(session)
+            if not asked:
+                del self.server_requests[req_id]
+                await self._send(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": req_id,
+                        "error": {"code": -32803, "message": "Client left"},
+                    }
+                )
+        if not self.sessions and not self.closed:
+            self.linger = asyncio.get_running_loop().call_later(
+                self.opts.linger_s,
+                lambda: asyncio.ensure_future(self.close()),
+            )
+
+    async def close(self) -> None:
+        """Shut the servers down."""
+        if self.closed:
+            return
+        self.closed = True
+        self.forget()
+        event(f"Shutting down {self.name}")
+        await self._send(
+            {
+                "jsonrpc": "2.0",
+                "id": self._our_id(None, "shutdown", "shutdown"),
+                "method": "shutdown",
+            }
+        )
+
+    async def from_session(self, session: Session, message: JSON) -> None:
+        """Handle MESSAGE from SESSION."""
+        self.last_active = session
+        method, msg_id = message.get("method"), message.get("id")
+        if method is None:
+            # Response to a server request: the first one wins
+            if (asked := self.server_requests.get(msg_id)) and session in asked:
+                del self.server_requests[msg_id]
+                await self._send(message)
+            return
+        if msg_id is not None:
+            if method == "shutdown":
+                # Servers stay up for other and future sessions
+                await session.send(
+                    {"jsonrpc": "2.0", "id": msg_id, "result": None}
+                )
+                return
+            our_id = self._our_id(session, msg_id, method)
+            session.request_ids[msg_id] = our_id
+            message = {**message, "id": our_id}
+        elif method == "initialized":
+            if self.initialized:
+                await self._replay_registrations(session)
+                return
+            self.initialized = True
+        elif method == "$/cancelRequest":
+            their_id = (message.get("params") or {}).get("id")
+            if (our_id := session.request_ids.get(their_id)) is None:
+                return
+            message = {**message, "params": {"id": our_id}}
+        elif method.startswith("textDocument/did"):
+            if not (tracked := self._track_document(session, message)):
+                return
+            message = tracked
+        await self._send(message)
+
+    def _track_document(self, session: Session, message: JSON) -> JSON | None:
+        """Account for document sync MESSAGE from SESSION.  Return what
+        to tell the servers, if anything."""
+        method = message["method"]
+        params = message.get("params") or {}
+        doc = params.get("textDocument") or {}
+        if (uri := doc.get("uri")) is None:
+            # Let servers complain
+            return message
+        if method == "textDocument/didOpen":
+            if uri in session.open_docs:
+                return None
+            session.open_docs.add(uri)
+            self.doc_refs[uri] = self.doc_refs.get(uri, 0) + 1
+            version = self._bump_version(uri)
+            session.note_version(uri, version, doc.get("version"))
+            if self.doc_refs[uri] == 1:
+                doc = {**doc, "version": version}
+                return {**message, "params": {**params, "textDocument": doc}}
+            # Already open in another session: this one's text wins
+            return {
+                "jsonrpc": "2.0",
+                "method": "textDocument/didChange",
+                "params": {
+                    "textDocument": {"uri": uri, "version": version},
+                    "contentChanges": [{"text": doc.get("text", "")}],
+                },
+            }
+        if uri not in session.open_docs:
+            return None
+        if method == "textDocument/didChange":
+            version = self._bump_version(uri)
+            session.note_version(uri, version, doc.get("version"))
+            doc = {**doc, "version": version}
+            return {**message, "params": {**params, "textDocument": doc}}
+        if method == "textDocument/didClose":
+            session.open_docs.discard(uri)
+            session.versions.pop(uri, None)
+            return self._release(uri)
+        return message
+
+    def _release(self, uri: str) -> JSON | None:
+        """Drop a reference to URI, getting a didClose for the last."""
+        self.doc_refs[uri] -= 1
+        if self.doc_refs[uri]:
+            return None
+        del self.doc_refs[uri]
+        del self.doc_versions[uri]
+        return {
+            "jsonrpc": "2.0",
+            "method": "textDocument/didClose",
+            "params": {"textDocument": {"uri": uri}},
+        }
+
+    async def _replay_registrations(self, session: Session) -> None:
+        """Tell SESSION, which joined late, about live registrations."""
+        if not self.registrations:
+            return
+        await session.send(
+            {
+                "jsonrpc": "2.0",
+                "id": f"rass-daemon-{next(self.ids)}",
+                "method": "client/registerCapability",
+                "params": {"registrations": list(self.registrations.values())},
+            }
+        )
+
+    async def _pump(self) -> None:
+        """Route messages from the multiplexer to sessions."""
+        try:
+            while (message := await read_message(self.reader)) is not None:
+                if message.get("method") is None:
+                    await self._on_response(message)
+                elif "id" in message:
+                    await self._on_request(message)
+                else:
+                    await self._on_notification(message)
+        except (ConnectionResetError, asyncio.IncompleteReadError) as e:
+            debug(f"Lost servers of {self.name}: {e}")
+        # The multiplexer is gone, and so are its sessions
+        self.closed = True
+        self.forget()
+        if self.linger:
+            self.linger.cancel()
+        if self.init_result and not self.init_result.done():
+            self.init_result.set_result(
+                {"error": {"code": -32603, "message": "Servers exited"}}
+            )
+        for session in self.sessions:
+            flush(session.writer)
+            session.writer.close()
+        event(f"Servers of {self.name} exited")
+
+    async def _on_response(self, message: JSON) -> None:
+        msg_id = message.get("id")
+        if not isinstance(msg_id, int) or not (
+            entry := self.requests.pop(msg_id, None)
+        ):
+            return
+        session, their_id, method = entry
+        if session is None:
+            if their_id == "shutdown":
+                await self._send({"jsonrpc": "2.0", "method": "exit"})
+                flush(self.writer)
+                self.writer.close()
+            elif self.init_result and not self.init_result.done():
+                self.init_result.set_result(
+                    {k: message[k] for k in ("result", "error") if k in message}
+                )
+            return
+        session.request_ids.pop(their_id, None)
+        if session not in self.sessions:
+            return
+        if method in EDIT_METHODS:
+            message = session.their_versions(message)
+        await session.send({**message, "id": their_id})
+
+    async def _on_request(self, message: JSON) -> None:
+        method = message["method"]
+        params = message.get("params") or {}
+        if method == "client/registerCapability":
+            for reg in params.get("registrations", []):
+                self.registrations[reg["id"]] = reg
+            targets = list(self.sessions)
+        elif method == "client/unregisterCapability":
+            # Sic, it's misspelt in the spec
+            for reg in params.get("unregisterations", []):
+                self.registrations.pop(reg["id"], None)
+            targets = list(self.sessions)
+        elif self.sessions:
+            targets = [self._active()]
+            if method == "window/workDoneProgress/create":
+                self.progress_owners[params.get("token")] = targets[0]
+        else:
+            targets = []
+        if not targets:
+            reply: JSON = {"jsonrpc": "2.0", "id": message["id"]}
+            if method.endswith("registerCapability"):
+                reply["result"] = None
+            else:
+                reply["error"] = {"code": -32803, "message": "No client"}
+            await self._send(reply)
+            return
+        self.server_requests[message["id"]] = set(targets)
+        for session in targets:
+            if method in EDIT_METHODS:
+                await session.send(session.their_versions(message))
+            else:
+                await session.send(message)
+
+    async def _on_notification(self, message: JSON) -> None:
+        method = message["method"]
+        params = message.get("params") or {}
+        targets = self.sessions
+        if method == "$/progress":
+            token = params.get("token")
+            owner = self.progress_owners.get(token)
+            if (params.get("value") or {}).get("kind") == "end":
+                self.progress_owners.pop(token, None)
+            if owner:
+                targets = [owner] if owner in self.sessions else []
+            elif self.sessions:
+                targets = [self._active()]
+        elif method == "textDocument/publishDiagnostics":
+            uri = params.get("uri")
+            targets = [s for s in self.sessions if uri in s.open_docs]
+            # Documents not open anywhere concern everybody
+            targets = targets or self.sessions
+            # Versions are ours, not the sessions'
+            params = {k: v for k, v in params.items() if k != "version"}
+            message = {**message, "params": params}
+        for session in list(targets):
+            await session.send(message)
+
+
+async def run_daemon(opts: argparse.Namespace) -> None:
+    """Serve sessions on OPTS's daemon socket until killed."""
+    # Not at top level, since main imports us
+    from .main import load_server_specs, parse_args
+
+    path = opts.daemon_socket or default_socket_path()
+    if os.path.exists(path):
+        try:
+            _, writer = await asyncio.open_unix_connection(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Left over by a dead daemon
+            os.unlink(path)
+        else:
+            writer.close()
+            raise RuntimeError(f"A daemon is already listening on {path}")
+
+    warm_sets: dict[tuple, WarmSet] = {}
+    set_numbers = itertools.count(1)
+    session_numbers = itertools.count(1)
+
+    async def warm_set_for(argv: list[str], cwd: str, root) -> WarmSet:
+        key = (tuple(argv), root)
+        if ws := warm_sets.get(key):
+            return ws
+        # Presets and server commands may be relative to the session's
+        # directory
+        saved = os.getcwd()
+        os.chdir(cwd)
+        try:
+            set_opts = parse_args(argv)
+            specs = load_server_specs(set_opts)
+        finally:
+            os.chdir(saved)
+        if not specs:
+            raise ValueError("no servers to run")
+        # How long servers linger is the daemon's business
+        set_opts.linger_s = opts.linger_s
+        for spec in specs:
+            spec.cwd = spec.cwd or cwd
+
+        def forget() -> None:
+            if warm_sets.get(key) is ws:
+                del warm_sets[key]
+
+        name = f"warm set #{next(set_numbers)} for {root}"
+        ws = WarmSet(name, specs, set_opts, forget)
+        warm_sets[key] = ws
+        await ws.start()
+        return ws
+
+    async def serve(reader, writer):
+        session = Session(next(session_numbers), writer)
+        ws = None
+        try:
+            hello = await read_message(reader)
+            initialize = await read_message(reader)
+            if not hello or not initialize or "id" not in initialize:
+                return
+            try:
+                ws = await warm_set_for(
+                    hello["argv"],
+                    hello["cwd"],
+                    workspace_root(initialize.get("params") or {}),
+                )
+            except (Exception, SystemExit) as e:
+                warn(f"Can't start servers for {session.name}: {e}")
+                await session.send(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": initialize["id"],
+                        "error": {
+                            "code": -32603,
+                            "message": f"Can't start servers: {e}",
+                        },
+                    }
+                )
+                return
+            await ws.attach(session, initialize)
+            while (message := await read_message(reader)) is not None:
+                if message.get("method") == "exit":
+                    break
+                await ws.from_session(session, message)
+        except (ConnectionResetError, asyncio.IncompleteReadError) as e:
+            debug(f"Lost {session.name}: {e}")
+        finally:
+            if ws:
+                await ws.detach(session)
+            flush(writer)
+            writer.close()
+
+    # Nobody else may connect, not even in the window between binding
+    # and a chmod
+    umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(
+            serve, path, limit=STREAM_LIMIT
+        )
+    finally:
+        os.umask(umask)
+    log(f"Daemon listening on {path}")
+    async with server:
+        await server.serve_forever()
+
+
+def _start_daemon(path: str, opts: argparse.Namespace) -> None:
+    """Start a daemon on PATH in the background."""
+    base, ext = os.path.splitext(path)
+    log_path = (base if ext == ".sock" else path) + ".log"
+    log(f"Starting daemon on {path}, logging to {log_path}")
+    with open(log_path, "ab") as log_file:
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "rassumfrassum.main",
+                "--daemon",
+                "--daemon-socket",
+                path,
+                "--log-level",
+                opts.log_level,
+                "--linger-s",
+                str(opts.linger_s),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log_file,
+            start_new_session=True,
+        )
+
+
+async def run_shim(args: list[str], opts: argparse.Namespace) -> None:
+    """Connect stdio to a daemon session for command line ARGS."""
+    path = opts.daemon_socket or default_socket_path()
+    try:
+        reader, writer = await open_streams("unix", path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        _start_daemon(path, opts)
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT_S
+        while True:
+            await asyncio.sleep(0.05)
+            try:
+                reader, writer = await open_streams("unix", path)
+                break
+            except (ConnectionRefusedError, FileNotFoundError):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Daemon didn't start on {path}")
+    # Don't tell our command line and workspace, nor pass our client's
+    # messages, to whoever else listens there
+    uid = peer_uid(writer.get_extra_info("socket"))
+    if uid is not None and uid != os.getuid():
+        writer.close()
+        raise RuntimeError(f"{path} is served by user {uid}, not us")
+
+    await write_message(writer, {"argv": args, "cwd": os.getcwd()})
+    # What follows are raw bytes
+    flush(writer)
+    client_reader = await create_stdin_reader(opts.threaded_stdio)
+    client_writer = await create_stdout_writer(opts.threaded_stdio)
+
+    async def upstream():
+        while data := await client_reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+        writer.write_eof()
+
+    # The session is over when the daemon says so
+    up = asyncio.create_task(upstream())
+    try:
+        while data := await reader.read(65536):
+            client_writer.write(data)
+            await client_writer.drain()
+    finally:
+        up.cancel()
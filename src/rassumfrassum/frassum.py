@@ -2,17 +2,196 @@
 LSP-specific message routing and merging logic.
 """
 
+import json
 from dataclasses import dataclass, field
 from functools import reduce
 from typing import cast
 
+from .cache import (
+    InlayHintCache,
+    ResponseCache,
+    SemanticTokensCache,
+    semantic_tokens_edits,
+)
 from .json import JSON
+from .mirror import DocumentMirror
+from .stats import bump
+from .watch import FileWatchers, coalesce
 from .util import (
     dmerge,
     is_scalar,
 )
 
 
+# Server capabilities that can be registered dynamically:
+# capability -> (method, path to client capability)
+CAPABILITY_METHODS: dict[str, tuple[str, str]] = {
+    'hoverProvider': ('textDocument/hover', 'textDocument.hover'),
+    'completionProvider': (
+        'textDocument/completion',
+        'textDocument.completion',
+    ),
+    'signatureHelpProvider': (
+        'textDocument/signatureHelp',
+        'textDocument.signatureHelp',
+    ),
+    'declarationProvider': (
+        'textDocument/declaration',
+        'textDocument.declaration',
+    ),
+    'definitionProvider': (
+        'textDocument/definition',
+        'textDocument.definition',
+    ),
+    'typeDefinitionProvider': (
+        'textDocument/typeDefinition',
+        'textDocument.typeDefinition',
+    ),
+    'implementationProvider': (
+        'textDocument/implementation',
+        'textDocument.implementation',
+    ),
+    'referencesProvider': (
+        'textDocument/references',
+        'textDocument.references',
+    ),
+    'documentHighlightProvider': (
+        'textDocument/documentHighlight',
+        'textDocument.documentHighlight',
+    ),
+    'documentSymbolProvider': (
+        'textDocument/documentSymbol',
+        'textDocument.documentSymbol',
+    ),
+    'codeActionProvider': (
+        'textDocument/codeAction',
+        'textDocument.codeAction',
+    ),
+    'codeLensProvider': ('textDocument/codeLens', 'textDocument.codeLens'),
+    'documentLinkProvider': (
+        'textDocument/documentLink',
+        'textDocument.documentLink',
+    ),
+    'colorProvider': (
+        'textDocument/documentColor',
+        'textDocument.colorProvider',
+    ),
+    'documentFormattingProvider': (
+        'textDocument/formatting',
+        'textDocument.formatting',
+    ),
+    'documentRangeFormattingProvider': (
+        'textDocument/rangeFormatting',
+        'textDocument.rangeFormatting',
+    ),
+    'documentOnTypeFormattingProvider': (
+        'textDocument/onTypeFormatting',
+        'textDocument.onTypeFormatting',
+    ),
+    'renameProvider': ('textDocument/rename', 'textDocument.rename'),
+    'foldingRangeProvider': (
+        'textDocument/foldingRange',
+        'textDocument.foldingRange',
+    ),
+    'selectionRangeProvider': (
+        'textDocument/selectionRange',
+        'textDocument.selectionRange',
+    ),
+    'linkedEditingRangeProvider': (
+        'textDocument/linkedEditingRange',
+        'textDocument.linkedEditingRange',
+    ),
+    'callHierarchyProvider': (
+        'textDocument/prepareCallHierarchy',
+        'textDocument.callHierarchy',
+    ),
+    'typeHierarchyProvider': (
+        'textDocument/prepareTypeHierarchy',
+        'textDocument.typeHierarchy',
+    ),
+    'semanticTokensProvider': (
+        'textDocument/semanticTokens',
+        'textDocument.semanticTokens',
+    ),
+    'monikerProvider': ('textDocument/moniker', 'textDocument.moniker'),
+    'inlineValueProvider': (
+        'textDocument/inlineValue',
+        'textDocument.inlineValue',
+    ),
+    'inlayHintProvider': (
+        'textDocument/inlayHint',
+        'textDocument.inlayHint',
+    ),
+    'diagnosticProvider': (
+        'textDocument/diagnostic',
+        'textDocument.diagnostic',
+    ),
+    'workspaceSymbolProvider': ('workspace/symbol', 'workspace.symbol'),
+    'executeCommandProvider': (
+        'workspace/executeCommand',
+        'workspace.executeCommand',
+    ),
+}
+
+# Reverse mapping: method -> capability
+METHOD_CAPABILITIES: dict[str, str] = {
+    method: cap for cap, (method, _) in CAPABILITY_METHODS.items()
+}
+
+# Priority classes of messages in transit, most urgent first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Priority classes of requests, their responses and notifications, by
+# method.  Messages queued for the client or a server go out in order
+# of priority, so a hover needn't wait for a huge semantic tokens
+# response ahead of it.  Other methods are PRIORITY_NORMAL.
+METHOD_PRIORITIES: dict[str, int] = {
+    'textDocument/completion': PRIORITY_HIGH,
+    'completionItem/resolve': PRIORITY_HIGH,
+    'textDocument/hover': PRIORITY_HIGH,
+    'textDocument/signatureHelp': PRIORITY_HIGH,
+    'textDocument/semanticTokens/full': PRIORITY_LOW,
+    'textDocument/semanticTokens/full/delta': PRIORITY_LOW,
+    'textDocument/semanticTokens/range': PRIORITY_LOW,
+    'textDocument/publishDiagnostics': PRIORITY_LOW,
+    'textDocument/diagnostic': PRIORITY_LOW,
+    'workspace/diagnostic': PRIORITY_LOW,
+    'workspace/symbol': PRIORITY_LOW,
+    '$/progress': PRIORITY_LOW,
+    'window/logMessage': PRIORITY_LOW,
+}
+
+# Severities of window/logMessage, most severe first
+MESSAGE_TYPES = ['error', 'warning', 'info', 'log', 'debug']
+
+# Responses to requests of these methods reach the client as the
+# server sent them, when a single server answers: the huge ones need
+# never be decoded whole.
+OPAQUE_METHODS = frozenset(
+    {
+        'textDocument/definition',
+        'textDocument/declaration',
+        'textDocument/typeDefinition',
+        'textDocument/implementation',
+        'textDocument/references',
+        'textDocument/documentHighlight',
+        'textDocument/diagnostic',
+        'textDocument/formatting',
+        'textDocument/rangeFormatting',
+        'textDocument/rename',
+        'textDocument/selectionRange',
+        'callHierarchy/incomingCalls',
+        'callHierarchy/outgoingCalls',
+        'typeHierarchy/supertypes',
+        'typeHierarchy/subtypes',
+        'workspace/diagnostic',
+        'workspace/symbol',
+    }
+)
+
+
 @dataclass
 class Server:
     """Information about a logical LSP server."""
@@ -31,6 +210,25 @@ class PayloadItem:
     is_error: bool
 
 
+# Cacheable methods whose results also depend on documents other than
+# the one queried, e.g. through imports
+WORKSPACE_DEPENDENT_METHODS = (
+    'textDocument/hover',
+    'textDocument/codeAction',
+)
+
+
+# Semantic tokens requests we may compute deltas for
+SEMANTIC_TOKENS_FULL_METHODS = (
+    'textDocument/semanticTokens/full',
+    'textDocument/semanticTokens/full/delta',
+)
+
+
+def _configuration_key(item: JSON) -> tuple:
+    return ('workspace/configuration', item.get('scopeUri'), item.get('section'))
+
+
 class LspLogic:
     """Decide on message routing and response aggregation."""
 
@@ -39,8 +237,42 @@ class LspLogic:
         self.servers = servers
         # Track document versions: URI -> version number
         self.document_versions: dict[str, dict] = {}
+        # Texts of open documents and the last configuration sent by
+        # the client, for servers joining late
+        self.documents = DocumentMirror()
+        self.configuration: JSON | None = None
         # Map server ID to server object for data recovery
         self.server_by_id: dict[int, Server] = {id(s): s for s in servers}
+        # The client's initialize params, and the capabilities we've
+        # announced to it so far
+        self.initialize_params: JSON = {}
+        self.announced_caps: JSON = {}
+        # Results of idempotent document queries, by request key
+        self.response_cache = ResponseCache()
+        # Inlay hints by document, and inlayHint requests whose range
+        # we narrowed: request id -> (uri, version, original range)
+        self.inlay_hint_cache = InlayHintCache()
+        self.inlay_hint_requests: dict[
+            int | str, tuple[str, int, JSON]
+        ] = {}
+        # Last semantic tokens by document, and semanticTokens
+        # requests whose delta we compute ourselves:
+        # request id -> (uri, previous result id)
+        self.semantic_tokens = SemanticTokensCache()
+        self.semantic_tokens_requests: dict[
+            int | str, tuple[str, str | None]
+        ] = {}
+        # The client's answers to workspace/configuration, by item:
+        # (method, scope URI, section) -> value
+        self.configuration_cache = ResponseCache(name='configuration-cache')
+        # Servers' file watchers, registered with the client as one
+        self.file_watchers = FileWatchers()
+        # Flood control: reports for a progress token are sent at most
+        # once per interval, 0 to send them all; logMessages above
+        # this severity and telemetry can be dropped
+        self.progress_interval_ms = 100
+        self.log_message_type = 'debug'
+        self.drop_telemetry = False
 
     async def on_client_request(
         self, method: str, params: JSON, servers: list[Server]
@@ -72,7 +304,10 @@ class LspLogic:
             return [target]
 
         # initialize and shutdown go to all servers
-        if method in ['initialize', 'shutdown']:
+        if method == 'initialize':
+            self.initialize_params = params
+            return servers
+        if method == 'shutdown':
             return servers
 
         # Route requests to _all_ servers supporting this
@@ -105,7 +340,20 @@ class LspLogic:
                     return [s]
             return []
 
-        # Default: route to primary server
+        # Semantic tokens go to the first server supporting them
+        if method.startswith('textDocument/semanticTokens/'):
+            cands = [
+                s for s in servers if s.caps.get('semanticTokensProvider')
+            ]
+            return cands[:1] or [self.servers[0]]
+
+        # Default: route to primary server, unless it lacks a
+        # capability some other server has
+        cap = METHOD_CAPABILITIES.get(method)
+        if cap and not self.servers[0].caps.get(cap):
+            for s in servers:
+                if s.caps.get(cap):
+                    return [s]
         return [self.servers[0]] if servers else []
 
     async def on_client_notification(self, method: str, params: JSON) -> None:
@@ -121,6 +369,7 @@ class LspLogic:
                     'tracked_version': version,
                     'has_some_diags': False,
                 }
+            self.documents.open(text_doc)
 
         elif method == 'textDocument/didChange':
             text_doc = params.get('textDocument', {})
@@ -131,12 +380,30 @@ class LspLogic:
                     'tracked_version': version,
                     'has_some_diags': False,
                 }
+                self._invalidate_caches(uri)
+                self.documents.change(
+                    uri, version, params.get('contentChanges', [])
+                )
 
         elif method == 'textDocument/didClose':
             text_doc = params.get('textDocument', {})
             uri = text_doc.get('uri')
             if uri is not None:
                 self.document_versions.pop(uri, None)
+                self._invalidate_caches(uri)
+                self.semantic_tokens.forget(uri)
+                self.documents.close(uri)
+
+        elif method in [
+            'workspace/didChangeConfiguration',
+            'workspace/didChangeWatchedFiles',
+            'workspace/didChangeWorkspaceFolders',
+        ]:
+            if method == 'workspace/didChangeConfiguration':
+                self.configuration = params
+            if method != 'workspace/didChangeWatchedFiles':
+                self.configuration_cache.invalidate()
+            self._invalidate_caches()
 
     async def on_client_response(
         self,
@@ -149,7 +416,15 @@ class LspLogic:
         """
         Handle client responses to server requests.
         """
-        pass
+        if (
+            method == 'workspace/configuration'
+            and not is_error
+            and isinstance(response_payload, list)
+            and len(items := request_params.get('items', []))
+            == len(response_payload)
+        ):
+            for item, value in zip(items, response_payload):
+                self.configuration_cache.put(_configuration_key(item), value)
 
     async def on_server_request(
         self, method: str, params: JSON, source: Server
@@ -157,7 +432,29 @@ class LspLogic:
         """
         Handle server requests to the client.
         """
-        pass
+        # Servers asking for a refresh of something know that our
+        # cached results are stale.
+        if method.startswith('workspace/') and method.endswith('/refresh'):
+            self._invalidate_caches()
+
+        # Take file watchers out of registrations: they're merged with
+        # other servers' ones, see `get_watcher_registrations`.
+        if method == 'client/registerCapability':
+            kept = []
+            for r in params.get('registrations', []):
+                if r.get('method') == FileWatchers.METHOD:
+                    self.file_watchers.register(id(source), r)
+                else:
+                    kept.append(r)
+            params['registrations'] = kept
+        elif method == 'client/unregisterCapability':
+            kept = []
+            for r in params.get('unregisterations', []):
+                if r.get('method') == FileWatchers.METHOD:
+                    self.file_watchers.unregister(id(source), r.get('id'))
+                else:
+                    kept.append(r)
+            params['unregisterations'] = kept
 
     async def on_server_notification(
         self, method: str, params: JSON, source: Server
@@ -202,10 +499,334 @@ class LspLogic:
 
         # Extract server name and capabilities from initialize response
         if method == 'initialize':
+            # Servers restarting register their watchers anew
+            self.file_watchers.forget(id(server))
             if 'name' in payload.get('serverInfo', {}):
                 server.name = payload['serverInfo']['name']
             caps = payload.get('capabilities')
             server.caps = caps.copy() if caps else {}
+            if server is self.servers[0]:
+                self.documents.encoding = server.caps.get(
+                    'positionEncoding', 'utf-16'
+                )
+
+    def get_request_key(self, method: str, params: JSON) -> tuple | None:
+        """
+        Get a key identifying the result of a client request.
+        Requests with equal keys are expected to produce equal results,
+        so they can share a single server round trip.
+        Returns None if this request must always reach the servers.
+        """
+        if method not in [
+            'textDocument/documentSymbol',
+            'textDocument/foldingRange',
+            'textDocument/documentLink',
+            'textDocument/hover',
+            'textDocument/codeAction',
+            'textDocument/semanticTokens/full',
+        ]:
+            return None
+        # Partial results are streamed to a client-chosen token, so
+        # they can't be shared.
+        if not params or 'partialResultToken' in params:
+            return None
+        if (uri := params.get('textDocument', {}).get('uri')) and (
+            probe := self.document_versions.get(uri)
+        ):
+            rest = {k: v for k, v in params.items() if k != 'workDoneToken'}
+            return (
+                method,
+                uri,
+                probe['tracked_version'],
+                json.dumps(rest, sort_keys=True),
+            )
+        return None
+
+    def get_server_request_key(
+        self, method: str, params: JSON
+    ) -> tuple | None:
+        """
+        Get a key identifying the client's answer to a server request.
+        Requests with equal keys, from any server, are expected to get
+        equal answers, so they can share a single client round trip.
+        Returns None if this request must always reach the client.
+        """
+        if method != 'workspace/configuration' or not params:
+            return None
+        return (method, json.dumps(params.get('items'), sort_keys=True))
+
+    def get_cached_client_result(
+        self, method: str, params: JSON
+    ) -> tuple | None:
+        """
+        Get a 1-tuple with a result for a server request that we can
+        answer without bothering the client, or None if we can't.
+        """
+        if method == 'client/registerCapability':
+            return None if params.get('registrations') else (None,)
+        if method == 'client/unregisterCapability':
+            return None if params.get('unregisterations') else (None,)
+        if method != 'workspace/configuration' or not (
+            items := (params or {}).get('items')
+        ):
+            return None
+        values = []
+        for item in items:
+            hit = self.configuration_cache.get(_configuration_key(item))
+            if hit is None:
+                return None
+            values.append(hit[0])
+        return (values,)
+
+    def get_watcher_registrations(self) -> tuple[list[JSON], list[JSON]]:
+        """
+        Get (registrations, unregistrations) to send the client so that
+        it watches the files all servers want watched, with a single
+        registration.  Both are empty if that didn't change.
+        """
+        return self.file_watchers.client_changes()
+
+    def route_watched_files(
+        self, changes: list[JSON]
+    ) -> list[tuple[Server, list[JSON]]]:
+        """
+        Coalesce the client's file CHANGES, and split them between
+        the servers watching them.  Servers watching nothing get them
+        all.
+        """
+        changes = coalesce(changes)
+        return [
+            (server, mine)
+            for server in self.servers
+            if (mine := self.file_watchers.changes_for(id(server), changes))
+        ]
+
+    def prepare_request(
+        self,
+        req_id: int | str,
+        method: str,
+        params: JSON,
+        servers: list[Server],
+    ) -> str:
+        """
+        Prepare client request REQ_ID of METHOD with PARAMS, about to
+        be sent to SERVERS as chosen by `on_client_request`.  Returns
+        the method to forward it as.  The request is then either
+        finished by `finish_response` or dropped by
+        `on_request_dropped`.
+        """
+        # Only ask for inlay hints we don't know yet
+        if method == 'textDocument/inlayHint' and servers:
+            self._narrow_inlay_hint_request(req_id, params)
+        if (
+            method in SEMANTIC_TOKENS_FULL_METHODS
+            and servers
+            and self._prepare_semantic_tokens_request(
+                req_id, params, servers[0]
+            )
+        ):
+            return 'textDocument/semanticTokens/full'
+        return method
+
+    def on_request_dropped(self, req_id: int | str) -> None:
+        """
+        Forget client request REQ_ID, which won't be answered by
+        servers: it was refused, or we gave up on it.
+        """
+        self.inlay_hint_requests.pop(req_id, None)
+        self.semantic_tokens_requests.pop(req_id, None)
+
+    def get_cached_result(
+        self, method: str, params: JSON, key: tuple | None
+    ) -> tuple | None:
+        """
+        Get a 1-tuple with a result for a client request that we can
+        answer without bothering servers, or None if we can't.
+        KEY is the request's key from `get_request_key`.
+        """
+        if key is not None:
+            return self.response_cache.get(key)
+        if (
+            method == 'textDocument/inlayHint'
+            and (uri := params.get('textDocument', {}).get('uri'))
+            and (probe := self.document_versions.get(uri))
+            and (rng := params.get('range'))
+            and not self.inlay_hint_cache.missing(
+                uri, probe['tracked_version'], rng
+            )
+        ):
+            bump("inlay-hint-cache.hits")
+            return (self.inlay_hint_cache.slice(uri, rng),)
+        return None
+
+    def finish_response(
+        self,
+        req_id: int | str,
+        method: str,
+        request_params: JSON,
+        payload: JSON | list | None,
+        is_error: bool,
+    ) -> JSON | list | None:
+        """
+        Get the payload to send to the client in response to request
+        REQ_ID of METHOD.  REQUEST_PARAMS are those sent to the servers,
+        and PAYLOAD is their (possibly aggregated) response.
+        """
+        inlay_hints = self.inlay_hint_requests.pop(req_id, None)
+        semantic_tokens = self.semantic_tokens_requests.pop(req_id, None)
+        if is_error:
+            return payload
+
+        if method == 'initialize' and payload:
+            self._advertise_semantic_tokens_delta(cast(JSON, payload))
+            self.announced_caps = dict(
+                cast(JSON, payload).get('capabilities') or {}
+            )
+
+        if semantic_tokens and method in SEMANTIC_TOKENS_FULL_METHODS:
+            uri, previous_id = semantic_tokens
+            return self._semantic_tokens_delta(
+                uri, previous_id, cast(JSON, payload)
+            )
+
+        if (
+            inlay_hints
+            and method == 'textDocument/inlayHint'
+            and isinstance(hints := payload or [], list)
+        ):
+            uri, version, rng = inlay_hints
+            tracked = self.document_versions.get(uri, {})
+            if tracked.get('tracked_version') == version:
+                self.inlay_hint_cache.add(
+                    uri, version, request_params['range'], hints
+                )
+                return self.inlay_hint_cache.slice(uri, rng)
+        return payload
+
+    def get_late_registrations(self, server: Server) -> list[JSON]:
+        """
+        Get registrations announcing to the client capabilities of
+        SERVER that haven't been announced in the initialize response.
+        Only includes those the client can register dynamically.
+        """
+        res = []
+        for cap, val in server.caps.items():
+            if (
+                not val
+                or self.announced_caps.get(cap)
+                or cap not in CAPABILITY_METHODS
+            ):
+                continue
+            method, path = CAPABILITY_METHODS[cap]
+            client_cap = self.initialize_params.get('capabilities', {})
+            for part in path.split('.'):
+                client_cap = (client_cap or {}).get(part)
+            if not (client_cap or {}).get('dynamicRegistration'):
+                continue
+            options = dict(val) if isinstance(val, dict) else {}
+            if method.startswith('textDocument/'):
+                options.setdefault('documentSelector', None)
+            res.append(
+                {
+                    'id': f"rass-{server.name}-{cap}",
+                    'method': method,
+                    'registerOptions': options,
+                }
+            )
+            self.announced_caps[cap] = val
+        return res
+
+    def cache_response(self, key: tuple, payload: JSON | list) -> None:
+        """
+        Cache PAYLOAD as the result for request KEY.
+        Does nothing if the document has changed since the request.
+        """
+        _, uri, version, *_ = key
+        if (probe := self.document_versions.get(uri)) and probe[
+            'tracked_version'
+        ] == version:
+            self.response_cache.put(key, payload)
+
+    def get_priority(self, method: str | None) -> int:
+        """
+        Get the priority class of messages of METHOD, or of responses
+        to requests of METHOD.
+        """
+        return METHOD_PRIORITIES.get(method or '', PRIORITY_NORMAL)
+
+    def get_sequence(self, message: JSON) -> tuple | None:
+        """
+        Get the sequence MESSAGE belongs to.  Messages of the same
+        sequence are delivered in order, whatever their priority:
+        notifications and requests about a document, progress reports
+        for a token, or log messages.  Other requests, and responses,
+        may be reordered freely.  Returns None for lifecycle requests
+        and other notifications, which must keep their place with
+        respect to all messages.
+        """
+        method = message.get('method')
+        if method in ('initialize', 'shutdown'):
+            return None
+        params = message.get('params')
+        if isinstance(params, dict) and (
+            uri := params.get('textDocument', {}).get('uri')
+            or params.get('uri')
+        ):
+            return ('document', uri)
+        if method == '$/progress' and params:
+            return ('progress', params.get('token'))
+        if 'id' in message:
+            return ('id', message['id'])
+        if method in ('window/logMessage', 'window/showMessage'):
+            return ('log', method)
+        return None
+
+    def is_opaque(self, method: str) -> bool:
+        """
+        Tell if responses to requests of METHOD may reach the client
+        without us looking into their results, when a single server
+        answers.  Huge ones are then never decoded whole.
+        """
+        return method in OPAQUE_METHODS
+
+    def should_forward_notification(self, method: str, params: JSON) -> bool:
+        """
+        Tell if server notification METHOD with PARAMS should reach
+        the client at all.
+        """
+        if method == 'telemetry/event':
+            return not self.drop_telemetry
+        if method == 'window/logMessage':
+            return params.get('type', 1) <= (
+                MESSAGE_TYPES.index(self.log_message_type) + 1
+            )
+        return True
+
+    def get_notif_throttle_key(
+        self, method: str, params: JSON
+    ) -> tuple[tuple, bool] | None:
+        """
+        Get throttling info for server notifications superseding
+        earlier ones with the same key: only the latest of those
+        arriving within an interval is sent.  Returns (KEY, FINAL),
+        FINAL meaning the notification must be sent right away and
+        no later one is expected.  Returns None if this notification
+        isn't throttled.
+        """
+        if (
+            method == '$/progress'
+            and self.progress_interval_ms > 0
+            and isinstance(value := params.get('value'), dict)
+            and (kind := value.get('kind')) in ('report', 'end')
+        ):
+            return (('progress', params.get('token')), kind == 'end')
+        return None
+
+    def get_throttle_interval_ms(self, method: str) -> int:
+        """
+        Get the throttling interval of notifications of METHOD.
+        """
+        return self.progress_interval_ms
 
     def get_notif_aggregation_key(
         self, method: str | None, payload: JSON
@@ -375,6 +996,75 @@ class LspLogic:
         # Return the mutated aggregate
         return aggregate
 
+    def _narrow_inlay_hint_request(self, req_id: int | str, params: JSON):
+        """Narrow range of inlayHint request REQ_ID to what we don't
+        know."""
+        if (
+            (uri := params.get('textDocument', {}).get('uri'))
+            and (probe := self.document_versions.get(uri))
+            and (rng := params.get('range'))
+        ):
+            version = probe['tracked_version']
+            missing = self.inlay_hint_cache.missing(uri, version, rng) or rng
+            kind = 'misses' if missing is rng else 'partial'
+            bump(f"inlay-hint-cache.{kind}")
+            self.inlay_hint_requests[req_id] = (uri, version, rng)
+            params['range'] = missing
+
+    def _prepare_semantic_tokens_request(
+        self, req_id: int | str, params: JSON, target: Server
+    ) -> bool:
+        """Note semanticTokens request REQ_ID to TARGET if we'll do
+        deltas.  Tell if we will."""
+        provider = target.caps.get('semanticTokensProvider')
+        if not isinstance(provider, dict):
+            return False
+        full = provider.get('full')
+        if isinstance(full, dict) and full.get('delta'):
+            return False
+        if uri := params.get('textDocument', {}).get('uri'):
+            previous = params.pop('previousResultId', None)
+            self.semantic_tokens_requests[req_id] = (uri, previous)
+            return True
+        return False
+
+    def _semantic_tokens_delta(
+        self, uri: str, previous_id: str | None, payload: JSON | None
+    ) -> JSON | None:
+        """Turn full semantic tokens PAYLOAD into a delta, if possible."""
+        if not payload or (data := payload.get('data')) is None:
+            return payload
+        old = self.semantic_tokens.previous(uri, previous_id)
+        result_id = self.semantic_tokens.remember(uri, data)
+        if old is None:
+            return {**payload, 'resultId': result_id}
+        edits = semantic_tokens_edits(old, data)
+        bump("semantic-tokens.deltas")
+        bump(
+            "semantic-tokens.ints-saved",
+            len(data) - sum(len(e['data']) for e in edits),
+        )
+        return {'resultId': result_id, 'edits': edits}
+
+    def _advertise_semantic_tokens_delta(self, payload: JSON):
+        """Announce full/delta support in initialize response PAYLOAD."""
+        caps = payload.get('capabilities') or {}
+        if provider := caps.get('semanticTokensProvider'):
+            if provider.get('full'):
+                caps['semanticTokensProvider'] = {
+                    **provider,
+                    'full': {'delta': True},
+                }
+
+    def _invalidate_caches(self, uri: str | None = None):
+        """Forget cached results for URI, or for all documents."""
+        self.response_cache.invalidate(uri)
+        if uri is not None:
+            self.response_cache.invalidate_methods(
+                WORKSPACE_DEPENDENT_METHODS
+            )
+        self.inlay_hint_cache.invalidate(uri)
+
     def _stash_data_maybe(self, payload: JSON, server: Server):
         """Stash data field with server ID inline."""
         # FIXME: investigate why payload can be None
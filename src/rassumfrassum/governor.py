@@ -0,0 +1,126 @@
+"""
+Sampling and limiting of server processes' resource usage.
+"""
+
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+from .util import ServerSpec, warn
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+    _CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+except (AttributeError, ValueError, OSError):
+    # Not a POSIX system, no /proc anyway
+    _PAGE_SIZE = _CLOCK_TICKS = 0
+
+
+@dataclass
+class ProcessSample:
+    """Resource usage of a process."""
+
+    rss_bytes: int
+    cpu_seconds: float
+
+    @property
+    def rss_mb(self) -> float:
+        return self.rss_bytes / (1024 * 1024)
+
+    def to_json(self) -> dict:
+        return {
+            'rss-mb': round(self.rss_mb, 1),
+            'cpu-s': round(self.cpu_seconds, 2),
+        }
+
+
+def sample(pid: int) -> ProcessSample | None:
+    """Sample resource usage of PID, or None if /proc can't tell."""
+    if not _PAGE_SIZE:
+        return None
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            resident = int(f.read().split()[1])
+        with open(f'/proc/{pid}/stat') as f:
+            # Skip past the command name, which may contain spaces
+            fields = f.read().rsplit(')', 1)[1].split()
+        # utime and stime are fields 14 and 15, counting from 1
+        ticks = int(fields[11]) + int(fields[12])
+    except (OSError, IndexError, ValueError):
+        return None
+    return ProcessSample(resident * _PAGE_SIZE, ticks / _CLOCK_TICKS)
+
+
+def limited_command(command: list[str], spec: ServerSpec) -> list[str]:
+    """Get COMMAND run with SPEC's nice level and CPU affinity.
+
+    On Linux, those belong to threads, and set from the parent they'd
+    miss those the server started already.  Run by `nice` and
+    `taskset`, the server and all its threads inherit them.
+    """
+    wrappers: list[str] = []
+
+    def wrap(what: str, program: str, *args: str) -> None:
+        if (path := shutil.which(program)) is None:
+            warn(f"Couldn't set {what} of {spec.command[0]}: no {program}")
+        else:
+            wrappers.extend([path, *args])
+
+    if spec.nice is not None:
+        # Relative to our own, where there's such a thing
+        ours = os.nice(0) if hasattr(os, 'nice') else 0
+        wrap("nice level", 'nice', '-n', str(spec.nice - ours))
+    if spec.affinity is not None:
+        wrap(
+            "CPU affinity",
+            'taskset',
+            '-c',
+            ','.join(str(cpu) for cpu in spec.affinity),
+        )
+    return wrappers + command
+
+
+def apply_limits(pid: int, spec: ServerSpec) -> None:
+    """Apply SPEC's resource limits to PID, its scheduling controls
+    being `limited_command`'s business.
+
+    Done from the parent, right after spawning, since preexec_fn isn't
+    safe when threads are around.  Whatever the platform or our
+    permissions don't allow is only warned about.
+    """
+
+    def attempt(what: str, fn, *args) -> None:
+        try:
+            fn(*args)
+        except (AttributeError, OSError, ValueError) as e:
+            warn(f"Couldn't set {what} of {spec.command[0]}: {e}")
+
+    # (Lambdas, as these functions don't exist everywhere)
+    for name, limit in spec.rlimits.items():
+        attempt(
+            f"{name} limit",
+            lambda: resource.prlimit(  # pyright: ignore
+                pid,
+                getattr(resource, f'RLIMIT_{name.upper()}'),
+                (limit, limit),
+            ),
+        )
+    if spec.cgroup is not None:
+        attempt("cgroup", _join_cgroup, pid, spec)
+
+
+def _join_cgroup(pid: int, spec: ServerSpec) -> None:
+    """Move PID into SPEC's cgroup, creating and configuring it.
+    Relative paths are relative to the cgroup v2 mount point."""
+    group = Path('/sys/fs/cgroup') / spec.cgroup  # pyright: ignore
+    group.mkdir(exist_ok=True)
+    for knob, value in spec.cgroup_settings.items():
+        (group / knob).write_text(f'{value}\n')
+    (group / 'cgroup.procs').write_text(f'{pid}\n')
@@ -6,15 +6,93 @@ LSP uses HTTP-style headers: Content-Length: N\r\n\r\n{json}
 import json
 import asyncio
 import sys
-from typing import BinaryIO, cast, Any
+import weakref
+from typing import IO, Any, BinaryIO, Hashable, NamedTuple, cast
+
+from .stats import bump
 
 JSON = dict[str, Any]
 
+# Frames queued for a stream are handed to it at most this many bytes
+# at a time, and only while it buffers less than that, so that bursts
+# take few writes and urgent frames can overtake bulky ones
+CORK_BYTES = 256 * 1024
+
+# Writers wait while this many bytes are queued for a stream
+BACKLOG_BYTES = 16 * 1024 * 1024
+
+
+class _Frame(NamedTuple):
+    priority: int
+    sequence: Hashable | None
+    header: bytes
+    content: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.header) + len(self.content)
+
+
+class _Outbox:
+    """Frames waiting to be written to a stream, in writing order."""
+
+    def __init__(self):
+        self.frames: list[_Frame] = []
+        self.size = 0
+        self.scheduled = False
+        self.resuming = False
+        self.waiters: list[asyncio.Future] = []
+
+    def add(self, frame: _Frame) -> None:
+        """Queue FRAME, ahead of the less urgent frames it may overtake."""
+        i = len(self.frames)
+        if frame.sequence is not None:
+            while i > 0 and (
+                (prev := self.frames[i - 1]).priority > frame.priority
+                and prev.sequence is not None
+                and prev.sequence != frame.sequence
+            ):
+                i -= 1
+        if i < len(self.frames):
+            bump('io.overtakes')
+        self.frames.insert(i, frame)
+        self.size += frame.size
+
+    def take(self, budget: int) -> list[bytes]:
+        """Dequeue frames worth at least BUDGET bytes, or all of them."""
+        chunks: list[bytes] = []
+        while self.frames and budget > 0:
+            frame = self.frames.pop(0)
+            chunks += (frame.header, frame.content)
+            self.size -= frame.size
+            budget -= frame.size
+        if self.size < BACKLOG_BYTES:
+            for waiter in self.waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+            self.waiters.clear()
+        return chunks
+
+
+_outboxes: 'weakref.WeakKeyDictionary[asyncio.StreamWriter, _Outbox]' = (
+    weakref.WeakKeyDictionary()
+)
+
 async def read_message(reader: asyncio.StreamReader) -> JSON | None:
     """
     Read a single JSONRPC message from an async stream.
     Returns None on EOF.
     """
+    if (content := await read_frame(reader)) is None:
+        return None
+    return cast(JSON, json.loads(content.decode('utf-8')))
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes | None:
+    """
+    Read the content of a single frame from an async stream, leaving
+    it to the caller to decode.  Returns None on EOF.
+    """
     headers: dict[str, str] = {}
 
     while True:
@@ -35,21 +113,93 @@ async def read_message(reader: asyncio.StreamReader) -> JSON | None:
     if not content_length:
         return None
 
-    content = await reader.readexactly(int(content_length))
-    return cast(JSON, json.loads(content.decode('utf-8')))
+    return await reader.readexactly(int(content_length))
 
 
-async def write_message(writer: asyncio.StreamWriter, message: JSON) -> None:
+async def write_message(
+    writer: asyncio.StreamWriter,
+    message: JSON,
+    priority: int = 0,
+    sequence: Hashable | None = None,
+) -> None:
     """
     Write a single JSONRPC message to an async stream.
+
+    The frame is queued until the end of the current event loop
+    iteration, so that bursts of messages to the same stream take a
+    single write.  Queued frames are written lowest PRIORITY first,
+    but never ahead of a frame of the same SEQUENCE, and frames
+    without a SEQUENCE are neither overtaken nor overtake.  Use
+    flush() before closing WRITER.
     """
     content = json.dumps(message, ensure_ascii=False)
-    content_bytes = content.encode('utf-8')
+    await write_frame(writer, content.encode('utf-8'), priority, sequence)
 
-    header = f"Content-Length: {len(content_bytes)}\r\n\r\n"
-    writer.write(header.encode('utf-8'))
-    writer.write(content_bytes)
-    await writer.drain()
+
+async def write_frame(
+    writer: asyncio.StreamWriter,
+    content: bytes,
+    priority: int = 0,
+    sequence: Hashable | None = None,
+) -> None:
+    """
+    Write a single frame of already encoded CONTENT to an async
+    stream, queued as write_message() does.
+    """
+    header = f"Content-Length: {len(content)}\r\n\r\n".encode('utf-8')
+    if (box := _outboxes.get(writer)) is None:
+        box = _outboxes[writer] = _Outbox()
+    box.add(_Frame(priority, sequence, header, content))
+    bump('io.frames')
+    if not box.scheduled and not box.resuming:
+        box.scheduled = True
+        asyncio.get_running_loop().call_soon(_pump, writer)
+    if box.size >= BACKLOG_BYTES:
+        waiter = asyncio.get_running_loop().create_future()
+        box.waiters.append(waiter)
+        await waiter
+    if writer.is_closing():
+        # Raises if the connection was lost
+        await writer.drain()
+
+
+def _pump(writer: asyncio.StreamWriter) -> None:
+    """Hand WRITER the most urgent queued frames it has room for, and
+    come back for the rest once it drained."""
+    if not (box := _outboxes.get(writer)):
+        return
+    box.scheduled = False
+    if writer.is_closing():
+        box.take(box.size)
+        return
+    room = CORK_BYTES - writer.transport.get_write_buffer_size()
+    if chunks := box.take(room):
+        writer.writelines(chunks)
+        bump('io.writes')
+    if box.frames and not box.resuming:
+        box.resuming = True
+        asyncio.ensure_future(_resume(writer, box))
+
+
+async def _resume(writer: asyncio.StreamWriter, box: _Outbox) -> None:
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+    box.resuming = False
+    _pump(writer)
+
+
+def flush(writer: asyncio.StreamWriter) -> None:
+    """Write all frames queued for WRITER, at once."""
+    if not (box := _outboxes.get(writer)) or not box.frames:
+        return
+    chunks = box.take(box.size)
+    if writer.is_closing():
+        # drain() will tell
+        return
+    writer.writelines(chunks)
+    bump('io.writes')
 
 
 def read_message_sync(stream: BinaryIO = sys.stdin.buffer) -> JSON | None:
@@ -57,6 +207,16 @@ def read_message_sync(stream: BinaryIO = sys.stdin.buffer) -> JSON | None:
     Read a single JSONRPC message from stdin (or provided stream) synchronously.
     Returns None on EOF.
     """
+    if (content := read_frame_sync(stream)) is None:
+        return None
+    return cast(JSON, json.loads(content.decode('utf-8')))
+
+
+def read_frame_sync(stream: IO[bytes] = sys.stdin.buffer) -> bytes | None:
+    """
+    Read the content of a single frame from stdin (or provided
+    stream) synchronously.  Returns None on EOF.
+    """
     headers: dict[str, str] = {}
     while True:
         line = stream.readline()
@@ -72,7 +232,9 @@ def read_message_sync(stream: BinaryIO = sys.stdin.buffer) -> JSON | None:
     if content_length == 0:
         return None
     content = stream.read(content_length)
-    return cast(JSON, json.loads(content.decode('utf-8')))
+    if len(content) < content_length:
+        return None
+    return content
 
 
 def write_message_sync(message: JSON, stream : BinaryIO = sys.stdout.buffer) -> None:
@@ -0,0 +1,66 @@
+"""
+Concurrent handling of messages, in order only where it matters, so
+that a slow logic hook holds up nothing unrelated.
+"""
+
+import asyncio
+import sys
+import traceback
+from typing import Coroutine, Hashable
+
+from .stats import bump
+from .util import log
+
+
+class Lanes:
+    """Tasks handling messages, each in its lane.
+
+    A task starts once the previous task of its lane is done, so
+    messages of the same lane, such as those about a document, are
+    handled in order.  Tasks of lane None are barriers: they start
+    once all earlier tasks are done, and all later tasks wait for
+    them.  Waits are counted in the stats under NAME.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # Lane -> its latest task
+        self.tails: dict[Hashable, asyncio.Task] = {}
+        self.barrier: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self.tails)
+
+    def submit(self, lane: Hashable | None, coro: Coroutine) -> None:
+        """Run CORO in LANE."""
+        if lane is None:
+            before = [*self.tails.values(), self.barrier]
+            self.tails.clear()
+        else:
+            before = [self.tails.get(lane), self.barrier]
+        before = [t for t in before if t and not t.done()]
+        if before:
+            bump(f'{self.name}.waits')
+        task = asyncio.create_task(self._run(before, coro))
+        if lane is None:
+            self.barrier = task
+            return
+        self.tails[lane] = task
+        task.add_done_callback(
+            lambda t: self.tails.get(lane) is t and self.tails.pop(lane)
+        )
+
+    async def _run(self, before: list[asyncio.Task], coro: Coroutine) -> None:
+        if before:
+            await asyncio.wait(before)
+        try:
+            await coro
+        except Exception as e:
+            log(f'Error handling message: {e}')
+            print(traceback.format_exc(), file=sys.stderr)
+
+    async def drain(self) -> None:
+        """Wait for all tasks submitted so far."""
+        pending = [*self.tails.values(), self.barrier]
+        if pending := [t for t in pending if t and not t.done()]:
+            await asyncio.wait(pending)
@@ -7,10 +7,15 @@ import argparse
 import asyncio
 import sys
 
+from .daemon import run_daemon, run_shim
+from .frassum import MESSAGE_TYPES
 from .preset import load_preset
 from .rassum import run_multiplexer
+from .transport import parse_address
 from .util import (
+    ServerSpec,
     log,
+    warn,
     set_log_level,
     set_max_log_length,
     LOG_SILENT,
@@ -54,12 +59,11 @@ def parse_server_commands(args: list[str]) -> tuple[list[str], list[list[str]]]:
     return rass_args, server_commands
 
 
-def main() -> None:
+def parse_args(args: list[str]) -> argparse.Namespace:
     """
-    Parse arguments and start the multiplexer.
+    Parse rass command line ARGS.  Server commands after '--'
+    separators end up in the 'server_commands' attribute.
     """
-    args = sys.argv[1:]
-
     # Parse multiple '--' separators for multiple servers
     rass_args, server_commands = parse_server_commands(args)
 
@@ -88,10 +92,32 @@ def main() -> None:
         action='store_true',
         help='Drop tardy messages instead of re-sending aggregations.',
     )
+    parser.add_argument(
+        '--progressive-init',
+        action='store_true',
+        help='Answer initialize as soon as the primary server does, and '
+        'register capabilities of later servers dynamically.',
+    )
+    parser.add_argument(
+        '--max-restarts',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Restart a crashed server up to N times in a row, instead of '
+        'exiting (default: 0).',
+    )
+    parser.add_argument(
+        '--governor-interval-ms',
+        type=int,
+        default=5000,
+        metavar='N',
+        help='Check servers\' memory budgets and idleness every N ms '
+        '(default: 5000).',
+    )
     parser.add_argument(
         '--logic-class',
         type=str,
-        default='LspLogic',
+        default=None,
         metavar='CLASS',
         help='Logic class to use for routing (default: LspLogic).',
     )
@@ -110,12 +136,142 @@ def main() -> None:
         help='Maximum log message length in bytes; 0 for unlimited (default: 4000).',
     )
     parser.add_argument(
-        '--threaded-stdio',
+        '--response-cache-size',
+        type=int,
+        default=128,
+        metavar='N',
+        help='Cache up to N results of idempotent document queries; '
+        '0 disables the cache (default: 128).',
+    )
+    parser.add_argument(
+        '--shed-depth',
+        type=int,
+        default=32,
+        metavar='N',
+        help='Answer low priority requests with ContentModified rather '
+        'than send them to servers with N requests outstanding; 0 never '
+        'sheds (default: 32).',
+    )
+    parser.add_argument(
+        '--breaker-cooldown-s',
+        type=float,
+        default=30,
+        metavar='N',
+        help='Leave servers that keep timing out out of aggregations for '
+        'N seconds; 0 never does (default: 30).',
+    )
+    parser.add_argument(
+        '--progress-interval-ms',
+        type=int,
+        default=100,
+        metavar='N',
+        help='Send the client at most one $/progress report per token '
+        'every N ms, the latest; 0 sends them all (default: 100).',
+    )
+    parser.add_argument(
+        '--log-messages',
+        type=str,
+        choices=MESSAGE_TYPES,
+        default='debug',
+        help='Forward window/logMessage notifications up to this '
+        'severity (default: debug).',
+    )
+    parser.add_argument(
+        '--drop-telemetry',
         action='store_true',
-        default=True,
+        help='Don\'t forward telemetry/event notifications to the client.',
+    )
+    parser.add_argument(
+        '--offload-bytes',
+        type=int,
+        default=4 * 1024 * 1024,
+        metavar='N',
+        help='Pass on responses of N bytes or more that rass needn\'t look '
+        'into as they are, and decode other such messages in worker '
+        'threads under free-threaded Python; 0 never does (default: '
+        '4194304).',
+    )
+    parser.add_argument(
+        '--reader-threads',
+        action='store_true',
+        help='Read and decode each server\'s messages in a thread of its '
+        'own, which pays off under free-threaded Python.',
+    )
+    parser.add_argument(
+        '--threaded-stdio',
+        action=argparse.BooleanOptionalAction,
+        default=sys.platform == 'win32',
         help='Use threaded stdio bridge (default: True on Windows, False otherwise).',
     )
+    parser.add_argument(
+        '--listen',
+        type=parse_address,
+        default=None,
+        metavar='ADDRESS',
+        help='Wait for the client on socket ADDRESS, unix:PATH or '
+        'tcp:[HOST:]PORT, instead of talking to it on stdio.',
+    )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Run as a daemon serving clients of \'rass --attach\'.',
+    )
+    parser.add_argument(
+        '--attach',
+        action='store_true',
+        help='Connect to the daemon, starting it if needed, and let it '
+        'serve this client with warm servers.',
+    )
+    parser.add_argument(
+        '--daemon-socket',
+        type=str,
+        default=None,
+        metavar='PATH',
+        help='Unix socket of the daemon (default: rassumfrassum-UID.sock '
+        'in $XDG_RUNTIME_DIR or the temporary directory).',
+    )
+    parser.add_argument(
+        '--linger-s',
+        type=float,
+        default=600,
+        metavar='N',
+        help='Keep servers warm in the daemon for N seconds after their '
+        'last client left (default: 600).',
+    )
     opts = parser.parse_args(rass_args)
+    opts.server_commands = server_commands
+    return opts
+
+
+def load_server_specs(opts: argparse.Namespace) -> list[ServerSpec]:
+    """
+    Get specs of the servers to run, loading OPTS's preset if any.
+    The preset may also set OPTS's logic class.
+    """
+    server_specs = [ServerSpec.of(cmd) for cmd in opts.server_commands]
+    if opts.preset:
+        preset_servers, preset_logic_class = load_preset(opts.preset)
+        server_specs = preset_servers + server_specs
+
+        # Use preset logic class if --logic-class wasn't explicitly set
+        if preset_logic_class and opts.logic_class is None:
+            opts.logic_class = (
+                f"{preset_logic_class.__module__}.{preset_logic_class.__name__}"
+            )
+    if opts.logic_class is None:
+        opts.logic_class = 'LspLogic'
+
+    if server_specs and server_specs[0].lazy:
+        warn(f"Primary server can't be lazy: {server_specs[0].command[0]}")
+        server_specs[0].lazy = False
+    return server_specs
+
+
+def main() -> None:
+    """
+    Parse arguments and start the multiplexer.
+    """
+    opts = parse_args(sys.argv[1:])
 
     # Set log level based on argument
     log_level_map = {
@@ -129,29 +285,29 @@ def main() -> None:
     set_log_level(log_level_map[opts.log_level])
     set_max_log_length(opts.max_log_length)
 
-    # Load preset if specified
-    preset_logic_class = None
-    if opts.preset:
-        preset_servers, preset_logic_class = load_preset(opts.preset)
-        server_commands = preset_servers + server_commands
-
-        # Use preset logic class if --logic-class wasn't explicitly set
-        if preset_logic_class and '--logic-class' not in rass_args:
-            opts.logic_class = (
-                f"{preset_logic_class.__module__}.{preset_logic_class.__name__}"
-            )
-
-    if not server_commands:
-        log(
-            "Usage: rass [OPTIONS] -- <primary-server> [args] [-- <secondary-server> [args]]..."
-        )
-        sys.exit(1)
-
     # Validate
     assert opts.delay_ms >= 0, "--delay-ms must be non-negative"
 
+    if opts.daemon:
+        run = run_daemon(opts)
+    elif opts.attach:
+        # The daemon loads presets and starts servers itself
+        args = sys.argv[1:]
+        cut = args.index('--') if '--' in args else len(args)
+        args = [a for a in args[:cut] if a != '--attach'] + args[cut:]
+        run = run_shim(args, opts)
+    else:
+        # Load preset if specified
+        server_specs = load_server_specs(opts)
+        if not server_specs:
+            log(
+                "Usage: rass [OPTIONS] -- <primary-server> [args] [-- <secondary-server> [args]]..."
+            )
+            sys.exit(1)
+        run = run_multiplexer(server_specs, opts)
+
     try:
-        asyncio.run(run_multiplexer(server_commands, opts))
+        asyncio.run(run)
     except KeyboardInterrupt:
         log("\nShutting down...")
     except Exception as e:
@@ -0,0 +1,75 @@
+"""
+A mirror of the documents the client has open, for replaying them to
+servers that join late.
+"""
+
+from .json import JSON
+
+
+def _char_index(line: str, character: int, encoding: str) -> int:
+    """Convert CHARACTER, in ENCODING units, to an index into LINE."""
+    if encoding == 'utf-32':
+        return min(character, len(line))
+    units = 0
+    for i, c in enumerate(line):
+        if units >= character:
+            return i
+        if encoding == 'utf-8':
+            units += len(c.encode('utf-8'))
+        else:
+            units += 2 if ord(c) > 0xFFFF else 1
+    return len(line)
+
+
+def _offset(text: str, position: JSON, encoding: str) -> int:
+    """Convert LSP POSITION to an offset into TEXT."""
+    start = 0
+    for _ in range(position.get('line', 0)):
+        nl = text.find('\n', start)
+        if nl < 0:
+            return len(text)
+        start = nl + 1
+    end = text.find('\n', start)
+    line = text[start : end if end >= 0 else len(text)]
+    return start + _char_index(line, position.get('character', 0), encoding)
+
+
+class DocumentMirror:
+    """Texts of open documents, kept up to date with client edits."""
+
+    def __init__(self, encoding: str = 'utf-16'):
+        # Position encoding negotiated with servers
+        self.encoding = encoding
+        # URI -> TextDocumentItem
+        self.docs: dict[str, JSON] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def open(self, item: JSON) -> None:
+        """Start mirroring TextDocumentItem ITEM."""
+        if uri := item.get('uri'):
+            self.docs[uri] = dict(item)
+
+    def change(self, uri: str, version, changes: list[JSON]) -> None:
+        """Apply content CHANGES to URI, now at VERSION."""
+        if not (doc := self.docs.get(uri)):
+            return
+        text = doc.get('text', '')
+        for change in changes:
+            if (rng := change.get('range')) is None:
+                text = change.get('text', '')
+            else:
+                start = _offset(text, rng['start'], self.encoding)
+                end = _offset(text, rng['end'], self.encoding)
+                text = text[:start] + change.get('text', '') + text[end:]
+        doc['text'] = text
+        doc['version'] = version
+
+    def close(self, uri: str) -> None:
+        """Stop mirroring URI."""
+        self.docs.pop(uri, None)
+
+    def items(self) -> list[JSON]:
+        """Get a TextDocumentItem for each open document."""
+        return [dict(doc) for doc in self.docs.values()]
@@ -0,0 +1,92 @@
+"""
+Huge frames, kept off the event loop where possible.
+
+Decoding a frame of tens of megabytes holds the event loop for
+hundreds of milliseconds, during which no other message is handled,
+and encoding it again for the client takes about as long.  Responses
+whose content nobody needs to look into are best sent on as the very
+bytes the server sent, never decoded: their id is sniffed from the
+frame's head, or its tail.  Other frames are decoded exactly once, by
+worker threads under free-threaded Python, else in place.
+"""
+
+import asyncio
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .json import JSON
+from .stats import bump
+
+WORKERS = 2
+
+# How much of a frame's head and tail is looked at for its id
+SNIFF_BYTES = 256
+
+_JSONRPC = rb'(?:"jsonrpc"\s*:\s*"2\.0"\s*,\s*)?'
+_ID = rb'(-?\d+|"[^"\\]*")'
+# {"jsonrpc": "2.0", "id": ID, "result": ...
+_HEAD_ID = re.compile(
+    rb'\s*\{\s*' + _JSONRPC + rb'"id"\s*:\s*' + _ID + rb'\s*,\s*'
+    + _JSONRPC + rb'"result"\s*:'
+)
+# {"jsonrpc": "2.0", "result": ..., "id": ID}
+_HEAD_RESULT = re.compile(rb'\s*\{\s*' + _JSONRPC + rb'"result"\s*:')
+_TAIL_ID = re.compile(
+    rb',\s*"id"\s*:\s*' + _ID
+    + rb'\s*(?:,\s*"jsonrpc"\s*:\s*"2\.0"\s*)?\}\s*$'
+)
+
+
+def free_threaded() -> bool:
+    return not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+def sniff(content: bytes) -> JSON | None:
+    """Get the envelope of CONTENT, a JSONRPC message, if it's
+    obviously a successful response: its id, found in its head or its
+    tail, where servers put it.  None if that's not obvious."""
+    head = content[:SNIFF_BYTES]
+    if match := _HEAD_ID.match(head):
+        found = match.group(1)
+    elif _HEAD_RESULT.match(head) and (
+        match := _TAIL_ID.search(content[-SNIFF_BYTES:])
+    ):
+        found = match.group(1)
+    else:
+        return None
+    return {'jsonrpc': '2.0', 'id': json.loads(found)}
+
+
+class Offloader:
+    """Decoder of frames, huge ones in worker threads where they can
+    run in parallel.
+
+    THRESHOLD is the size of the smallest frame deemed huge, 0 meaning
+    none is.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.executor: ThreadPoolExecutor | None = None
+
+    def wants(self, content: bytes) -> bool:
+        return 0 < self.threshold <= len(content)
+
+    async def decode(self, content: bytes) -> JSON:
+        """Decode CONTENT whole, off the event loop only if threads
+        can do that in parallel."""
+        if not (self.wants(content) and free_threaded()):
+            return json.loads(content)
+        bump('offload.frames')
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(WORKERS, 'rass-offload')
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, json.loads, content
+        )
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
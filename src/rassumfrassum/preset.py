@@ -1,12 +1,17 @@
 """Preset loading and management for rassumfrassum."""
 
 import importlib.util
+import json
 import os
+import re
 import sys
+import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable
 
-from .util import PresetResult
+from .util import PresetResult, ServerSpec, debug
+
+Paths = Iterable[str | os.PathLike]
 
 
 def _get_config_dirs() -> list[Path]:
@@ -63,7 +68,7 @@ def load_preset(name_or_path: str) -> PresetResult:
     lclass_fn = getattr(module, 'logic_class', None)
 
     return (
-        servers_fn() if servers_fn else [],
+        [ServerSpec.of(s) for s in servers_fn()] if servers_fn else [],
         lclass_fn() if lclass_fn else None,
     )
 
@@ -71,13 +76,16 @@ def load_preset(name_or_path: str) -> PresetResult:
 def _load_preset_from_file(filepath: str) -> Any:
     """Load from external Python file using importlib.util."""
     abs_path = os.path.abspath(filepath)
+    # A module of its own for each file: a daemon loads several
+    # presets, whose classes must not replace each other's
+    name = '_preset_' + re.sub(r'\W', '_', abs_path)
 
-    spec = importlib.util.spec_from_file_location("_preset_module", abs_path)
+    spec = importlib.util.spec_from_file_location(name, abs_path)
     if spec is None or spec.loader is None:
         raise FileNotFoundError(f"Cannot load preset from {filepath}")
 
     module = importlib.util.module_from_spec(spec)
-    sys.modules["_preset_module"] = module
+    sys.modules[name] = module
     spec.loader.exec_module(module)
     return module
 
@@ -92,3 +100,73 @@ def _load_preset_from_bundle(name: str) -> Any:
     presets_dir = os.path.dirname(presets_spec.origin)
     preset_path = os.path.join(presets_dir, f'{name}.py')
     return _load_preset_from_file(preset_path)
+
+
+def cache_dir() -> Path:
+    """
+    Get the directory of values cached by presets:
+    $XDG_CACHE_HOME/rassumfrassum, or ~/.cache/rassumfrassum.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'rassumfrassum'
+
+
+def _cache_file(key: str) -> Path:
+    return cache_dir() / (re.sub(r'[^\w.-]', '_', key) + '.json')
+
+
+def _mtimes(paths: Paths) -> dict[str, float | None]:
+    res: dict[str, float | None] = {}
+    for path in paths:
+        try:
+            res[str(path)] = os.stat(path).st_mtime
+        except OSError:
+            res[str(path)] = None
+    return res
+
+
+def cached(
+    key: str,
+    compute: Callable[[], Any],
+    ttl: float | None = None,
+    watch: Paths | Callable[[Any], Paths] = (),
+) -> Any:
+    """
+    Get the value of KEY, memoized on disk across runs of rass.
+
+    COMPUTE, which must return something JSON can encode, is called
+    if there's no value yet, if it's older than TTL seconds, or if
+    any of the WATCH paths was modified, created or deleted since.
+    WATCH may also be a function of the value giving the paths, such
+    as the directory a lookup found.  Exceptions of COMPUTE propagate,
+    and nothing is cached then.
+    """
+    path = _cache_file(key)
+    try:
+        entry = json.loads(path.read_text())
+        if (ttl is None or time.time() - entry['time'] < ttl) and entry[
+            'mtimes'
+        ] == _mtimes(entry['mtimes']):
+            return entry['value']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    debug(f"Computing preset value {key}")
+    value = compute()
+    paths = watch(value) if callable(watch) else watch
+    entry = {'time': time.time(), 'mtimes': _mtimes(paths), 'value': value}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(entry))
+        os.replace(tmp, path)
+    except OSError as e:
+        debug(f"Can't cache preset value {key}: {e}")
+    return value
+
+
+def forget(key: str) -> None:
+    """Forget the cached value of KEY, if any."""
+    try:
+        _cache_file(key).unlink()
+    except OSError:
+        pass
@@ -1,12 +1,28 @@
 """Vue preset: vue-language-server + tailwindcss-language-server with custom logic."""
 
 import asyncio
+import subprocess
 from pathlib import Path
 
 from rassumfrassum.frassum import LspLogic, Server
 from rassumfrassum.json import JSON
+from rassumfrassum.preset import cached
 from rassumfrassum.util import dmerge
 
+# How long to trust the TypeScript SDK found, unless it goes away
+TSDK_TTL_S = 24 * 3600
+
+
+def find_tsdk() -> str:
+    """Find the TypeScript SDK via npm, which takes about a second."""
+    npm = subprocess.run(
+        ['npm', 'list', '--global', '--parseable', 'typescript'],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return str(Path(npm.stdout.strip().split('\n')[0]) / 'lib')
+
 
 class VueLogic(LspLogic):
     """Custom logic LSP for Vue-friendly servers."""
@@ -16,16 +32,15 @@ class VueLogic(LspLogic):
     ):
         if method == 'initialize':
             # vue-language server absolutely needs a TypeScript SDK
-            # path. Find it via npm
+            # path. Find it via npm, once in a while
             try:
-                proc = await asyncio.create_subprocess_exec(
-                    'npm', 'list', '--global', '--parseable', 'typescript',
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
+                tsdk_path = await asyncio.to_thread(
+                    cached,
+                    'vue.tsdk',
+                    find_tsdk,
+                    ttl=TSDK_TTL_S,
+                    watch=lambda tsdk: [tsdk],
                 )
-                stdout, _ = await proc.communicate()
-                first_line = stdout.decode().strip().split('\n')[0]
-                tsdk_path = str(Path(first_line) / 'lib')
             except Exception:
                 tsdk_path = '/usr/local/lib/node_modules/typescript/lib'
 
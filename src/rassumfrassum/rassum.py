@@ -8,54 +8,211 @@ import importlib
 import json
 import os
 import sys
+import time
 import traceback
 from dataclasses import dataclass, field
 from typing import Optional, cast
 
-from .frassum import PayloadItem, Server
+from .breaker import CircuitBreaker
+from .frassum import PRIORITY_LOW, PayloadItem, Server
+from .governor import apply_limits, limited_command, sample
 from .json import (
     JSON,
+    flush,
 )
 from .json import (
-    read_message as read_lsp_message,
+    read_frame as read_lsp_frame,
+)
+from .json import (
+    write_frame as write_lsp_frame,
 )
 from .json import (
     write_message as write_lsp_message,
 )
-from .util import event, log, warn, debug
-from .stdio import create_stdin_reader, create_stdout_writer
+from .lanes import Lanes
+from .offload import Offloader, sniff
+from .stats import bump, counter, register_gauge, snapshot
+from .util import ServerSpec, event, log, warn, debug
+from .stdio import (
+    connect_reader,
+    connect_writer,
+    create_stdin_reader,
+    create_stdout_writer,
+    enlarge_pipe,
+    ReaderThread,
+)
+from .table import BoundedTable
+from .transport import accept_one, connect_server, server_address
+
+# Restart backoff: first delay, and maximum delay, in seconds.  A server
+# that ran for longer than RESTART_STABLE_S before crashing starts over.
+RESTART_BACKOFF_S = 0.5
+RESTART_MAX_BACKOFF_S = 30.0
+RESTART_STABLE_S = 60.0
+
+# How long to wait for a server to shut down gracefully, in seconds
+STOP_TIMEOUT_S = 5.0
+
+# How long to collect the client's file events before sending them to
+# servers, in seconds
+WATCHED_FILES_DELAY_S = 0.05
+
+# Bounds of tables tracking messages in transit, in case peers never
+# answer.  Server requests unanswered for SERVER_REQUEST_TTL_S seconds
+# are given up on.
+TABLE_CAPACITY = 4096
+SERVER_REQUEST_TTL_S = 3600.0
 
 
 class InferiorProcess:
     """A server subprocess and its associated logical server info."""
 
-    def __init__(self, process, server):
-        self.process = process
+    def __init__(self, server, spec, reader_thread=False):
+        self.process = None
+        # Streams to talk to the server, its stdio or a socket
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        # Where stdio pipes allow, a thread may read and decode the
+        # server's messages instead of the reader
+        self.reader_thread = reader_thread
+        self.frames: ReaderThread | None = None
         self.server = server
+        self.spec = spec
+        # Lazy servers sleep until a matching document is opened
+        self.dormant = spec.lazy
+        # Consecutive restarts after crashes
+        self.restarts = 0
+        # Governor state: servers stopped for being idle hibernate
+        # until they're sent something
+        self.hibernating = False
+        self.stopping = False
+        self.under_budget = False
+        self.last_active = 0.0
+        # Messages held back while the server answers initialize
+        self.initializing = False
+        self.held: list[tuple[JSON, str, str]] = []
+        # Monotonic times of startup milestones
+        self.timings: dict[str, float] = {}
+        # Outstanding requests and timeouts, for overload protection
+        self.breaker = CircuitBreaker()
 
     def __repr__(self):
         return f"InferiorProcess({self.name})"
 
-    process: asyncio.subprocess.Process
+    process: asyncio.subprocess.Process | None
     server: Server
-
-    @property
-    def stdin(self) -> asyncio.StreamWriter:
-        return self.process.stdin  # pyright: ignore[reportReturnType]
-
-    @property
-    def stdout(self) -> asyncio.StreamReader:
-        return self.process.stdout  # pyright: ignore[reportReturnType]
+    spec: ServerSpec
 
     @property
     def stderr(self) -> asyncio.StreamReader:
-        return self.process.stderr  # pyright: ignore[reportReturnType]
+        assert self.process and self.process.stderr
+        return self.process.stderr
 
     @property
     def name(self) -> str:
         """Convenience property to access server name."""
         return self.server.name
 
+    @property
+    def running(self) -> bool:
+        return self.process is not None
+
+    @property
+    def reachable(self) -> bool:
+        """Whether messages for this server will eventually reach it."""
+        return (
+            self.running
+            or self.initializing
+            or self.hibernating
+            or self.stopping
+        )
+
+    @property
+    def state(self) -> str:
+        if self.stopping:
+            return "stopping"
+        if self.running:
+            return "running"
+        if self.initializing:
+            return "starting"
+        if self.dormant:
+            return "dormant"
+        if self.hibernating:
+            return "hibernating"
+        return "stopped"
+
+    async def spawn(self) -> None:
+        """Start the server subprocess, and connect to it."""
+        command, kind = self.spec.command, self.spec.transport
+        if kind != "stdio":
+            where = server_address(kind)
+            fill = str(where[1]) if kind == "tcp" else where
+            command = [
+                a.replace("{port}", fill).replace("{path}", fill)
+                for a in command
+            ]
+        command = limited_command(command, self.spec)
+        log(f"Launching {self.name}: {' '.join(command)}")
+        self.timings = {"launch": time.monotonic()}
+        # Make stdio pipes ourselves, where we can enlarge them
+        pipes = kind == "stdio" and sys.platform != "win32"
+        if pipes:
+            (in_read, in_write), (out_read, out_write) = os.pipe(), os.pipe()
+            enlarge_pipe(in_write)
+            enlarge_pipe(out_read)
+            stdin, stdout = in_read, out_write
+        elif kind == "stdio":
+            stdin = stdout = asyncio.subprocess.PIPE
+        else:
+            stdin = stdout = asyncio.subprocess.DEVNULL
+        try:
+            self.process = process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=stdin,
+                stdout=stdout,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.spec.cwd,
+            )
+        except OSError:
+            if pipes:
+                os.close(in_write)  # pyright: ignore
+                os.close(out_read)  # pyright: ignore
+            raise
+        finally:
+            if pipes:
+                os.close(in_read)  # pyright: ignore
+                os.close(out_write)  # pyright: ignore
+        apply_limits(process.pid, self.spec)
+        if pipes:
+            self.writer = await connect_writer(
+                os.fdopen(in_write, "wb", buffering=0)  # pyright: ignore
+            )
+            if self.reader_thread:
+                self.reader = None
+                self.frames = ReaderThread(
+                    os.fdopen(out_read, "rb"),  # pyright: ignore
+                    f"{self.name}-reader",
+                )
+            else:
+                self.reader = await connect_reader(
+                    os.fdopen(out_read, "rb", buffering=0)  # pyright: ignore
+                )
+        elif kind == "stdio":
+            self.reader, self.writer = process.stdout, process.stdin
+        else:
+            try:
+                self.reader, self.writer = await connect_server(
+                    kind, where, process  # pyright: ignore
+                )
+            except OSError:
+                self.process = None
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+                raise
+        self.timings["spawn"] = self.last_active = time.monotonic()
+        self.under_budget = False
+
 
 @dataclass
 class AggregationState:
@@ -66,7 +223,16 @@ class AggregationState:
     method: str
     aggregate: dict[int, PayloadItem]
     dispatched: bool | str = False
-    timeout_task: Optional[asyncio.Task] = field(default=None)
+    timer: Optional[asyncio.TimerHandle] = field(default=None)
+
+
+@dataclass
+class ThrottleState:
+    """State of notifications superseding each other."""
+
+    last_sent: float = 0.0
+    pending: Optional[JSON] = None
+    timer: Optional[asyncio.TimerHandle] = None
 
 
 def log_message(direction: str, message: JSON, method: str) -> None:
@@ -86,9 +252,10 @@ async def forward_server_stderr(proc: InferiorProcess) -> None:
     """
     Forward server's stderr to our stderr, with appropriate prefixing.
     """
+    stderr = proc.stderr
     try:
         while True:
-            line = await proc.stderr.readline()
+            line = await stderr.readline()
             if not line:
                 break
 
@@ -100,40 +267,68 @@ async def forward_server_stderr(proc: InferiorProcess) -> None:
 
 
 async def launch_server(
-    server_command: list[str], server_index: int
+    spec: ServerSpec, server_index: int, reader_thread: bool = False
 ) -> InferiorProcess:
-    """Launch a single LSP server subprocess."""
-    basename = os.path.basename(server_command[0])
+    """Launch a single LSP server subprocess, unless it's lazy.
+    READER_THREAD says to read its messages in a thread of its own."""
+    basename = os.path.basename(spec.command[0])
     # Make name unique by including index for multiple servers
     name = f"{basename}#{server_index}" if server_index > 0 else basename
 
-    log(f"Launching {name}: {' '.join(server_command)}")
-
-    process = await asyncio.create_subprocess_exec(
-        *server_command,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
     server = Server(name=name)
-    proc = InferiorProcess(process=process, server=server)
+    proc = InferiorProcess(
+        server=server, spec=spec, reader_thread=reader_thread
+    )
     server.cookie = proc
+    if spec.lazy:
+        log(f"Deferring {name} until a matching document is opened")
+    else:
+        await proc.spawn()
     return proc
 
 
+def startup_report(procs: list[InferiorProcess], t0: float) -> JSON:
+    """Milliseconds from T0 to each server's startup milestones."""
+    return {
+        p.name: {k: round((v - t0) * 1000) for k, v in p.timings.items()}
+        for p in procs
+    }
+
+
 async def run_multiplexer(
-    server_commands: list[list[str]], opts: argparse.Namespace
+    server_specs: list[ServerSpec],
+    opts: argparse.Namespace,
+    client: tuple[asyncio.StreamReader, asyncio.StreamWriter] | None = None,
 ) -> None:
     """
     Main multiplexer.
     Blocks on asyncio.gather() until a bunch of loopy async tasks complete.
 
+    The client is on stdio, unless CLIENT streams are given or
+    OPTS say to listen for it on a socket.
     """
-    # Launch all servers
-    procs: list[InferiorProcess] = []
-    for i, cmd in enumerate(server_commands):
-        p = await launch_server(cmd, i)
-        procs.append(p)
+    t0 = time.monotonic()
+
+    async def client_streams():
+        if client:
+            return client
+        if opts.listen:
+            return await accept_one(*opts.listen)
+        return (
+            await create_stdin_reader(opts.threaded_stdio),
+            await create_stdout_writer(opts.threaded_stdio),
+        )
+
+    # Launch all servers, while getting client streams
+    procs, (client_reader, client_writer) = await asyncio.gather(
+        asyncio.gather(
+            *(
+                launch_server(spec, i, opts.reader_threads)
+                for i, spec in enumerate(server_specs)
+            )
+        ),
+        client_streams(),
+    )
 
     # Create message router using specified logic class
     class_name = opts.logic_class
@@ -149,20 +344,146 @@ async def run_multiplexer(
         logic_class = getattr(frassum, class_name)
     log(f"Logic class: {logic_class}")
     logic = logic_class([p.server for p in procs])
+    logic.response_cache.capacity = opts.response_cache_size
+    logic.progress_interval_ms = opts.progress_interval_ms
+    logic.log_message_type = opts.log_messages
+    logic.drop_telemetry = opts.drop_telemetry
+    register_gauge(
+        "io.writes-per-frame",
+        lambda: round(counter("io.writes") / max(counter("io.frames"), 1), 3),
+    )
+    register_gauge(
+        "response-cache.entries", lambda: len(logic.response_cache)
+    )
+    register_gauge(
+        "configuration-cache.entries", lambda: len(logic.configuration_cache)
+    )
+    register_gauge(
+        "inlay-hint-cache.documents", lambda: len(logic.inlay_hint_cache)
+    )
+    register_gauge(
+        "semantic-tokens.documents", lambda: len(logic.semantic_tokens)
+    )
+    register_gauge("startup-ms", lambda: startup_report(procs, t0))
+    register_gauge("servers.running", lambda: sum(p.running for p in procs))
+
+    def resources() -> JSON:
+        res = {}
+        for p in procs:
+            res[p.name] = {"state": p.state}
+            if p.process and (s := sample(p.process.pid)):
+                res[p.name].update(s.to_json())
+        return res
+
+    register_gauge("servers.resources", resources)
+    for p in procs:
+        p.breaker.cooldown_s = opts.breaker_cooldown_s
+    register_gauge(
+        "servers.load", lambda: {p.name: p.breaker.to_json() for p in procs}
+    )
+
+    # Track ongoing aggregations: key -> AggregationState.  Those of
+    # responses go once complete, and are answered with what's there
+    # if evicted.  Those of notifications stay, as they hold what each
+    # server last said, e.g. about a document's diagnostics: they're
+    # as many as documents, and can't be evicted without losing that.
+    def _on_aggregation_evicted(key, ag: AggregationState) -> None:
+        if ag.timer:
+            ag.timer.cancel()
+        if not ag.dispatched:
+            asyncio.ensure_future(_give_up_aggregation(ag))
+
+    pending_aggregations = BoundedTable(
+        "tables.pending-aggregations",
+        TABLE_CAPACITY,
+        on_evict=_on_aggregation_evicted,
+    )
+    notification_aggregations: dict[tuple, AggregationState] = {}
 
-    # Track ongoing aggregations: key -> AggregationState
-    pending_aggregations: dict[tuple, AggregationState] = {}
+    # Track which request IDs need aggregation:
+    # id -> (method, params, responders)
+    def _on_request_evicted(req_id, info) -> None:
+        asyncio.ensure_future(_give_up_request(req_id, info[0]))
 
-    # Track which request IDs need aggregation: id -> (method, params)
-    inflight_requests = {}
+    inflight_requests = BoundedTable(
+        "tables.inflight-requests",
+        TABLE_CAPACITY,
+        on_evict=_on_request_evicted,
+    )
 
     # Track server requests to remap IDs
     # remapped_id -> (original_server_id, server, method, params)
-    server_request_mapping = {}
+    def _on_server_request_evicted(remapped_id, info) -> None:
+        asyncio.ensure_future(_give_up_server_request(remapped_id, *info))
+
+    server_request_mapping = BoundedTable(
+        "tables.server-requests",
+        TABLE_CAPACITY,
+        ttl=SERVER_REQUEST_TTL_S,
+        on_evict=_on_server_request_evicted,
+    )
     next_remapped_id = 0
 
-    # Track shutdown state
+    # Track identical server requests sharing one client round trip:
+    # request key -> leader remapped id, leader remapped id -> (key,
+    # [(server, original id) of followers])
+    server_request_leaders: dict[tuple, int] = {}
+    server_request_followers: dict[int, tuple[tuple, list]] = {}
+
+    # Track our own requests to servers: id -> (method, proc, future)
+    server_waiters: dict[str, tuple] = {}
+
+    # Tasks of servers started after the others, and their crashes
+    late_tasks: set[asyncio.Task] = set()
+    crashes: list[BaseException] = []
+
+    # Track identical in-flight requests sharing one round trip:
+    # request key -> leader id, leader id -> (key, follower ids)
+    singleflight_leaders: dict[tuple, object] = {}
+    singleflight_followers: dict[object, tuple[tuple, list]] = {}
+
+    # Decoder of frames, huge ones off the event loop
+    offloader = Offloader(opts.offload_bytes)
+
+    # Client messages being handled, in order per document
+    client_lanes = Lanes("client-lanes")
+    register_gauge("client-lanes.busy", lambda: len(client_lanes))
+
+    # Track throttled notifications: throttle key -> ThrottleState
+    throttled = BoundedTable(
+        "tables.throttled",
+        TABLE_CAPACITY,
+        on_evict=lambda key, t: t.timer and t.timer.cancel(),
+    )
+
+    # Gauge the size of every table
+    for name, table in [
+        ("pending-aggregations", pending_aggregations),
+        ("notification-aggregations", notification_aggregations),
+        ("throttled", throttled),
+        ("inflight-requests", inflight_requests),
+        ("server-requests", server_request_mapping),
+        ("server-waiters", server_waiters),
+        ("singleflight-leaders", singleflight_leaders),
+        ("server-request-leaders", server_request_leaders),
+    ]:
+        register_gauge(f"tables.{name}", lambda t=table: len(t))
+    register_gauge(
+        "tables.held-messages", lambda: sum(len(p.held) for p in procs)
+    )
+
+    # Track shutdown state, and whether the client went away
     shutting_down = False
+    client_gone = False
+
+    # Track whether the client said 'initialized', and registrations
+    # of late servers' capabilities waiting for that
+    client_initialized = False
+    pending_registrations: list[JSON] = []
+
+    # File events from the client yet to be sent to servers
+    watched_changes: list[JSON] = []
+    watched_files_timer: Optional[asyncio.TimerHandle] = None
 
     log(f"Primary server: {procs[0].name}")
     if len(procs) > 1:
@@ -171,16 +492,17 @@ async def run_multiplexer(
     if opts.delay_ms > 0:
         log(f"Delaying server responses by {opts.delay_ms}ms")
 
-    # Get client streams
-    client_reader = await create_stdin_reader(opts.threaded_stdio)
-    client_writer = await create_stdout_writer(opts.threaded_stdio)
-
     async def _send_to_client(message: JSON, method: str, direction="<--"):
         """Send a message to the client, with optional delay."""
 
         async def send():
             log_message(direction, message, method)
-            await write_lsp_message(client_writer, message)
+            await write_lsp_message(
+                client_writer,
+                message,
+                logic.get_priority(method),
+                logic.get_sequence(message),
+            )
 
         async def delayed_send():
             await asyncio.sleep(opts.delay_ms / 1000.0)
@@ -191,6 +513,531 @@ async def run_multiplexer(
         else:
             await send()
 
+    async def _pass_through(
+        proc: InferiorProcess, head: JSON, content: bytes
+    ) -> bool:
+        """Send the client CONTENT, a huge frame from PROC of which HEAD
+        is the envelope or the whole message, as it is, if it answers a request of a single
+        server and nobody needs to look into its result.  Return True
+        if it was sent."""
+        req_id = head.get("id")
+        if (
+            "method" in head
+            or opts.delay_ms > 0
+            or req_id in server_waiters
+            or req_id in singleflight_followers
+            or not (info := inflight_requests.get(req_id))
+            or len(info[2]) != 1
+            or not logic.is_opaque(info[0])
+        ):
+            return False
+        method = info[0]
+        proc.breaker.answered(req_id)
+        inflight_requests.pop(req_id, None)
+        # Only the envelope: HEAD may be the whole message
+        envelope = {
+            k: v
+            for k, v in head.items()
+            if k not in ("result", "error", "params")
+        }
+        log_message(
+            f"[{proc.name}] <--", {**envelope, "bytes": len(content)}, method
+        )
+        bump("offload.passed-through")
+        await write_lsp_frame(
+            client_writer,
+            content,
+            logic.get_priority(method),
+            logic.get_sequence(head),
+        )
+        return True
+
+    async def _send_to_server(
+        proc: InferiorProcess, message: JSON, method: str, direction="-->"
+    ):
+        """Send a message to a server, unless it is still initializing.
+        Wake it up if it's hibernating.  Requests for servers being
+        stopped are held until they're back, other messages dropped:
+        replaying documents and configuration covers them."""
+        is_request = "id" in message and "method" in message
+        if proc.stopping:
+            if is_request:
+                debug(f"Holding {method} for stopping {proc.name}")
+                proc.held.append((message, method, direction))
+            return
+        if proc.hibernating and not shutting_down:
+            log(f"Waking {proc.name} up for {method}")
+            _wake(proc)
+            if not is_request:
+                return
+        if proc.initializing:
+            debug(f"Holding {method} for {proc.name} until initialized")
+            proc.held.append((message, method, direction))
+            return
+        if not proc.running:
+            debug(f"Not sending {method} to stopped {proc.name}")
+            return
+        assert proc.writer, f"{proc.name} runs unconnected"
+        if method == "initialize" and is_request:
+            message = {
+                **message,
+                "params": proc.spec.shape_initialize(message.get("params", {})),
+            }
+        try:
+            await write_lsp_message(
+                proc.writer,
+                message,
+                logic.get_priority(method),
+                logic.get_sequence(message),
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            # Its reader will notice it died
+            warn(f"Couldn't send {method} to {proc.name}")
+            return
+        proc.last_active = time.monotonic()
+        log_message(f"[{proc.name}] {direction}", message, method)
+        if method == "initialize" and "id" in message:
+            proc.initializing = True
+            proc.timings["initialize-request"] = time.monotonic()
+
+    async def _release_held(proc: InferiorProcess):
+        """Send messages held while PROC was initializing."""
+        proc.initializing = False
+        held, proc.held = proc.held, []
+        for message, method, direction in held:
+            await _send_to_server(proc, message, method, direction)
+
+    async def _request_server(
+        proc: InferiorProcess, method: str, params: JSON | None = None
+    ) -> JSON:
+        """Send a request of our own to PROC, bypassing held messages,
+        without params if PARAMS is None.  Return the response
+        message."""
+        nonlocal next_remapped_id
+        req_id = f"rass-{next_remapped_id}"
+        next_remapped_id += 1
+        assert proc.writer, f"{proc.name} isn't connected"
+        waiter = asyncio.get_running_loop().create_future()
+        server_waiters[req_id] = (method, proc, waiter)
+        message: JSON = {"jsonrpc": "2.0", "id": req_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        await write_lsp_message(proc.writer, message)
+        log_message(f"[{proc.name}] -->", message, method)
+        return await waiter
+
+    def _spawn_late(coro):
+        """Run CORO as a task of a server started after the others."""
+
+        def done(task: asyncio.Task):
+            late_tasks.discard(task)
+            if not task.cancelled() and (e := task.exception()):
+                crashes.append(e)
+                main.cancel()
+
+        task = asyncio.create_task(coro)
+        late_tasks.add(task)
+        task.add_done_callback(done)
+
+    def _wake(proc: InferiorProcess):
+        """Start lazy or crashed PROC.  Until it has answered
+        initialize, hold messages for it behind 'initialized', the
+        client's configuration and the documents it has open."""
+        proc.dormant = proc.hibernating = False
+        proc.initializing = True
+        held, proc.held = proc.held, [
+            (
+                {"jsonrpc": "2.0", "method": "initialized", "params": {}},
+                "initialized",
+                "-->",
+            )
+        ]
+        if logic.configuration is not None:
+            proc.held.append(
+                (
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "workspace/didChangeConfiguration",
+                        "params": logic.configuration,
+                    },
+                    "workspace/didChangeConfiguration",
+                    "-->",
+                )
+            )
+        proc.held += [
+            (
+                {
+                    "jsonrpc": "2.0",
+                    "method": "textDocument/didOpen",
+                    "params": {"textDocument": item},
+                },
+                "textDocument/didOpen",
+                "-->",
+            )
+            for item in logic.documents.items()
+        ]
+        proc.held += held
+        _spawn_late(_start_lazily(proc))
+
+    async def _start_lazily(proc: InferiorProcess):
+        """Spawn PROC and do the initialize handshake with it."""
+        try:
+            await proc.spawn()
+        except OSError as e:
+            warn(f"Couldn't start {proc.name}: {e}")
+            proc.initializing = False
+            proc.held = []
+            return
+        for coro in _server_coroutines(proc):
+            _spawn_late(coro)
+        proc.timings["initialize-request"] = time.monotonic()
+        params = logic.initialize_params
+        response = await _request_server(
+            proc, "initialize", proc.spec.shape_initialize(params)
+        )
+        proc.timings["initialize"] = time.monotonic()
+        is_error = "error" in response
+        if is_error:
+            warn(f"{proc.name} failed to initialize: {response['error']}")
+        await logic.on_server_response(
+            "initialize",
+            params,
+            cast(JSON, response.get("error" if is_error else "result", {})),
+            is_error,
+            proc.server,
+        )
+        log(
+            f"Started {proc.name} in "
+            f"{round((time.monotonic() - proc.timings['launch']) * 1000)}ms"
+        )
+        await _release_held(proc)
+        await _register_late_capabilities(proc.server)
+
+    async def _give_up_request(req_id, method: str):
+        """Answer request REQ_ID, evicted from the tables, with an
+        error."""
+        warn(f"Giving up on {method}[{req_id}]")
+        logic.on_request_dropped(req_id)
+        for p in procs:
+            p.breaker.forget(req_id)
+        if ag := pending_aggregations.pop(("response", req_id)):
+            if ag.timer:
+                ag.timer.cancel()
+            if ag.dispatched:
+                return
+        await _send_response_to_client(
+            {
+                "jsonrpc": "2.0",
+                "id": req_id,
+                "error": {"code": -32803, "message": "Servers didn't answer"},
+            },
+            method,
+        )
+
+    async def _give_up_aggregation(ag: AggregationState):
+        """Answer request of AG, evicted from the tables, with what the
+        servers said so far."""
+        warn(f"Giving up on the rest of {ag.method}[{ag.id}]")
+        for p in ag.outstanding:
+            p.breaker.forget(ag.id)
+        await _send_response_to_client(
+            _reconstruct(ag), ag.method, complete=False
+        )
+        inflight_requests.pop(ag.id, None)
+
+    async def _give_up_server_request(
+        remapped_id, original_id, proc, method, params
+    ):
+        """Tell PROC the client won't answer its request ORIGINAL_ID,
+        nor servers waiting for the same answer."""
+        warn(f"Giving up on client answering {method}")
+        if proc is None:
+            return
+        for p, p_id in [(proc, original_id), *_followers_of(remapped_id)]:
+            await _send_to_server(
+                p,
+                {
+                    "jsonrpc": "2.0",
+                    "id": p_id,
+                    "error": {
+                        "code": -32803,
+                        "message": "Client didn't answer",
+                    },
+                },
+                method,
+                "s->",
+            )
+
+    def _followers_of(remapped_id) -> list:
+        """Forget the server request REMAPPED_ID as a leader, and get
+        its followers: (server, original id) of identical requests."""
+        if not (probe := server_request_followers.pop(remapped_id, None)):
+            return []
+        server_request_leaders.pop(probe[0], None)
+        return probe[1]
+
+    async def _fail_requests_to(
+        proc: InferiorProcess, reason="crashed", spare=()
+    ):
+        """Answer requests that dead PROC won't answer with errors,
+        except those with ids in SPARE."""
+        error = {"code": -32803, "message": f"Server {proc.name} {reason}"}
+        for req_id, info in list(inflight_requests.items()):
+            method, _, responders = info
+            if proc not in responders or req_id in spare:
+                continue
+            proc.breaker.forget(req_id)
+            if len(responders) == 1:
+                await _send_response_to_client(
+                    {"jsonrpc": "2.0", "id": req_id, "error": error}, method
+                )
+                inflight_requests.pop(req_id, None)
+                continue
+            key = ("response", req_id)
+            ag = pending_aggregations.get(key)
+            if ag and id(proc) in ag.aggregate:
+                continue
+            item = PayloadItem(error, proc.server, True)
+            if ag:
+                await _continue_aggregation(item, ag)
+            else:
+                await _start_aggregation(item, key, method, responders, req_id)
+        # Forget what can't be answered anymore
+        for req_id, probe in list(server_waiters.items()):
+            if probe[1] is proc:
+                del server_waiters[req_id]
+                probe[2].cancel()
+        for _, followers in server_request_followers.values():
+            followers[:] = [f for f in followers if f[0] is not proc]
+        for remapped_id, probe in list(server_request_mapping.items()):
+            if probe[1] is not proc:
+                continue
+            leading = server_request_followers.get(remapped_id)
+            if not (leading and leading[1]):
+                _followers_of(remapped_id)
+                del server_request_mapping[remapped_id]
+                continue
+            # Another server waits for the same answer: it's the
+            # leader now
+            p, p_id = leading[1].pop(0)
+            server_request_mapping[remapped_id] = (p_id, p, *probe[2:])
+        proc.held = []
+        proc.initializing = False
+
+    async def _stop(proc: InferiorProcess, hibernate=False):
+        """Shut PROC down gracefully, or kill it if it won't.  If
+        HIBERNATE, wake it up when it's sent something.  Requests
+        sent meanwhile are held for its next incarnation."""
+        process, writer = proc.process, proc.writer
+        if not (process and writer):
+            # Died meanwhile
+            return
+        proc.stopping = True
+        try:
+            await asyncio.wait_for(
+                _request_server(proc, "shutdown"), STOP_TIMEOUT_S
+            )
+        except asyncio.TimeoutError:
+            warn(f"{proc.name} didn't shut down in time")
+        proc.process = None
+        held = proc.held
+        await _fail_requests_to(
+            proc, "stopped", spare={m["id"] for m, _, _ in held}
+        )
+        proc.hibernating = hibernate
+        try:
+            message = {"jsonrpc": "2.0", "method": "exit"}
+            await write_lsp_message(writer, message)
+            log_message(f"[{proc.name}] -->", message, "exit")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), STOP_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        proc.stopping = False
+        proc.held = held + proc.held
+        if hibernate and proc.held:
+            log(f"Waking {proc.name} up for held requests")
+            _wake(proc)
+
+    async def _restart_gracefully(proc: InferiorProcess):
+        await _stop(proc)
+        _wake(proc)
+
+    async def _govern():
+        """Periodically restart servers over their memory budget, and
+        hibernate idle ones."""
+        while True:
+            await asyncio.sleep(opts.governor_interval_ms / 1000.0)
+            if shutting_down or client_gone:
+                return
+            now = time.monotonic()
+            for p in procs:
+                if not p.process or p.initializing or p.stopping:
+                    continue
+                budget = p.spec.memory_budget_mb
+                if budget and (s := sample(p.process.pid)):
+                    # Servers starting over budget would just loop
+                    if s.rss_mb <= budget:
+                        p.under_budget = True
+                    elif p.under_budget:
+                        log(
+                            f"{p.name} uses {s.rss_mb:.0f}MB, over its "
+                            f"{budget}MB budget, restarting"
+                        )
+                        bump("governor.restarts")
+                        _spawn_late(_restart_gracefully(p))
+                        continue
+                idle = p.spec.idle_minutes
+                if idle is not None and now - p.last_active > idle * 60:
+                    log(f"Hibernating {p.name}, idle for {idle} minutes")
+                    bump("governor.hibernations")
+                    _spawn_late(_stop(p, hibernate=True))
+
+    async def _restart(proc: InferiorProcess, process):
+        """Reap PROCESS, the crashed PROC, and start PROC again after
+        a backoff delay."""
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+        delay = min(
+            RESTART_BACKOFF_S * 2 ** (proc.restarts - 1),
+            RESTART_MAX_BACKOFF_S,
+        )
+        log(f"Restarting {proc.name} in {delay}s (restart #{proc.restarts})")
+        proc.breaker.reset()
+        await asyncio.sleep(delay)
+        if not (shutting_down or client_gone):
+            _wake(proc)
+
+    async def _request_client(method: str, params: JSON):
+        """Send a request of our own to the client."""
+        nonlocal next_remapped_id
+        remapped_id = next_remapped_id
+        next_remapped_id += 1
+        server_request_mapping[remapped_id] = (None, None, method, params)
+        await _send_to_client(
+            {
+                "jsonrpc": "2.0",
+                "id": remapped_id,
+                "method": method,
+                "params": params,
+            },
+            method,
+            "<-s",
+        )
+
+    async def _register_late_capabilities(server: Server):
+        """Announce capabilities of late SERVER dynamically."""
+        if not (registrations := logic.get_late_registrations(server)):
+            return
+        log(
+            f"Registering late {server.name} capabilities: "
+            f"{', '.join(r['method'] for r in registrations)}"
+        )
+        pending_registrations.extend(registrations)
+        if client_initialized:
+            await _flush_registrations()
+
+    async def _flush_registrations():
+        """Send registrations of late capabilities to the client."""
+        if pending_registrations:
+            registrations = pending_registrations.copy()
+            pending_registrations.clear()
+            await _request_client(
+                "client/registerCapability", {"registrations": registrations}
+            )
+
+    async def _update_watchers():
+        """Have the client watch files for all servers with a single
+        registration."""
+        registrations, unregistrations = logic.get_watcher_registrations()
+        if registrations:
+            await _request_client(
+                "client/registerCapability", {"registrations": registrations}
+            )
+        if unregistrations:
+            await _request_client(
+                "client/unregisterCapability",
+                {"unregisterations": unregistrations},
+            )
+
+    async def _send_watched_files():
+        """Send servers the file events collected for them."""
+        nonlocal watched_files_timer
+        watched_files_timer = None
+        changes = watched_changes.copy()
+        watched_changes.clear()
+        method = "workspace/didChangeWatchedFiles"
+        for server, mine in logic.route_watched_files(changes):
+            bump("watched-files.sent", len(mine))
+            await _send_to_server(
+                cast(InferiorProcess, server.cookie),
+                {"jsonrpc": "2.0", "method": method, "params": {"changes": mine}},
+                method,
+            )
+
+    async def _throttle(msg: JSON, method: str, key: tuple, final: bool):
+        """Send notification MSG to the client, unless one with the
+        same KEY was sent less than an interval ago.  Then keep it
+        until the interval is over, replacing the one kept before."""
+        state = throttled.pop(key) if final else throttled.get(key)
+        if final:
+            if state and state.timer:
+                state.timer.cancel()
+                bump("notifications.coalesced")
+            await _send_to_client(msg, method)
+            return
+        interval = logic.get_throttle_interval_ms(method) / 1000.0
+        now = time.monotonic()
+        if state is None:
+            state = throttled[key] = ThrottleState()
+        if state.timer is None and now - state.last_sent >= interval:
+            state.last_sent = now
+            await _send_to_client(msg, method)
+            return
+        if state.pending is not None:
+            bump("notifications.coalesced")
+        state.pending = msg
+        if state.timer is None:
+            state.timer = asyncio.get_running_loop().call_later(
+                state.last_sent + interval - now,
+                lambda: asyncio.ensure_future(_release_throttled(key, method)),
+            )
+
+    async def _release_throttled(key: tuple, method: str):
+        """Send the notification kept for KEY, if still there."""
+        if not (state := throttled.get(key)) or state.pending is None:
+            return
+        msg, state.pending, state.timer = state.pending, None, None
+        state.last_sent = time.monotonic()
+        await _send_to_client(msg, method)
+
+    async def _send_response_to_client(
+        message: JSON, method: str, complete: bool = True
+    ):
+        """Send a response to the client and to anyone riding on it.
+        Complete successful responses are cached."""
+        if info := inflight_requests.get(message.get("id")):
+            kind = "error" if "error" in message else "result"
+            payload = message.get(kind)
+            final = logic.finish_response(
+                message["id"], method, info[1], payload, kind == "error"
+            )
+            if final is not payload:
+                message = {**message, kind: final}
+        await _send_to_client(message, method)
+        if probe := singleflight_followers.pop(message.get("id"), None):
+            key, followers = probe
+            singleflight_leaders.pop(key, None)
+            if complete and "result" in message:
+                logic.cache_response(key, message["result"])
+            for follower_id in followers:
+                debug(f"Answering {method}[{follower_id}] from shared response")
+                await _send_to_client({**message, "id": follower_id}, method)
+
     def _reconstruct(ag: AggregationState) -> JSON:
         """Reconstruct full JSONRPC message from aggregation state."""
 
@@ -213,7 +1060,27 @@ async def run_multiplexer(
                 "params": payload,
             }
 
-    def _start_aggregation(
+    async def _maybe_dispatch_early(ag: AggregationState):
+        """In progressive init mode, answer initialize with the primary."""
+        if (
+            opts.progressive_init
+            and ag.method == "initialize"
+            and not ag.dispatched
+            and ag.outstanding
+            and id(procs[0]) in ag.aggregate
+        ):
+            log(
+                "Answering initialize without "
+                f"{', '.join(p.name for p in ag.outstanding)}"
+            )
+            if ag.timer:
+                ag.timer.cancel()
+            await _send_response_to_client(
+                _reconstruct(ag), ag.method, complete=False
+            )
+            ag.dispatched = "early"
+
+    async def _start_aggregation(
         item, aggregation_key, method, responders, req_id
     ):
         """Start a new aggregation with the first message."""
@@ -222,12 +1089,18 @@ async def run_multiplexer(
         outstanding.discard(proc)
 
         async def send_whatever_is_there(state: AggregationState, method):
-            await asyncio.sleep(
-                logic.get_aggregation_timeout_ms(method) / 1000.0
-            )
             log(f"Timeout for aggregation for {method} ({id(state)})!")
             state.dispatched = "timed-out"
-            await _send_to_client(_reconstruct(state), method)
+            for p in state.outstanding:
+                if p.breaker.expired(state.id):
+                    warn(
+                        f"{p.name} keeps timing out, leaving it out of "
+                        f"aggregations for {p.breaker.cooldown_s}s"
+                    )
+                    bump("servers.breaker-trips")
+            await _send_response_to_client(
+                _reconstruct(state), method, complete=False
+            )
 
         ag = AggregationState(
             outstanding=outstanding,
@@ -238,10 +1111,21 @@ async def run_multiplexer(
         debug(
             f"Message from {item.server.name} starts aggregation for {method} ({id(ag)})"
         )
-        ag.timeout_task = asyncio.create_task(
-            send_whatever_is_there(ag, method)
+        ag.timer = asyncio.get_running_loop().call_later(
+            logic.get_aggregation_timeout_ms(method) / 1000.0,
+            lambda: asyncio.ensure_future(send_whatever_is_there(ag, method)),
         )
-        pending_aggregations[aggregation_key] = ag
+        if req_id is None:
+            notification_aggregations[aggregation_key] = ag
+        else:
+            pending_aggregations[aggregation_key] = ag
+        await _maybe_dispatch_early(ag)
+
+    def _forget_response(ag: AggregationState):
+        """Forget AG if it's a complete response: nothing else can come."""
+        if ag.id is not None:
+            inflight_requests.pop(ag.id, None)
+            pending_aggregations.pop(("response", ag.id))
 
     async def _continue_aggregation(item, ag):
         """Continue an existing aggregation with an additional message."""
@@ -259,6 +1143,15 @@ async def run_multiplexer(
         ag.aggregate[id(proc)] = item
         ag.outstanding.discard(proc)
 
+        # In progressive init mode, late servers register their
+        # capabilities instead of having the response re-sent.
+        if opts.progressive_init and method == "initialize" and ag.dispatched:
+            await _register_late_capabilities(item.server)
+            if not ag.outstanding:
+                _forget_response(ag)
+            return
+        await _maybe_dispatch_early(ag)
+
         if not ag.outstanding:
             # Aggregation is now complete
             if ag.dispatched == "timed-out":
@@ -267,6 +1160,7 @@ async def run_multiplexer(
                         f"Dropping tardy message for previously timed-out "
                         f"aggregation for {method} ({id(ag)})"
                     )
+                    _forget_response(ag)
                     return
                 else:
                     debug(
@@ -279,6 +1173,7 @@ async def run_multiplexer(
                         f"Dropping tardy message for previously completed "
                         f"aggregation for {method} ({id(ag)})!"
                     )
+                    _forget_response(ag)
                     return
                 else:
                     debug(
@@ -289,116 +1184,295 @@ async def run_multiplexer(
                 debug(f"Completing aggregation for {method} ({id(ag)})!")
 
             # Cancel timeout
-            if ag.timeout_task:
-                ag.timeout_task.cancel()
+            if ag.timer:
+                ag.timer.cancel()
 
             # Send aggregated result to client
-            await _send_to_client(_reconstruct(ag), method)
+            await _send_response_to_client(_reconstruct(ag), method)
             ag.dispatched = True
 
-            # Remove from requests needing aggregation if it's a response
-            if ag.id is not None:
-                inflight_requests.pop(ag.id, None)
-
-    async def handle_client_messages():
-        """Read from client and route to appropriate servers."""
-        nonlocal shutting_down
-        try:
-            while True:
-                msg = await read_lsp_message(client_reader)
-                if msg is None:
-                    break
-
-                method = msg.get("method")
-                id = msg.get("id")
+            _forget_response(ag)
 
-                if id is None and method is not None:
-                    # Notification
-                    log_message("-->", msg, method)
-                    await logic.on_client_notification(
-                        method, msg.get("params", {})
-                    )
+    async def _handle_client_message(msg: JSON):
+        """Route MSG from the client to appropriate servers."""
+        nonlocal shutting_down, client_initialized
+        nonlocal watched_files_timer
+        method = msg.get("method")
+        id = msg.get("id")
 
-                    for p in procs:
-                        await write_lsp_message(p.stdin, msg)
-                        log_message(f"[{p.name}] -->", msg, method)
-                elif method is not None:
-                    # Request
-                    log_message("-->", msg, method)
-                    params = msg.get("params", {})
-                    # Track shutdown requests.  Breaks abstraction,
-                    # but not that bad.
-                    if method == "shutdown":
-                        shutting_down = True
-                    # Determine which servers to route to.
-                    target_servers = await logic.on_client_request(
-                        method, params, [proc.server for proc in procs]
-                    )
-                    target_procs = cast(
-                        list[InferiorProcess],
-                        [s.cookie for s in target_servers],
+        if id is None and method is not None:
+            # Notification
+            log_message("-->", msg, method)
+            # Servers know nothing of requests riding on a
+            # shared one, so cancelling the latter would
+            # cancel them all.
+            if method == "$/cancelRequest" and (
+                (cancelled := msg.get("params", {}).get("id"))
+                in singleflight_followers
+                and singleflight_followers[cancelled][1]
+            ):
+                debug(f"Not cancelling [{cancelled}], it has riders")
+                return
+            await logic.on_client_notification(
+                method, msg.get("params", {})
+            )
+            # Collect bursts of file events, for servers to get
+            # only those they watch in one go
+            if method == "workspace/didChangeWatchedFiles":
+                changes = msg.get("params", {}).get("changes", [])
+                bump("watched-files.received", len(changes))
+                watched_changes.extend(changes)
+                if watched_files_timer is None:
+                    watched_files_timer = (
+                        asyncio.get_running_loop().call_later(
+                            WATCHED_FILES_DELAY_S,
+                            lambda: asyncio.ensure_future(
+                                _send_watched_files()
+                            ),
+                        )
                     )
+                return
 
-                    # Send to selected servers
-                    for p in target_procs:
-                        await write_lsp_message(p.stdin, msg)
-                        log_message(f"[{p.name}] -->", msg, method)
+            for p in procs:
+                await _send_to_server(p, msg, method)
+            if method == "initialized":
+                client_initialized = True
+                await _flush_registrations()
+            elif method == "textDocument/didOpen":
+                doc = msg.get("params", {}).get("textDocument", {})
+                for p in procs:
+                    if p.dormant and p.spec.matches(
+                        doc.get("uri", ""), doc.get("languageId")
+                    ):
+                        _wake(p)
+        elif method is not None:
+            # Request
+            log_message("-->", msg, method)
+            params = msg.get("params", {})
+            # Track shutdown requests.  Breaks abstraction,
+            # but not that bad.
+            if method == "shutdown":
+                shutting_down = True
+            if method == "rass/stats":
+                await _send_to_client(
+                    {"jsonrpc": "2.0", "id": id, "result": snapshot()},
+                    method,
+                )
+                return
+            # Answer from cache, or attach to an identical
+            # in-flight request, if possible.
+            key = logic.get_request_key(method, params)
+            if hit := logic.get_cached_result(method, params, key):
+                debug(f"Answering {method}[{id}] from cache")
+                await _send_to_client(
+                    {"jsonrpc": "2.0", "id": id, "result": hit[0]},
+                    method,
+                )
+                return
+            if key is not None and (
+                (leader := singleflight_leaders.get(key)) is not None
+            ):
+                debug(f"{method}[{id}] rides on in-flight [{leader}]")
+                singleflight_followers[leader][1].append(id)
+                return
+            # Determine which servers to route to.
+            target_servers = await logic.on_client_request(
+                method,
+                params,
+                [
+                    proc.server
+                    for proc in procs
+                    if proc.reachable
+                    and not (proc.hibernating and shutting_down)
+                ],
+            )
+            target_procs = cast(
+                list[InferiorProcess],
+                [s.cookie for s in target_servers],
+            )
+            # Don't wait for servers that crashed
+            if target_procs and not (
+                target_procs := [p for p in target_procs if p.reachable]
+            ):
+                logic.on_request_dropped(id)
+                await _send_to_client(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": id,
+                        "error": {
+                            "code": -32803,
+                            "message": "Server is restarting",
+                        },
+                    },
+                    method,
+                )
+                return
+            # Leave servers that keep timing out out of
+            # aggregations, unless that leaves none, or we're
+            # shutting them all down
+            if len(target_procs) > 1 and not shutting_down:
+                target_procs = [
+                    p for p in target_procs if p.breaker.admits()
+                ] or target_procs
+            # Shed low priority requests piling up on busy
+            # servers
+            if (
+                target_procs
+                and opts.shed_depth
+                and logic.get_priority(method) >= PRIORITY_LOW
+                and not (
+                    target_procs := [
+                        p
+                        for p in target_procs
+                        if len(p.breaker.outstanding) < opts.shed_depth
+                    ]
+                )
+            ):
+                debug(f"Shedding {method}[{id}]")
+                bump("requests.shed")
+                logic.on_request_dropped(id)
+                await _send_to_client(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": id,
+                        "error": {
+                            "code": -32801,
+                            "message": "Server is overloaded",
+                        },
+                    },
+                    method,
+                )
+                return
+            if (
+                server_method := logic.prepare_request(
+                    id, method, params, [p.server for p in target_procs]
+                )
+            ) != method:
+                debug(f"Forwarding {method}[{id}] as {server_method}")
+                msg = {**msg, "method": server_method}
+
+            # Send to selected servers
+            for p in target_procs:
+                p.breaker.sent(id, timed=len(target_procs) > 1)
+                await _send_to_server(p, msg, method)
+
+            inflight_requests[id] = (
+                method,
+                cast(JSON, params),
+                set(target_procs),
+            )
+            if key is not None and target_procs:
+                singleflight_leaders[key] = id
+                singleflight_followers[id] = (key, [])
+        else:
+            # Response from client (to a server request)
+            if info := server_request_mapping.get(id):
+                # This is a response to a server request - remap ID and route to correct server
+                original_id, target_proc, req_method, req_params = info
+                del server_request_mapping[id]
+                if target_proc is None:
+                    debug(f"Client answered our {req_method}[{id}]")
+                    return
 
-                    inflight_requests[id] = (
-                        method,
-                        cast(JSON, params),
-                        set(target_procs),
+                # Inform LspLogic
+                is_error = "error" in msg
+                response_payload = (
+                    msg.get("error") if is_error else msg.get("result")
+                )
+                await logic.on_client_response(
+                    req_method,
+                    req_params,
+                    cast(JSON, response_payload),
+                    is_error,
+                    target_proc.server,
+                )
+
+                # Remap ID back to original
+                msg["id"] = original_id
+                await _send_to_server(
+                    target_proc, msg, req_method, "s->"
+                )
+                for p, p_id in _followers_of(id):
+                    await _send_to_server(
+                        p, {**msg, "id": p_id}, req_method, "s->"
                     )
-                else:
-                    # Response from client (to a server request)
-                    if info := server_request_mapping.get(id):
-                        # This is a response to a server request - remap ID and route to correct server
-                        original_id, target_proc, req_method, req_params = info
-                        del server_request_mapping[id]
-
-                        # Inform LspLogic
-                        is_error = "error" in msg
-                        response_payload = (
-                            msg.get("error") if is_error else msg.get("result")
-                        )
-                        await logic.on_client_response(
-                            req_method,
-                            req_params,
-                            cast(JSON, response_payload),
-                            is_error,
-                            target_proc.server,
-                        )
-
-                        # Remap ID back to original
-                        msg["id"] = original_id
-                        await write_lsp_message(target_proc.stdin, msg)
-                        log_message(
-                            f"[{target_proc.name}] s->", msg, req_method
-                        )
-                    else:
-                        # Unknown response, log error
-                        warn(f"Unknown request for response with id={id}!")
+            else:
+                # Unknown response, log error
+                warn(f"Unknown request for response with id={id}!")
 
+    async def handle_client_messages():
+        """Read from client, and handle messages concurrently, in
+        order where it matters."""
+        nonlocal client_gone
+        try:
+            while True:
+                content = await read_lsp_frame(client_reader)
+                if content is None:
+                    break
+                msg = await offloader.decode(content)
+                client_lanes.submit(
+                    logic.get_sequence(msg), _handle_client_message(msg)
+                )
+            await client_lanes.drain()
         except Exception as e:
             log(f"Error handling client messages: {e}")
         finally:
-            # Close all server stdin
+            client_gone = True
+            # Close all server input
             for p in procs:
-                p.stdin.close()
-                await p.stdin.wait_closed()
+                if not (p.running and p.writer):
+                    continue
+                flush(p.writer)
+                p.writer.close()
+                await p.writer.wait_closed()
 
     async def handle_server_messages(proc: InferiorProcess):
         """Read from a server and route back to client."""
         nonlocal next_remapped_id
+        process, reader, frames = proc.process, proc.reader, proc.frames
         try:
             while True:
-                msg = await read_lsp_message(proc.stdout)
-                if msg is None:
+                msg = None
+                if frames:
+                    content, msg = await frames.read() or (None, None)
+                else:
+                    assert reader, f"{proc.name} isn't connected"
+                    content = await read_lsp_frame(reader)
+                proc.timings.setdefault("first-message", time.monotonic())
+                if content is None:
                     # Server died - check if this was expected
-                    if not shutting_down:
+                    if proc.stopping or proc.process is not process:
+                        debug(f"{proc.name} stopped")
+                    elif not shutting_down:
                         log(f"Error: Server {proc.name} died unexpectedly")
-                        raise RuntimeError(f"Server {proc.name} crashed")
+                        if (
+                            time.monotonic() - proc.timings["spawn"]
+                            > RESTART_STABLE_S
+                        ):
+                            proc.restarts = 0
+                        if client_gone or proc.restarts >= opts.max_restarts:
+                            raise RuntimeError(f"Server {proc.name} crashed")
+                        proc.restarts += 1
+                        bump("servers.restarts")
+                        process, proc.process = proc.process, None
+                        await _fail_requests_to(proc)
+                        _spawn_late(_restart(proc, process))
                     break
+                # Pass huge responses nobody needs to look into on
+                # as they are: undecoded if their id can be sniffed,
+                # else at least not encoded again
+                huge = offloader.wants(content)
+                if (
+                    msg is None
+                    and huge
+                    and (head := sniff(content))
+                    and await _pass_through(proc, head, content)
+                ):
+                    continue
+                if msg is None:
+                    msg = await offloader.decode(content)
+                if huge and await _pass_through(proc, msg, content):
+                    continue
 
                 # Distinguish message types.  Notifications won't have
                 # id's, responses won't have method, requests will have both.
@@ -413,6 +1487,33 @@ async def run_multiplexer(
                     await logic.on_server_request(
                         method, cast(JSON, params), proc.server
                     )
+                    if method.endswith("registerCapability"):
+                        await _update_watchers()
+
+                    # Answer from cache, or attach to an identical
+                    # request in flight to the client, if possible.
+                    if hit := logic.get_cached_client_result(
+                        method, cast(JSON, params)
+                    ):
+                        debug(f"Answering {proc.name}'s {method} from cache")
+                        await _send_to_server(
+                            proc,
+                            {"jsonrpc": "2.0", "id": req_id, "result": hit[0]},
+                            method,
+                            "s->",
+                        )
+                        continue
+                    key = logic.get_server_request_key(
+                        method, cast(JSON, params)
+                    )
+                    if key is not None and (
+                        (leader := server_request_leaders.get(key)) is not None
+                    ):
+                        debug(f"{proc.name}'s {method} rides on [{leader}]")
+                        server_request_followers[leader][1].append(
+                            (proc, req_id)
+                        )
+                        continue
 
                     # This is a request from server to client - remap ID
                     remapped_id = next_remapped_id
@@ -423,6 +1524,9 @@ async def run_multiplexer(
                         method,
                         cast(JSON, params),
                     )
+                    if key is not None:
+                        server_request_leaders[key] = remapped_id
+                        server_request_followers[remapped_id] = (key, [])
 
                     # Forward to client with remapped ID
                     remapped_msg = msg.copy()
@@ -432,10 +1536,21 @@ async def run_multiplexer(
 
                 # Server response OR Server notification
                 aggregation_key = None
-                responders = set(procs)  # responses can override this
+                # responses can override this
+                responders = {p for p in procs if p.running}
                 is_error = False
 
+                if (
+                    method is None
+                    and isinstance(req_id, str)
+                    and (probe := server_waiters.pop(req_id, None))
+                ):
+                    # Response to a request of our own
+                    log_message(f"[{proc.name}] <--", msg, probe[0])
+                    probe[2].set_result(msg)
+                    continue
                 if method is None:
+                    proc.breaker.answered(req_id)
                     # Response - lookup method and params from request tracking
                     request_info = inflight_requests.get(req_id)
                     if not request_info:
@@ -456,19 +1571,42 @@ async def run_multiplexer(
                         is_error,
                         proc.server,
                     )
+                    if method == "initialize":
+                        proc.timings["initialize"] = time.monotonic()
+                        if all(
+                            "initialize" in p.timings
+                            for p in procs
+                            if not p.spec.lazy
+                        ):
+                            log(
+                                "Startup times (ms): "
+                                f"{json.dumps(startup_report(procs, t0))}"
+                            )
+                        await _release_held(proc)
                     # Skip whole aggregation state business if the
                     # original request targeted only one server.
                     if len(responders) == 1:
-                        await _send_to_client(msg, method)
+                        await _send_response_to_client(msg, method)
+                        inflight_requests.pop(req_id, None)
                         continue
                     aggregation_key = ("response", req_id)
                     start_anew = False
                 else:
-                    log_message(f"[{proc.name}] <--", msg, method)
                     payload = msg.get("params", {})
+                    if not logic.should_forward_notification(
+                        method, cast(JSON, payload)
+                    ):
+                        bump("notifications.filtered")
+                        continue
+                    log_message(f"[{proc.name}] <--", msg, method)
                     await logic.on_server_notification(
                         method, cast(JSON, payload), proc.server
                     )
+                    if throttle := logic.get_notif_throttle_key(
+                        method, cast(JSON, payload)
+                    ):
+                        await _throttle(msg, method, *throttle)
+                        continue
                     aggregation_data = logic.get_notif_aggregation_key(
                         method, payload
                     )
@@ -484,12 +1622,17 @@ async def run_multiplexer(
 
                 # If we haven't continued the loop and we got here, aggregate
                 item = PayloadItem(payload, proc.server, is_error)
-                if ag := not start_anew and pending_aggregations.get(
+                aggregations = (
+                    notification_aggregations
+                    if req_id is None
+                    else pending_aggregations
+                )
+                if ag := not start_anew and aggregations.get(
                     aggregation_key
                 ):
                     await _continue_aggregation(item, ag)
                 else:
-                    _start_aggregation(
+                    await _start_aggregation(
                         item, aggregation_key, method, responders, req_id
                     )
 
@@ -502,22 +1645,41 @@ async def run_multiplexer(
         finally:
             pass
 
+    def _server_coroutines(proc: InferiorProcess) -> list:
+        """Make coroutines reading from PROC."""
+        coros = [handle_server_messages(proc)]
+        # Forward stderr
+        if not opts.quiet_server:
+            coros.append(forward_server_stderr(proc))
+        return coros
+
     # Create all tasks
     tasks = [handle_client_messages()]
 
     for p in procs:
-        tasks.append(handle_server_messages(p))
+        if p.running:
+            tasks.extend(_server_coroutines(p))
 
-        # Forward stderr
-        if not opts.quiet_server:
-            tasks.append(forward_server_stderr(p))
+    governor = None
+    if any(s.memory_budget_mb or s.idle_minutes for s in server_specs):
+        governor = asyncio.create_task(_govern())
 
+    main = asyncio.gather(*tasks)
     try:
-        await asyncio.gather(*tasks)
-    except RuntimeError as e:
-        log(f"Fatal error: {e}")
-        sys.exit(1)
+        await main
+        if governor:
+            governor.cancel()
+        await asyncio.gather(*late_tasks)
+    except asyncio.CancelledError:
+        if not crashes:
+            raise
+        raise crashes[0]
+    finally:
+        offloader.shutdown()
 
     # Wait for all servers to exit
     for p in procs:
-        _ = await p.process.wait()
+        if p.process:
+            _ = await p.process.wait()
+
+    log(f"Stats: {json.dumps(snapshot())}")
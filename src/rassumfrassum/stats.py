@@ -0,0 +1,32 @@
+"""
+Counters and gauges for monitoring the multiplexer.
+"""
+
+from typing import Any, Callable
+
+# Global registries
+_counters: dict[str, int] = {}
+_gauges: dict[str, Callable[[], Any]] = {}
+
+
+def bump(name: str, n: int = 1) -> None:
+    """Increment counter NAME by N."""
+    _counters[name] = _counters.get(name, 0) + n
+
+
+def counter(name: str) -> int:
+    """Get the current value of counter NAME."""
+    return _counters.get(name, 0)
+
+
+def register_gauge(name: str, fn: Callable[[], Any]) -> None:
+    """Register FN to be called for the value of gauge NAME."""
+    _gauges[name] = fn
+
+
+def snapshot() -> dict[str, Any]:
+    """Get all counters and current gauge values, sorted by name."""
+    res: dict[str, Any] = dict(_counters)
+    for name, fn in _gauges.items():
+        res[name] = fn()
+    return dict(sorted(res.items()))
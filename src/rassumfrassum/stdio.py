@@ -8,14 +8,100 @@ something, like that.  This is a longstanding CPython thing:
 https://github.com/python/cpython/issues/71019
 
 This module provides a threaded workaround that bridges blocking stdio
-to async pipes.
+to async pipes.  Elsewhere, streams connect straight to the pipes, and
+on Linux, pipes are enlarged so that big messages need fewer wakeups.
+
+It also provides reader threads, which frame and decode the messages
+of a server on their own, so that under free-threaded Python several
+servers' messages are decoded in parallel.
 """
 
 import asyncio
+import json
 import os
+import stat
 import sys
 import threading
-from typing import Tuple
+from typing import IO
+
+from .json import JSON, read_frame_sync
+from .transport import STREAM_LIMIT
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+
+# Pipe capacity asked for.  Unprivileged processes get at most
+# /proc/sys/fs/pipe-max-size, 1 MiB by default.
+PIPE_BUFFER_BYTES = 1024 * 1024
+
+# How much the bridge threads move at a time
+CHUNK_BYTES = 64 * 1024
+
+# How many decoded messages a reader thread may get ahead of the event
+# loop
+READ_AHEAD_FRAMES = 64
+
+
+def enlarge_pipe(fd: int) -> None:
+    """Enlarge the buffer of FD, if it's a pipe and the platform can."""
+    if (setpipe := getattr(fcntl, 'F_SETPIPE_SZ', None)) is None:
+        return
+    try:
+        if stat.S_ISFIFO(os.fstat(fd).st_mode):
+            fcntl.fcntl(fd, setpipe, PIPE_BUFFER_BYTES)  # pyright: ignore
+    except OSError:
+        pass
+
+
+async def connect_reader(pipe: IO) -> asyncio.StreamReader:
+    """Make a StreamReader reading from PIPE."""
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    protocol = asyncio.StreamReaderProtocol(reader)
+    await asyncio.get_running_loop().connect_read_pipe(lambda: protocol, pipe)
+    return reader
+
+
+class _WriterProtocol(asyncio.streams.FlowControlMixin):
+    """Flow control for a pipe StreamWriter, which can also wait for
+    the pipe to close."""
+
+    def __init__(self):
+        super().__init__()
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_lost(self, exc):
+        super().connection_lost(exc)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def _get_close_waiter(self, stream):
+        return self._closed
+
+
+async def connect_writer(pipe: IO) -> asyncio.StreamWriter:
+    """Make a StreamWriter writing to PIPE."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.connect_write_pipe(_WriterProtocol, pipe)
+    return asyncio.StreamWriter(transport, protocol, None, loop)
+
+
+def _streamable(fd: int) -> bool:
+    """Tell if the event loop can have FD to itself.  FD must be a
+    pipe or a socket, which the loop makes non-blocking: not a
+    terminal, nor the same file as stderr, which would then fail
+    blocking writes with BlockingIOError."""
+    st = os.fstat(fd)
+    if not (stat.S_ISFIFO(st.st_mode) or stat.S_ISSOCK(st.st_mode)):
+        return False
+    try:
+        err = os.fstat(sys.stderr.fileno())
+    except (AttributeError, OSError, ValueError):
+        # No stderr to speak of
+        return True
+    return (st.st_dev, st.st_ino) != (err.st_dev, err.st_ino)
 
 
 async def create_stdin_reader(use_thread: bool) -> asyncio.StreamReader:
@@ -24,20 +110,19 @@ async def create_stdin_reader(use_thread: bool) -> asyncio.StreamReader:
 
     Uses a background thread to bridge blocking stdin to an async pipe on Windows.
     """
-    loop = asyncio.get_event_loop()
-
-    if use_thread:
+    stdin_fd = sys.stdin.fileno()
+    if use_thread or not _streamable(stdin_fd):
         # A thread reads blockingly from stdin and writes to the
         # write-end of a pipe.  The read-end of a pipe is passed to
         # connect_read_pipe.
         read_fd, write_fd = os.pipe()
+        enlarge_pipe(write_fd)
 
         def helper():
             pipe_write = os.fdopen(write_fd, 'wb', buffering=0)
             try:
-                stdin_fd = sys.stdin.fileno()
                 while True:
-                    data = os.read(stdin_fd, 4096)
+                    data = os.read(stdin_fd, CHUNK_BYTES)
                     if not data:
                         break
                     pipe_write.write(data)
@@ -50,12 +135,10 @@ async def create_stdin_reader(use_thread: bool) -> asyncio.StreamReader:
         read_file = os.fdopen(read_fd, 'rb', buffering=0)
     else:
         # Direct approach (Linux/macOS): connect directly to sys.stdin
+        enlarge_pipe(stdin_fd)
         read_file = sys.stdin
 
-    reader = asyncio.StreamReader()
-    protocol = asyncio.StreamReaderProtocol(reader)
-    await loop.connect_read_pipe(lambda: protocol, read_file)
-    return reader
+    return await connect_reader(read_file)
 
 
 async def create_stdout_writer(use_thread: bool) -> asyncio.StreamWriter:
@@ -64,19 +147,19 @@ async def create_stdout_writer(use_thread: bool) -> asyncio.StreamWriter:
 
     Uses a background thread to bridge an async pipe to blocking stdout on Windows.
     """
-    loop = asyncio.get_event_loop()
-
-    if use_thread:
+    stdout_fd = sys.stdout.fileno()
+    if use_thread or not _streamable(stdout_fd):
         # A thread reads blockingly from the read end of a pipe and
         # writes to stdout.  The write end of a pipe is passed to
         # connect_write_pipe.
         read_fd, write_fd = os.pipe()
+        enlarge_pipe(write_fd)
 
         def helper():
             pipe_read = os.fdopen(read_fd, 'rb', buffering=0)
             try:
                 while True:
-                    data = pipe_read.read(4096)
+                    data = pipe_read.read(CHUNK_BYTES)
                     if not data:
                         break
                     sys.stdout.buffer.write(data)
@@ -90,10 +173,51 @@ async def create_stdout_writer(use_thread: bool) -> asyncio.StreamWriter:
         write_file = os.fdopen(write_fd, 'wb', buffering=0)
     else:
         # Direct approach (Linux/macOS): connect directly to sys.stdout
+        enlarge_pipe(stdout_fd)
         write_file = sys.stdout
 
-    transport, protocol = await loop.connect_write_pipe(
-        asyncio.streams.FlowControlMixin, write_file
-    )
-    writer = asyncio.StreamWriter(transport, protocol, None, loop)
-    return writer
+    return await connect_writer(write_file)
+
+
+class ReaderThread:
+    """Thread reading frames from PIPE and decoding them, for the event
+    loop to pick up with read().  Reading stops at EOF or at the first
+    frame that can't be decoded."""
+
+    def __init__(self, pipe: IO[bytes], name: str):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[tuple[bytes, JSON] | None] = (
+            asyncio.Queue()
+        )
+        # Slots left for messages not read yet
+        self.room = threading.Semaphore(READ_AHEAD_FRAMES)
+        self.thread = threading.Thread(
+            target=self._run, args=(pipe,), daemon=True, name=name
+        )
+        self.thread.start()
+
+    def _run(self, pipe: IO[bytes]) -> None:
+        try:
+            while (content := read_frame_sync(pipe)) is not None:
+                message = json.loads(content)
+                self.room.acquire()
+                self._post((content, message))
+        except (OSError, ValueError):
+            pass
+        finally:
+            pipe.close()
+            self._post(None)
+
+    def _post(self, item: tuple[bytes, JSON] | None) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+        except RuntimeError:
+            # The loop is closed
+            pass
+
+    async def read(self) -> tuple[bytes, JSON] | None:
+        """Get the next frame's (CONTENT, MESSAGE), or None at EOF."""
+        item = await self.queue.get()
+        if item is not None:
+            self.room.release()
+        return item
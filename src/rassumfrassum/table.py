@@ -0,0 +1,82 @@
+"""
+Bounded tables for state tracking messages in transit, which may
+never be cleaned up if a peer doesn't answer.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterator
+
+from .stats import bump
+
+
+class BoundedTable:
+    """Dict-like table keeping at most CAPACITY entries, none older
+    than TTL seconds, if given.
+
+    The oldest entries are evicted first, when new ones are added.
+    ON_EVICT, if given, is called with each evicted key and value.
+    Evictions are counted in the stats under NAME.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        ttl: float | None = None,
+        on_evict: Callable[[Any, Any], None] | None = None,
+    ):
+        self.name = name
+        self.capacity = capacity
+        self.ttl = ttl
+        self.on_evict = on_evict
+        # Key -> (time added, value), oldest first
+        self.entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def __iter__(self) -> Iterator:
+        return iter(list(self.entries))
+
+    def __getitem__(self, key):
+        return self.entries[key][1]
+
+    def __setitem__(self, key, value) -> None:
+        self.entries[key] = (time.monotonic(), value)
+        self.entries.move_to_end(key)
+        self._evict()
+
+    def __delitem__(self, key) -> None:
+        del self.entries[key]
+
+    def get(self, key, default=None):
+        if (probe := self.entries.get(key)) is None:
+            return default
+        return probe[1]
+
+    def pop(self, key, default=None):
+        if (probe := self.entries.pop(key, None)) is None:
+            return default
+        return probe[1]
+
+    def items(self) -> list[tuple[Any, Any]]:
+        """Get a list of (key, value) pairs, safe to mutate the table
+        while iterating."""
+        return [(k, v) for k, (_, v) in self.entries.items()]
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self.entries:
+            key, (added, value) = next(iter(self.entries.items()))
+            if len(self.entries) <= self.capacity and (
+                self.ttl is None or now - added < self.ttl
+            ):
+                break
+            del self.entries[key]
+            bump(f"{self.name}.evictions")
+            if self.on_evict:
+                self.on_evict(key, value)
@@ -0,0 +1,131 @@
+"""
+Unix and TCP socket transports, for talking to the client and to
+servers without pipes in between.
+
+Addresses are 'unix:PATH', 'tcp:HOST:PORT' or 'tcp:PORT', the latter
+on localhost.  Framing is the same as on stdio, see json.py.
+"""
+
+import asyncio
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import time
+from typing import Any
+
+from .util import log
+
+# Kernel buffer sizes asked for sockets, so that big payloads such as
+# semantic tokens or completion lists pass in fewer round trips
+SOCKET_BUFFER_BYTES = 4 * 1024 * 1024
+
+# How much StreamReaders buffer before pausing the socket
+STREAM_LIMIT = 1024 * 1024
+
+# How long to wait for a server to listen, in seconds
+CONNECT_TIMEOUT_S = 10.0
+
+Streams = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def parse_address(address: str) -> tuple[str, Any]:
+    """Parse ADDRESS into ('unix', PATH) or ('tcp', (HOST, PORT))."""
+    kind, _, where = address.partition(':')
+    if kind == 'unix' and where:
+        return kind, where
+    if kind == 'tcp' and where:
+        host, _, port = where.rpartition(':')
+        return kind, (host or '127.0.0.1', int(port))
+    raise ValueError(f"expected unix:PATH or tcp:[HOST:]PORT: {address}")
+
+
+def tune(sock: socket.socket) -> None:
+    """Enlarge SOCK's kernel buffers, as far as we're allowed to."""
+    for option in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER_BYTES)
+        except OSError:
+            pass
+
+
+def _tuned(streams: Streams) -> Streams:
+    if sock := streams[1].get_extra_info('socket'):
+        tune(sock)
+    return streams
+
+
+async def open_streams(kind: str, where: Any) -> Streams:
+    """Connect to a KIND socket listening at WHERE."""
+    if kind == 'unix':
+        streams = await asyncio.open_unix_connection(where, limit=STREAM_LIMIT)
+    else:
+        streams = await asyncio.open_connection(*where, limit=STREAM_LIMIT)
+    return _tuned(streams)
+
+
+async def accept_one(kind: str, where: Any) -> Streams:
+    """Listen on a KIND socket at WHERE until one peer connects."""
+    accepted = asyncio.get_running_loop().create_future()
+
+    def on_connect(reader, writer):
+        if accepted.done():
+            writer.close()
+        else:
+            accepted.set_result(_tuned((reader, writer)))
+
+    if kind == 'unix':
+        # Remove sockets left behind by a previous rass
+        try:
+            if stat.S_ISSOCK(os.stat(where).st_mode):
+                os.unlink(where)
+        except FileNotFoundError:
+            pass
+        server = await asyncio.start_unix_server(
+            on_connect, where, limit=STREAM_LIMIT
+        )
+    else:
+        server = await asyncio.start_server(
+            on_connect, *where, limit=STREAM_LIMIT
+        )
+    # Accepted sockets inherit listening sockets' buffer sizes
+    for sock in server.sockets:
+        tune(sock)  # pyright: ignore[reportArgumentType]
+    log(f"Waiting for the client on {kind} socket {where}")
+    try:
+        return await accepted
+    finally:
+        server.close()
+        if kind == 'unix':
+            os.unlink(where)
+
+
+def server_address(kind: str) -> Any:
+    """Pick an address where a server should listen on a KIND socket."""
+    if kind == 'unix':
+        return os.path.join(tempfile.mkdtemp(prefix='rass-'), 'server.sock')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()
+
+
+async def connect_server(
+    kind: str, where: Any, process: asyncio.subprocess.Process
+) -> Streams:
+    """Connect to PROCESS's KIND socket at WHERE, once it listens."""
+    deadline = time.monotonic() + CONNECT_TIMEOUT_S
+    try:
+        while True:
+            try:
+                return await open_streams(kind, where)
+            except (ConnectionRefusedError, FileNotFoundError) as e:
+                if process.returncode is not None:
+                    raise OSError(f"server exited before listening: {e}")
+                if time.monotonic() > deadline:
+                    raise OSError(f"server didn't listen in time: {e}")
+                await asyncio.sleep(0.02)
+    finally:
+        if kind == 'unix':
+            # The connection lives on without the socket file
+            shutil.rmtree(os.path.dirname(where), ignore_errors=True)
@@ -1,10 +1,121 @@
+import copy
+from dataclasses import dataclass, field
 from datetime import datetime
+from fnmatch import fnmatch
+from urllib.parse import unquote, urlparse
 import sys
 
 # Type aliases for presets
 ServerCommand = list[str]
 ServerCommands = list[ServerCommand]
-PresetResult = tuple[ServerCommands, type | None]
+
+
+@dataclass
+class ServerSpec:
+    """How to run a server.
+
+    Presets may describe a server with a plain command list, or with a
+    dict with a 'command' key and any of the other fields.  A lazy
+    server is only started when the client opens a document with one
+    of LANGUAGES, or whose path matches one of GLOBS.  A server using
+    more than MEMORY_BUDGET_MB of resident memory is restarted, and
+    one that hasn't been sent anything for IDLE_MINUTES is shut down
+    until it's needed again.
+
+    NICE, AFFINITY (a list of CPUs) and RLIMITS (e.g. {'as': bytes,
+    'cpu': seconds}) are applied to the server process.  If CGROUP is
+    the path of a cgroup v2 directory, absolute or relative to
+    /sys/fs/cgroup, the server is moved into it,
+    after creating it and writing CGROUP_SETTINGS (e.g. {'cpu.max':
+    '50000 100000'}) to it.
+
+    The server runs in directory CWD, by default rass's own.  If its
+    COMMAND has a '{port}' or '{path}' placeholder, rass fills it with
+    a free localhost TCP port or a Unix socket path, and talks to the
+    server there instead of on its stdio.
+
+    The client capabilities at the dotted paths of HIDE_CAPABILITIES
+    (e.g. 'textDocument.semanticTokens') are removed from the
+    initialize request sent to the server, so that it doesn't compute
+    what nobody will use, and INITIALIZATION_OPTIONS are merged into
+    the client's own.
+    """
+
+    command: ServerCommand
+    lazy: bool = False
+    languages: list[str] = field(default_factory=list)
+    globs: list[str] = field(default_factory=list)
+    memory_budget_mb: float | None = None
+    idle_minutes: float | None = None
+    nice: int | None = None
+    affinity: list[int] | None = None
+    rlimits: dict[str, int] = field(default_factory=dict)
+    cgroup: str | None = None
+    cgroup_settings: dict[str, str] = field(default_factory=dict)
+    cwd: str | None = None
+    hide_capabilities: list[str] = field(default_factory=list)
+    initialization_options: dict = field(default_factory=dict)
+
+    @classmethod
+    def of(cls, entry: 'ServerCommand | dict | ServerSpec') -> 'ServerSpec':
+        """Make a ServerSpec from a preset's server entry."""
+        if isinstance(entry, ServerSpec):
+            return entry
+        if isinstance(entry, dict):
+            return cls(**entry)
+        return cls(command=list(entry))
+
+    @property
+    def transport(self) -> str:
+        """How to talk to the server: 'stdio', 'tcp' or 'unix'."""
+        if any('{port}' in arg for arg in self.command):
+            return 'tcp'
+        if any('{path}' in arg for arg in self.command):
+            return 'unix'
+        return 'stdio'
+
+    def shape_initialize(self, params: dict) -> dict:
+        """Get the initialize PARAMS to send this server."""
+        if not (self.hide_capabilities or self.initialization_options):
+            return params
+        caps = copy.deepcopy(params.get('capabilities', {}))
+        for path in self.hide_capabilities:
+            *parents, leaf = path.split('.')
+            probe = caps
+            for key in parents:
+                probe = probe.get(key)
+                if not isinstance(probe, dict):
+                    break
+            else:
+                probe.pop(leaf, None)
+        shaped = {**params, 'capabilities': caps}
+        if self.initialization_options:
+            shaped['initializationOptions'] = _override(
+                params.get('initializationOptions') or {},
+                self.initialization_options,
+            )
+        return shaped
+
+    def matches(self, uri: str, language_id: str | None) -> bool:
+        """Tell if a document at URI in LANGUAGE_ID is for this server."""
+        if language_id in self.languages:
+            return True
+        path = unquote(urlparse(uri).path)
+        return any(fnmatch(path, glob) for glob in self.globs)
+
+
+def _override(d1: dict, d2: dict) -> dict:
+    """Get a copy of D1 with D2 merged in, D2 winning conflicts."""
+    result = d1.copy()
+    for key, value in d2.items():
+        if isinstance(result.get(key), dict) and isinstance(value, dict):
+            result[key] = _override(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+PresetResult = tuple[list[ServerSpec], type | None]
 
 # Log levels (lower number = higher priority)
 LOG_SILENT = 0
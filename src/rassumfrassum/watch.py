@@ -0,0 +1,216 @@
+"""
+File watcher registrations of several servers, merged into one for
+the client, and the client's file events split back between them.
+"""
+
+import json
+import re
+from functools import lru_cache
+from urllib.parse import unquote, urlparse
+
+from .json import JSON
+
+# WatchKind bits, by FileChangeType
+KIND_OF_CHANGE = {1: 1, 2: 2, 3: 4}
+ALL_KINDS = 7
+
+CREATED, CHANGED, DELETED = 1, 2, 3
+
+
+@lru_cache(maxsize=1024)
+def glob_regex(pattern: str) -> re.Pattern:
+    """Compile LSP glob PATTERN.  Patterns not starting with '/' or
+    '**' match at any depth, as editors do."""
+    if not pattern.startswith(('/', '**')):
+        pattern = '**/' + pattern
+    return re.compile(_translate(pattern))
+
+
+def _translate(pattern: str) -> str:
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '{' and (end := _closing(pattern, i)) > 0:
+            alternatives = _split_alternatives(pattern[i + 1 : end])
+            out.append(
+                '(?:' + '|'.join(_translate(a) for a in alternatives) + ')'
+            )
+            i = end
+        elif c == '[' and (end := pattern.find(']', i + 2)) > 0:
+            body = pattern[i + 1 : end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def _closing(pattern: str, start: int) -> int:
+    depth = 0
+    for i in range(start, len(pattern)):
+        if pattern[i] == '{':
+            depth += 1
+        elif pattern[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _split_alternatives(body: str) -> list[str]:
+    parts, depth, last = [], 0, 0
+    for i, c in enumerate(body):
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            parts.append(body[last:i])
+            last = i + 1
+    parts.append(body[last:])
+    return parts
+
+
+def uri_path(uri: str) -> str:
+    return unquote(urlparse(uri).path)
+
+
+def matches(watcher: JSON, change: JSON) -> bool:
+    """Tell if file event CHANGE is of interest to WATCHER."""
+    if not watcher.get('kind', ALL_KINDS) & KIND_OF_CHANGE.get(
+        change.get('type', CHANGED), ALL_KINDS
+    ):
+        return False
+    path = uri_path(change.get('uri', ''))
+    glob = watcher.get('globPattern')
+    if isinstance(glob, str):
+        return bool(glob_regex(glob).fullmatch(path))
+    if not isinstance(glob, dict):
+        return False
+    base = glob.get('baseUri')
+    if isinstance(base, dict):
+        base = base.get('uri')
+    base_path = uri_path(base or '').rstrip('/') + '/'
+    if not path.startswith(base_path):
+        return False
+    return bool(
+        glob_regex('/' + glob.get('pattern', '').lstrip('/')).fullmatch(
+            path[len(base_path) - 1 :]
+        )
+    )
+
+
+def coalesce(changes: list[JSON]) -> list[JSON]:
+    """Reduce CHANGES to at most one event per file, in order of
+    their files' first events."""
+    # URI -> net change, None if created then deleted
+    net: dict[str, int | None] = {}
+    for change in changes:
+        uri, kind = change.get('uri', ''), change.get('type', CHANGED)
+        if uri not in net:
+            net[uri] = kind
+        elif (before := net[uri]) is None or before == CREATED:
+            net[uri] = None if kind == DELETED else CREATED
+        elif kind == DELETED:
+            net[uri] = DELETED
+        else:
+            net[uri] = CHANGED
+    return [
+        {'uri': uri, 'type': kind}
+        for uri, kind in net.items()
+        if kind is not None
+    ]
+
+
+class FileWatchers:
+    """didChangeWatchedFiles registrations, by server."""
+
+    METHOD = 'workspace/didChangeWatchedFiles'
+
+    def __init__(self):
+        # Server id -> registration id -> watchers
+        self.by_server: dict[object, dict[str, list[JSON]]] = {}
+        # The registration the client has for all servers, and the
+        # watchers in it
+        self.client_registration: str | None = None
+        self.client_watchers: list[JSON] = []
+        self.generation = 0
+
+    def register(self, server, registration: JSON) -> None:
+        # Registrations without an id can't be unregistered, nor told
+        # apart: they're invalid
+        if (reg_id := registration.get('id')) is None:
+            return
+        watchers = (registration.get('registerOptions') or {}).get(
+            'watchers', []
+        )
+        self.by_server.setdefault(server, {})[reg_id] = watchers
+
+    def unregister(self, server, registration_id: str) -> None:
+        self.by_server.get(server, {}).pop(registration_id, None)
+
+    def forget(self, server) -> None:
+        self.by_server.pop(server, None)
+
+    def merged(self) -> list[JSON]:
+        """Get the watchers of all servers, one per glob pattern."""
+        kinds: dict[str, int] = {}
+        for registrations in self.by_server.values():
+            for watchers in registrations.values():
+                for w in watchers:
+                    key = json.dumps(w.get('globPattern'), sort_keys=True)
+                    kinds[key] = kinds.get(key, 0) | w.get('kind', ALL_KINDS)
+        return [
+            {'globPattern': json.loads(key)}
+            | ({} if kind == ALL_KINDS else {'kind': kind})
+            for key, kind in kinds.items()
+        ]
+
+    def client_changes(self) -> tuple[list[JSON], list[JSON]]:
+        """Get (registrations, unregistrations) for the client to
+        watch what all servers want, if that changed."""
+        if (watchers := self.merged()) == self.client_watchers:
+            return [], []
+        unregistrations = []
+        if self.client_registration is not None:
+            unregistrations.append(
+                {'id': self.client_registration, 'method': self.METHOD}
+            )
+        self.client_watchers = watchers
+        self.client_registration = None
+        if not watchers:
+            return [], unregistrations
+        self.generation += 1
+        self.client_registration = f'rass-watchers-{self.generation}'
+        registration = {
+            'id': self.client_registration,
+            'method': self.METHOD,
+            'registerOptions': {'watchers': watchers},
+        }
+        return [registration], unregistrations
+
+    def changes_for(self, server, changes: list[JSON]) -> list[JSON]:
+        """Get those of CHANGES SERVER watches, all of them if it
+        registered no watchers: it may want them nonetheless."""
+        watchers = [
+            w for ws in self.by_server.get(server, {}).values() for w in ws
+        ]
+        if not watchers:
+            return changes
+        return [c for c in changes if any(matches(w, c) for w in watchers)]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test that tables tracking messages in transit are emptied once
+they're done with.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def stats(client):
+    req_id = await client.request('rass/stats')
+    return (await client.read_response(req_id))['result']
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/a.py', 'languageId': 'python',
+            'version': 1, 'text': 'x = 1\n'
+        }
+    })
+    # Leave the servers' requests unanswered
+    await client.read_request('workspace/configuration')
+    await client.read_request('workspace/configuration')
+
+    for _ in range(10):
+        req_id = await client.request('textDocument/codeAction', {
+            'textDocument': {'uri': 'file:///tmp/a.py'},
+            'range': {
+                'start': {'line': 0, 'character': 0},
+                'end': {'line': 0, 'character': 1}
+            },
+            'context': {'diagnostics': []}
+        })
+        response = await client.read_response(req_id)
+        assert len(response['result']) == 2, response
+
+    result = await stats(client)
+    assert result['tables.pending-aggregations'] == 0, result
+    assert result['tables.inflight-requests'] == 0, result
+    assert result['tables.server-requests'] == 2, result
+    log('client', "✓ Tables emptied")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Server with code actions, asking the client for its configuration
+when a document is opened.
+"""
+
+import argparse
+
+from rassumfrassum.json import write_message_sync
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+def on_open(params):
+    write_message_sync({
+        'jsonrpc': '2.0',
+        'id': f'{args.name}-config',
+        'method': 'workspace/configuration',
+        'params': {'items': [{'section': args.name}]}
+    })
+
+run_toy_server(
+    name=args.name,
+    capabilities={'codeActionProvider': True},
+    request_handlers={
+        'textDocument/codeAction': lambda msg_id, params: [
+            {'title': f'Fix from {args.name}', 'kind': 'quickfix'}
+        ]
+    },
+    notification_handlers={'textDocument/didOpen': on_open},
+)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test that servers get initialize params shaped by the preset.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def main():
+    client = await LspTestEndpoint.create()
+    req_id = await client.request('initialize', {
+        'processId': None,
+        'rootUri': 'file:///tmp',
+        'capabilities': {
+            'textDocument': {
+                'hover': {},
+                'semanticTokens': {'requests': {'full': True}},
+                'inlayHint': {},
+            },
+        },
+        'initializationOptions': {'lint': {'rules': ['all']}},
+    })
+    await client.read_response(req_id)
+    await client.notify('initialized', {})
+
+    got = {}
+    while len(got) < 2:
+        params = await client.read_notification('custom/initParams')
+        got[params['server']] = params['params']
+
+    assert got['s1']['capabilities']['textDocument'] == {
+        'hover': {},
+        'semanticTokens': {'requests': {'full': True}},
+        'inlayHint': {},
+    }, got['s1']
+    assert got['s1']['initializationOptions'] == {'lint': {'rules': ['all']}}
+    assert got['s2']['capabilities']['textDocument'] == {'hover': {}}, got
+    assert got['s2']['initializationOptions'] == {
+        'lint': {'rules': ['all'], 'strict': True}
+    }, got
+    log('client', "✓ Initialize params shaped")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,16 @@
+"""Preset with a primary server, and a linter that needn't know
+about semantic tokens and inlay hints."""
+
+def servers():
+    return [
+        ['python', './server.py', '--name', 's1'],
+        {
+            'command': ['python', './server.py', '--name', 's2'],
+            'hide_capabilities': [
+                'textDocument.semanticTokens',
+                'textDocument.inlayHint',
+                'workspace.noSuchThing.atAll',
+            ],
+            'initialization_options': {'lint': {'strict': True}},
+        },
+    ]
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Server telling the client what initialize params it got.
+"""
+
+import argparse
+
+from rassumfrassum.json import write_message_sync
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+init_params = {}
+
+def handle_initialize(msg_id, params):
+    init_params.update(params)
+    return {'capabilities': {}, 'serverInfo': {'name': args.name}}
+
+def on_initialized(params):
+    write_message_sync({
+        'jsonrpc': '2.0',
+        'method': 'custom/initParams',
+        'params': {'server': args.name, 'params': init_params}
+    })
+
+run_toy_server(
+    name=args.name,
+    request_handlers={'initialize': handle_initialize},
+    notification_handlers={'initialized': on_initialized},
+)
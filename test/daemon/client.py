@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test that daemon sessions for the same workspace share warm servers,
+which see each document opened only once.
+"""
+
+import asyncio
+import sys
+import time
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+SOCK = sys.argv[1]
+
+async def attach(name):
+    proc = await asyncio.create_subprocess_exec(
+        '../../rass', '--attach', '--daemon-socket', SOCK,
+        '--', 'python', './server.py',
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+    )
+    return proc, LspTestEndpoint(proc.stdout, proc.stdin, name)
+
+async def hover(client):
+    req_id = await client.request('textDocument/hover', {
+        'textDocument': {'uri': 'file:///tmp/a.py'},
+        'position': {'line': 0, 'character': 0}
+    })
+    return (await client.read_response(req_id))['result']
+
+async def rename(client):
+    """Get the version of the document a rename edits."""
+    req_id = await client.request('textDocument/rename', {
+        'textDocument': {'uri': 'file:///tmp/a.py'},
+        'position': {'line': 0, 'character': 0},
+        'newName': 'x'
+    })
+    result = (await client.read_response(req_id))['result']
+    return result['documentChanges'][0]['textDocument']['version']
+
+async def open_doc(client, text, version=1):
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/a.py', 'languageId': 'python',
+            'version': version, 'text': text
+        }
+    })
+
+async def change_doc(client, text, version):
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': 'file:///tmp/a.py', 'version': version},
+        'contentChanges': [{'text': text}]
+    })
+
+async def close_doc(client):
+    await client.notify('textDocument/didClose', {
+        'textDocument': {'uri': 'file:///tmp/a.py'}
+    })
+
+async def main():
+    p1, c1 = await attach('c1')
+    await c1.initialize(rootUri='file:///tmp/project')
+    # Versions in edits are the client's own, starting from 0 here
+    await open_doc(c1, 'one\n', 0)
+    first = await hover(c1)
+    assert await rename(c1) == 0
+
+    # A second session for the same root joins the warm servers
+    p2, c2 = await attach('c2')
+    t0 = time.monotonic()
+    await c2.initialize(rootUri='file:///tmp/project')
+    log('client', f"Second initialize took {time.monotonic() - t0:.3f}s")
+    await open_doc(c2, 'two\n', 5)
+    second = await hover(c2)
+    assert second['pid'] == first['pid'], (first, second)
+    assert second['texts'] == {'file:///tmp/a.py': 'two\n'}, second
+    assert await rename(c2) == 5
+    await change_doc(c2, 'two!\n', 6)
+    assert await rename(c2) == 6
+    await change_doc(c1, 'one!\n', 1)
+    assert await rename(c1) == 1
+    await change_doc(c2, 'two\n', 7)
+
+    # The document stays open until both sessions close it
+    await close_doc(c1)
+    assert (await hover(c2))['texts'] == {'file:///tmp/a.py': 'two\n'}
+    await close_doc(c2)
+    assert (await hover(c2))['texts'] == {}
+
+    # Another root gets servers of its own
+    p3, c3 = await attach('c3')
+    await c3.initialize(rootUri='file:///tmp/other')
+    third = await hover(c3)
+    assert third['pid'] != first['pid'], (first, third)
+
+    # Started ahead, since starting the shim takes a while
+    p4, c4 = await attach('c4')
+    p5, c5 = await attach('c5')
+
+    for client, proc in [(c1, p1), (c2, p2), (c3, p3)]:
+        await client.shutdown()
+        client.writer.close()
+        assert await proc.wait() == 0
+
+    # Unused servers linger for a while, then they're gone
+    await c4.initialize(rootUri='file:///tmp/project')
+    assert (await hover(c4))['pid'] == first['pid']
+    await c4.shutdown()
+    c4.writer.close()
+    await p4.wait()
+    await asyncio.sleep(1)
+    await c5.initialize(rootUri='file:///tmp/project')
+    assert (await hover(c5))['pid'] != first['pid']
+    await c5.shutdown()
+    c5.writer.close()
+    await p5.wait()
+
+    log('client', "✓ Sessions share warm servers per workspace root")
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,13 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+SOCK=$(mktemp -u)
+../../rass --daemon --daemon-socket "$SOCK" --linger-s 0.5 &
+DAEMON=$!
+trap "kill $DAEMON 2>/dev/null; rm -f '$SOCK'" EXIT INT TERM
+
+./client.py "$SOCK"
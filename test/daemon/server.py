@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Server telling its pid and the documents it has open, and renaming
+nothing in the version of the document it has.
+"""
+
+import os
+
+from rassumfrassum.test2 import run_toy_server
+
+texts = {}
+versions = {}
+
+def on_open(params):
+    doc = params['textDocument']
+    texts[doc['uri']] = doc['text']
+    versions[doc['uri']] = doc['version']
+
+def on_change(params):
+    uri = params['textDocument']['uri']
+    texts[uri] = params['contentChanges'][-1]['text']
+    versions[uri] = params['textDocument']['version']
+
+def on_close(params):
+    del texts[params['textDocument']['uri']]
+
+def on_rename(msg_id, params):
+    uri = params['textDocument']['uri']
+    return {'documentChanges': [{
+        'textDocument': {'uri': uri, 'version': versions[uri]},
+        'edits': [],
+    }]}
+
+run_toy_server(
+    name='s1',
+    capabilities={'hoverProvider': True, 'renameProvider': True},
+    request_handlers={
+        'textDocument/hover': lambda msg_id, params: {
+            'contents': 'hi', 'pid': os.getpid(), 'texts': texts
+        },
+        'textDocument/rename': on_rename,
+    },
+    notification_handlers={
+        'textDocument/didOpen': on_open,
+        'textDocument/didChange': on_change,
+        'textDocument/didClose': on_close,
+    },
+)
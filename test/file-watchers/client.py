@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test that servers' file watchers are registered with the client as
+one, and that servers get only the file events they watch, batched,
+or all of them if they watch nothing.
+"""
+
+import asyncio
+
+from rassumfrassum.json import read_message, write_message
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+CREATED, CHANGED, DELETED = 1, 2, 3
+
+def change(path, type):
+    return {'uri': f'file:///proj/{path}', 'type': type}
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    # Registrations come as the servers register: wait for the one
+    # with everyone's globs
+    globs = set()
+    while globs != {'**/*.py', '*.toml'}:
+        msg = await read_message(client.reader)
+        assert msg is not None
+        method = msg.get('method')
+        assert method in (
+            'client/registerCapability', 'client/unregisterCapability'
+        ), msg
+        if method == 'client/registerCapability':
+            [registration] = msg['params']['registrations']
+            watchers = registration['registerOptions']['watchers']
+            globs = {w['globPattern'] for w in watchers}
+            assert len(globs) == len(watchers), "duplicate watchers"
+        await write_message(
+            client.writer, {'jsonrpc': '2.0', 'id': msg['id'], 'result': None}
+        )
+    log('client', "✓ Watchers merged")
+
+    await client.notify('workspace/didChangeWatchedFiles', {'changes': [
+        change('a.py', CHANGED),
+        change('pyproject.toml', CREATED),
+        change('main.rs', CHANGED),
+    ]})
+    await client.notify('workspace/didChangeWatchedFiles', {'changes': [
+        change('a.py', CHANGED),
+        change('b.py', CREATED),
+        change('b.py', DELETED),
+    ]})
+
+    got = {}
+    while len(got) < 3:
+        params = await client.read_notification('custom/gotChanges')
+        assert params['server'] not in got, "events not batched"
+        got[params['server']] = params['changes']
+    assert got['s1'] == [change('a.py', CHANGED)], got
+    assert got['s2'] == [
+        change('a.py', CHANGED), change('pyproject.toml', CREATED)
+    ], got
+    assert got['s3'] == [
+        change('a.py', CHANGED),
+        change('pyproject.toml', CREATED),
+        change('main.rs', CHANGED),
+    ], got
+    log('client', "✓ Events filtered and coalesced")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
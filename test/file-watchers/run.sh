@@ -0,0 +1,16 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+./client.py < "$FIFO" | ./../../rass \
+         -- python ./server.py --name s1 --glob '**/*.py' \
+         -- python ./server.py --name s2 --glob '**/*.py' --glob '*.toml' \
+         -- python ./server.py --name s3 \
+> "$FIFO"
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Server watching files matching some globs, and telling the client
+about the file events it gets.
+"""
+
+import argparse
+
+from rassumfrassum.json import write_message_sync
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+parser.add_argument('--glob', action='append', default=[])
+args = parser.parse_args()
+
+def on_initialized(params):
+    if not args.glob:
+        return
+    write_message_sync({
+        'jsonrpc': '2.0',
+        'id': f'{args.name}-watch',
+        'method': 'client/registerCapability',
+        'params': {'registrations': [{
+            'id': 'watchers',
+            'method': 'workspace/didChangeWatchedFiles',
+            'registerOptions': {
+                'watchers': [{'globPattern': g} for g in args.glob]
+            }
+        }]}
+    })
+
+def on_changes(params):
+    write_message_sync({
+        'jsonrpc': '2.0',
+        'method': 'custom/gotChanges',
+        'params': {'server': args.name, 'changes': params['changes']}
+    })
+
+run_toy_server(
+    name=args.name,
+    notification_handlers={
+        'initialized': on_initialized,
+        'workspace/didChangeWatchedFiles': on_changes,
+    },
+)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test that progress reports are throttled, and that log messages and
+telemetry are filtered.
+"""
+
+import asyncio
+
+from rassumfrassum.json import read_message
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    req_id = await client.request('textDocument/hover', {
+        'textDocument': {'uri': 'file:///tmp/a.py'},
+        'position': {'line': 0, 'character': 0}
+    })
+
+    kinds = []
+    log_types = []
+    percentages = []
+    got_hover = False
+    while not (got_hover and kinds and kinds[-1] == 'end'):
+        msg = await read_message(client.reader)
+        assert msg is not None
+        method = msg.get('method')
+        assert method != 'telemetry/event', msg
+        if msg.get('id') == req_id:
+            got_hover = True
+        elif method == 'window/logMessage':
+            log_types.append(msg['params']['type'])
+        elif method == '$/progress':
+            value = msg['params']['value']
+            kinds.append(value['kind'])
+            if value['kind'] == 'report':
+                percentages.append(value['percentage'])
+
+    assert log_types == [1, 3], log_types
+    assert kinds[0] == 'begin' and kinds[-1] == 'end', kinds
+    # The first report, then the latest
+    assert percentages == [0, 98], percentages
+    log('client', "✓ Progress reports throttled")
+
+    stats_id = await client.request('rass/stats')
+    stats = (await client.read_response(stats_id))['result']
+    assert stats['notifications.filtered'] == 3, stats
+    assert stats['notifications.coalesced'] > 0, stats
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,14 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+./client.py < "$FIFO" | ./../../rass --progress-interval-ms 200 --log-messages info --drop-telemetry \
+         -- python ./server.py \
+> "$FIFO"
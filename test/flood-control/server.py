@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Server flooding the client with progress reports, log messages and
+telemetry before answering hovers.
+"""
+
+import time
+
+from rassumfrassum.json import write_message_sync
+from rassumfrassum.test2 import run_toy_server
+
+def notify(method, params):
+    write_message_sync({'jsonrpc': '2.0', 'method': method, 'params': params})
+
+def on_hover(msg_id, params):
+    for type in (1, 3, 4):
+        notify('window/logMessage', {'type': type, 'message': f'type {type}'})
+    for i in range(2):
+        notify('telemetry/event', {'n': i})
+    token = 'indexing'
+    notify('$/progress', {
+        'token': token, 'value': {'kind': 'begin', 'title': 'Indexing'}
+    })
+    for i in range(50):
+        notify('$/progress', {
+            'token': token,
+            'value': {'kind': 'report', 'percentage': i * 2}
+        })
+    # Let rass send the latest report before the end
+    time.sleep(0.4)
+    notify('$/progress', {'token': token, 'value': {'kind': 'end'}})
+    return {'contents': 'Hover from s1'}
+
+run_toy_server(
+    name='s1',
+    capabilities={'hoverProvider': True},
+    request_handlers={'textDocument/hover': on_hover},
+)
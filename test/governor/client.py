@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test that a server over its memory budget is restarted, and that an
+idle one is hibernated and woken up when needed.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def stats(client):
+    req_id = await client.request('rass/stats')
+    return (await client.read_response(req_id))['result']
+
+async def wait_for(client, predicate, what):
+    for _ in range(30):
+        if predicate(s := await stats(client)):
+            return s
+        await asyncio.sleep(0.1)
+    assert False, f"Timed out waiting for {what}: {s}"
+
+async def definition(client, line=0):
+    req_id = await client.request('textDocument/definition', {
+        'textDocument': {'uri': 'file:///tmp/a.py'},
+        'position': {'line': line, 'character': 0}
+    })
+    return (await client.read_response(req_id))['result']
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/a.py', 'languageId': 'python',
+            'version': 1, 'text': 'x = 1\n'
+        }
+    })
+
+    # s2 starts under budget, then goes over it
+    s = await stats(client)
+    assert s['servers.resources']['s2']['rss-mb'] < 60, s
+    await asyncio.sleep(0.3)
+    first = await definition(client, line=99)
+    s = await wait_for(
+        client, lambda s: s.get('governor.restarts') == 1, "restart"
+    )
+    log("client", f"s2 restarted: {s['servers.resources']['s2']}")
+
+    # The new s2 knows the open document
+    second = await definition(client)
+    assert second['pid'] != first['pid'], (first, second)
+    assert second['texts'] == {'file:///tmp/a.py': 'x = 1\n'}, second
+
+    # s2 goes to sleep when idle, and wakes up when needed
+    s = await wait_for(
+        client,
+        lambda s: s['servers.resources']['s2']['state'] == 'hibernating',
+        "hibernation",
+    )
+    assert s['servers.resources']['s1']['state'] == 'running', s
+    third = await definition(client)
+    assert third['pid'] != second['pid'], (second, third)
+    assert third['texts'] == {'file:///tmp/a.py': 'x = 1\n'}, third
+
+    log("client", "✓ Memory budget restart and idle hibernation")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,14 @@
+"""Preset with a secondary server with a memory budget and idle timeout."""
+
+def servers():
+    return [
+        ['python', './server.py', '--name', 's1', '--caps', 'hoverProvider'],
+        {
+            'command': [
+                'python', './server.py', '--name', 's2',
+                '--caps', 'definitionProvider',
+            ],
+            'memory_budget_mb': 60,
+            'idle_minutes': 0.01,
+        },
+    ]
@@ -0,0 +1,19 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+if [ ! -e /proc/self/statm ]; then
+    echo "No /proc, skipping test" >&2
+    exit 77
+fi
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+# preset.py gives s2 a memory budget and an idle timeout
+./client.py < "$FIFO" | ./../../rass --governor-interval-ms 100 ./preset.py \
+> "$FIFO"
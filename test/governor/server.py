@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Server that hogs memory when asked for a definition on line 99.
+"""
+
+import argparse
+import os
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+parser.add_argument('--caps', nargs='*', default=[])
+args = parser.parse_args()
+
+texts = {}
+hog = []
+
+def handle_did_open(params):
+    doc = params['textDocument']
+    texts[doc['uri']] = doc['text']
+
+def handle_definition(msg_id, params):
+    if params['position']['line'] == 99:
+        hog.append(b'x' * (100 * 1024 * 1024))
+    return {
+        'uri': f'file:///{args.name}.py',
+        'range': {
+            'start': {'line': 0, 'character': 0},
+            'end': {'line': 0, 'character': 1}
+        },
+        'pid': os.getpid(),
+        'texts': texts,
+    }
+
+run_toy_server(
+    name=args.name,
+    capabilities={cap: True for cap in args.caps},
+    request_handlers={'textDocument/definition': handle_definition},
+    notification_handlers={'textDocument/didOpen': handle_did_open},
+)
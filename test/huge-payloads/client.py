@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test that huge responses rass needn't look into reach the client as
+the server sent them, and that others still get through whole.
+"""
+
+import asyncio
+import json
+
+from rassumfrassum.json import read_frame
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+COUNT = 10_000
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    req_id = await client.request('workspace/symbol', {'query': ''})
+    content = await read_frame(client.reader)
+    assert content is not None and len(content) > 1_000_000, content
+    # The server indents, rass wouldn't
+    assert content.startswith(b'{\n'), content[:40]
+    msg = json.loads(content)
+    assert msg['id'] == req_id, msg['id']
+    assert len(msg['result']) == COUNT, len(msg['result'])
+    log('client', f"✓ Got {len(content)} bytes of workspace/symbol as sent")
+
+    req_id = await client.request('textDocument/documentSymbol', {
+        'textDocument': {'uri': 'file:///a.py'}
+    })
+    msg = await client.read_response(req_id)
+    assert len(msg['result']) == COUNT, len(msg['result'])
+    assert msg['result'][-1]['location']['uri'] == 'file:///a.py'
+    log('client', "✓ Got documentSymbol, decoded and re-encoded")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+LOG=$(mktemp)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO' '$LOG'" EXIT INT TERM
+
+# Reader threads decode messages whole before rass can tell it needn't
+for threads in "" --reader-threads; do
+    if ! ./client.py < "$FIFO" | ./../../rass --offload-bytes 1000000 \
+             $threads -- python ./server.py \
+         > "$FIFO" 2> "$LOG"; then
+        cat "$LOG" >&2
+        exit 1
+    fi
+    cat "$LOG" >&2
+    # Passed through, only the envelope is logged
+    line=$(grep -F '<-- workspace/symbol' "$LOG" | head -1)
+    if [ -z "$line" ] || [ ${#line} -gt 200 ]; then
+        echo "Passed through response logged whole${threads:+ with $threads}" >&2
+        exit 1
+    fi
+done
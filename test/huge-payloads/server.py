@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Server answering symbol requests with huge responses, those to
+workspace/symbol indented so they can be told from re-encoded ones.
+"""
+
+import json
+import sys
+
+from rassumfrassum.json import read_message_sync, write_message_sync
+from rassumfrassum.test2 import log
+
+COUNT = 10_000
+
+def symbols(uri):
+    return [
+        {
+            'name': f'symbol{i}',
+            'kind': 12,
+            'location': {
+                'uri': uri,
+                'range': {
+                    'start': {'line': i, 'character': 0},
+                    'end': {'line': i, 'character': 10},
+                },
+            },
+        }
+        for i in range(COUNT)
+    ]
+
+while (msg := read_message_sync()) is not None:
+    method, msg_id = msg.get('method'), msg.get('id')
+    if msg_id is None:
+        continue
+    if method == 'initialize':
+        result = {
+            'capabilities': {
+                'workspaceSymbolProvider': True,
+                'documentSymbolProvider': True,
+            },
+            'serverInfo': {'name': 's1'},
+        }
+    elif method == 'workspace/symbol':
+        content = json.dumps(
+            {'jsonrpc': '2.0', 'id': msg_id, 'result': symbols('file:///w.py')},
+            indent=1,
+        ).encode()
+        sys.stdout.buffer.write(
+            f'Content-Length: {len(content)}\r\n\r\n'.encode() + content
+        )
+        sys.stdout.buffer.flush()
+        continue
+    elif method == 'textDocument/documentSymbol':
+        result = symbols(msg['params']['textDocument']['uri'])
+    else:
+        result = None
+    write_message_sync({'jsonrpc': '2.0', 'id': msg_id, 'result': result})
+    if method == 'shutdown':
+        break
+
+log('s1', 'stopped')
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test that inlay hints for scrolled sub-ranges come from the cache,
+and that only the missing part of a range is asked from the server.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+URI = 'file:///tmp/test.py'
+
+async def hints(client, start, end):
+    req_id = await client.request('textDocument/inlayHint', {
+        'textDocument': {'uri': URI},
+        'range': {
+            'start': {'line': start, 'character': 0},
+            'end': {'line': end, 'character': 0}
+        }
+    })
+    result = (await client.read_response(req_id))['result']
+    return [h['label'] for h in result]
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': URI,
+            'languageId': 'python',
+            'version': 1,
+            'text': 'x = 1\n' * 100
+        }
+    })
+
+    labels = await hints(client, 0, 10)
+    assert labels == [f'L{i} (0-10)' for i in range(0, 11)], labels
+
+    # Contained in what we know: sliced from the cache
+    labels = await hints(client, 2, 8)
+    assert labels == [f'L{i} (0-10)' for i in range(2, 9)], labels
+
+    # Partially known: server only asked for lines 10-20
+    labels = await hints(client, 5, 20)
+    expected = [f'L{i} (0-10)' for i in range(5, 11)]
+    expected += [f'L{i} (10-20)' for i in range(10, 21)]
+    assert labels == expected, labels
+
+    req_id = await client.request('rass/stats', {})
+    stats = (await client.read_response(req_id))['result']
+    log("client", f"Stats: {stats}")
+    assert stats['inlay-hint-cache.hits'] == 1, stats
+    assert stats['inlay-hint-cache.partial'] == 1, stats
+    assert stats['inlay-hint-cache.misses'] == 1, stats
+
+    # New version: everything is asked anew
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': URI, 'version': 2},
+        'contentChanges': [{'text': 'y = 2\n' * 100}]
+    })
+    labels = await hints(client, 2, 8)
+    assert labels == [f'L{i} (2-8)' for i in range(2, 9)], labels
+
+    log("client", "✓ Inlay hints served from range-aware cache")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
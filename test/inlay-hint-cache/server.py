@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Server giving one inlay hint per line, labelled with the range asked.
+"""
+
+import argparse
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+def handle_inlay_hint(msg_id, params):
+    start = params['range']['start']['line']
+    end = params['range']['end']['line']
+    return [
+        {'position': {'line': line, 'character': 0},
+         'label': f'L{line} ({start}-{end})'}
+        for line in range(start, end + 1)
+    ]
+
+run_toy_server(
+    name=args.name,
+    capabilities={'inlayHintProvider': True},
+    request_handlers={'textDocument/inlayHint': handle_inlay_hint},
+)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test that a lazy server is started when a matching document is
+opened, and gets the documents the client already has open.
+"""
+
+import asyncio
+
+from rassumfrassum.json import write_message
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def stats(client):
+    req_id = await client.request('rass/stats')
+    return (await client.read_response(req_id))['result']
+
+async def main():
+    client = await LspTestEndpoint.create()
+
+    req_id = await client.request('initialize', {
+        'capabilities': {
+            'textDocument': {'definition': {'dynamicRegistration': True}}
+        }
+    })
+    response = await client.read_response(req_id)
+    caps = response['result']['capabilities']
+    assert caps.get('hoverProvider'), f"Expected hoverProvider: {caps}"
+    assert not caps.get('definitionProvider'), f"Unexpected: {caps}"
+    await client.notify('initialized', {})
+
+    # A Python document doesn't wake s2
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/a.py', 'languageId': 'python',
+            'version': 1, 'text': 'x = 1\ny = 2\n'
+        }
+    })
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': 'file:///tmp/a.py', 'version': 2},
+        'contentChanges': [{
+            'range': {
+                'start': {'line': 1, 'character': 4},
+                'end': {'line': 1, 'character': 5}
+            },
+            'text': '42'
+        }]
+    })
+    assert (s := await stats(client))['servers.running'] == 1, s
+
+    # A CSS document does
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/b.css', 'languageId': 'css',
+            'version': 1, 'text': 'a {}'
+        }
+    })
+    reg_id, params = await client.read_request('client/registerCapability')
+    methods = [r['method'] for r in params['registrations']]
+    assert methods == ['textDocument/definition'], f"Unexpected {params}"
+    await write_message(
+        client.writer, {'jsonrpc': '2.0', 'id': reg_id, 'result': None}
+    )
+    assert (s := await stats(client))['servers.running'] == 2, s
+
+    # s2 was told about both documents, with their current text
+    req_id = await client.request('textDocument/definition', {
+        'textDocument': {'uri': 'file:///tmp/b.css'},
+        'position': {'line': 0, 'character': 0}
+    })
+    result = (await client.read_response(req_id))['result']
+    assert result['uri'] == 'file:///s2.py', result
+    assert result['notifications'] == [
+        'initialized', 'textDocument/didOpen', 'textDocument/didOpen'
+    ], result
+    assert result['texts'] == {
+        'file:///tmp/a.py': 'x = 1\ny = 42\n',
+        'file:///tmp/b.css': 'a {}',
+    }, result
+
+    log("client", "✓ Lazy server started and caught up")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
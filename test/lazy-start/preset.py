@@ -0,0 +1,15 @@
+"""Preset with a primary server and a lazy one for CSS documents."""
+
+def servers():
+    return [
+        ['python', './server.py', '--name', 's1', '--caps', 'hoverProvider'],
+        {
+            'command': [
+                'python', './server.py', '--name', 's2',
+                '--caps', 'definitionProvider',
+            ],
+            'lazy': True,
+            'languages': ['css'],
+            'globs': ['*.scss'],
+        },
+    ]
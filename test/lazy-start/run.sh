@@ -0,0 +1,13 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+# preset.py has s1 and a lazy s2 for CSS documents
+./client.py < "$FIFO" | ./../../rass ./preset.py > "$FIFO"
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Server remembering the notifications and document texts it gets.
+"""
+
+import argparse
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+parser.add_argument('--caps', nargs='*', default=[])
+args = parser.parse_args()
+
+notifications = []
+texts = {}
+
+def on_notification(method):
+    def handler(params):
+        notifications.append(method)
+        doc = params.get('textDocument', {}) if params else {}
+        if method == 'textDocument/didOpen':
+            texts[doc['uri']] = doc['text']
+        elif method == 'textDocument/didChange':
+            texts[doc['uri']] = params['contentChanges'][-1]['text']
+    return handler
+
+def handle_definition(msg_id, params):
+    return {
+        'uri': f'file:///{args.name}.py',
+        'range': {
+            'start': {'line': 0, 'character': 0},
+            'end': {'line': 0, 'character': 1}
+        },
+        'notifications': notifications,
+        'texts': texts,
+    }
+
+run_toy_server(
+    name=args.name,
+    capabilities={cap: True for cap in args.caps},
+    request_handlers={'textDocument/definition': handle_definition},
+    notification_handlers={
+        m: on_notification(m)
+        for m in ['initialized', 'textDocument/didOpen', 'textDocument/didChange']
+    },
+)
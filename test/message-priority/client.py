@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test that a hover response overtakes a flood of log messages still
+queued for the client.
+"""
+
+import asyncio
+
+from rassumfrassum.json import read_message
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+FLOOD = 60
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    req_id = await client.request('textDocument/hover', {
+        'textDocument': {'uri': 'file:///tmp/a.py'},
+        'position': {'line': 0, 'character': 0}
+    })
+    # Let messages pile up in rass while we're not reading
+    await asyncio.sleep(1)
+
+    logged = []
+    hover_after = None
+    while len(logged) < FLOOD:
+        msg = await read_message(client.reader)
+        assert msg is not None
+        if msg.get('id') == req_id:
+            assert msg['result']['contents'] == 'Hover from s1', msg
+            hover_after = len(logged)
+        elif msg.get('method') == 'window/logMessage':
+            logged.append(int(msg['params']['message'].split()[0]))
+
+    assert logged == list(range(FLOOD)), "log messages out of order"
+    assert hover_after is not None and hover_after < FLOOD, hover_after
+    log('client', f"✓ Hover overtook {FLOOD - hover_after} log messages")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
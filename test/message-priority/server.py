@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Server logging a flood of big messages before answering hovers.
+"""
+
+from rassumfrassum.json import write_message_sync
+from rassumfrassum.test2 import run_toy_server
+
+FLOOD = 60
+
+def on_hover(msg_id, params):
+    for i in range(FLOOD):
+        write_message_sync({
+            'jsonrpc': '2.0',
+            'method': 'window/logMessage',
+            'params': {'type': 4, 'message': f'{i} ' + 'x' * 50_000}
+        })
+    return {'contents': 'Hover from s1'}
+
+run_toy_server(
+    name='s1',
+    capabilities={'hoverProvider': True},
+    request_handlers={'textDocument/hover': on_hover},
+)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test that a server that keeps timing out is left out of aggregations,
+and that low priority requests aren't piled up on it.
+"""
+
+import asyncio
+import time
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+CODE_ACTION = {
+    'textDocument': {'uri': 'file:///tmp/a.py'},
+    'range': {
+        'start': {'line': 0, 'character': 0},
+        'end': {'line': 0, 'character': 1}
+    },
+    'context': {'diagnostics': []}
+}
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    # s2 times out on all of these
+    ids = [
+        await client.request('textDocument/codeAction', {
+            **CODE_ACTION, 'context': {'diagnostics': [], 'only': [str(i)]}
+        })
+        for i in range(3)
+    ]
+    for req_id in ids:
+        response = await client.read_response(req_id)
+        assert len(response['result']) == 1, response
+
+    # Now it's left out, so s1 answers right away
+    start = time.monotonic()
+    req_id = await client.request('textDocument/codeAction', CODE_ACTION)
+    response = await client.read_response(req_id)
+    assert len(response['result']) == 1, response
+    assert time.monotonic() - start < 1, "waited for s2"
+    log('client', "✓ s2 left out of aggregations")
+
+    # s2 has 3 requests outstanding: workspace/symbol is shed
+    req_id = await client.request('workspace/symbol', {'query': 'foo'})
+    response = await client.read_response(req_id)
+    assert response['error']['code'] == -32801, response
+    log('client', "✓ workspace/symbol shed")
+
+    stats_id = await client.request('rass/stats')
+    stats = (await client.read_response(stats_id))['result']
+    assert stats['servers.load']['s2']['breaker'] == 'open', stats
+    assert stats['servers.load']['s2']['outstanding'] == 3, stats
+    assert stats['servers.load']['s1']['outstanding'] == 0, stats
+    assert stats['requests.shed'] == 1, stats
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,15 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+./client.py < "$FIFO" | ./../../rass --shed-depth 3 \
+         -- python ./server.py --name s1 \
+         -- python ./server.py --name s2 --stuck \
+> "$FIFO"
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Server answering code actions, or, if stuck, never answering them
+nor workspace symbol requests.
+"""
+
+import argparse
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+parser.add_argument('--stuck', action='store_true')
+args = parser.parse_args()
+
+handlers = {}
+if not args.stuck:
+    handlers['textDocument/codeAction'] = lambda msg_id, params: [
+        {'title': f'Fix from {args.name}', 'kind': 'quickfix'}
+    ]
+
+run_toy_server(
+    name=args.name,
+    capabilities={
+        'codeActionProvider': True,
+        'workspaceSymbolProvider': args.stuck,
+    },
+    request_handlers=handlers,
+)
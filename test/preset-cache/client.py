@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Test that presets can cache values across runs of rass, until a file
+they watch changes.
+"""
+
+import asyncio
+import sys
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def main():
+    client = await LspTestEndpoint.create()
+    msg = await client.initialize()
+    name = msg['result']['serverInfo']['name']
+    assert name == sys.argv[1], f"Expected {sys.argv[1]}, got {name}"
+    log('client', f"✓ Server named {name}")
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
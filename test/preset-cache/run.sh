@@ -0,0 +1,26 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+export XDG_CACHE_HOME=$(mktemp -d)
+export WATCHED="$XDG_CACHE_HOME/watched"
+touch -d '-1 hour' "$WATCHED"
+trap "rm -rf '$FIFO' '$XDG_CACHE_HOME'" EXIT INT TERM
+
+# preset.py names its server with a value it caches, counting how
+# many times it computed it
+run() {
+    ./client.py "$1" < "$FIFO" | ./../../rass ./preset.py > "$FIFO"
+}
+
+run s1
+# Cached
+run s1
+# Recomputed, the watched file changed
+touch "$WATCHED"
+run s2
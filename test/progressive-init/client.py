@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test that initialize is answered with the primary's capabilities,
+and that a late server's capabilities are registered dynamically.
+"""
+
+import asyncio
+import time
+
+from rassumfrassum.json import write_message
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def main():
+    client = await LspTestEndpoint.create()
+
+    start = time.monotonic()
+    req_id = await client.request('initialize', {
+        'capabilities': {
+            'textDocument': {'definition': {'dynamicRegistration': True}}
+        }
+    })
+    response = await client.read_response(req_id)
+    elapsed = time.monotonic() - start
+    caps = response['result']['capabilities']
+    log("client", f"Got initialize response after {elapsed:.2f}s: {caps}")
+    assert elapsed < 0.8, f"initialize took too long: {elapsed:.2f}s"
+    assert caps.get('hoverProvider'), f"Expected hoverProvider: {caps}"
+    assert not caps.get('definitionProvider'), f"Unexpected: {caps}"
+
+    await client.notify('initialized', {})
+
+    reg_id, params = await client.read_request('client/registerCapability')
+    methods = [r['method'] for r in params['registrations']]
+    assert methods == ['textDocument/definition'], f"Unexpected {params}"
+    await write_message(
+        client.writer, {'jsonrpc': '2.0', 'id': reg_id, 'result': None}
+    )
+
+    # Late capability is routed to the late server
+    req_id = await client.request('textDocument/definition', {
+        'textDocument': {'uri': 'file:///tmp/test.py'},
+        'position': {'line': 0, 'character': 0}
+    })
+    response = await client.read_response(req_id)
+    assert response['result']['uri'] == 'file:///s2.py', response
+
+    # And initialize was never re-sent
+    await client.assert_no_message_pending(timeout_sec=0.2)
+
+    log("client", "✓ Progressive initialize with dynamic registration")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
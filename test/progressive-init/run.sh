@@ -0,0 +1,18 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+# s1 (primary) answers initialize immediately with hoverProvider
+# s2 takes 1000ms and has definitionProvider
+./client.py < "$FIFO" | ./../../rass --progressive-init \
+         -- python ./server.py --name s1 --caps hoverProvider \
+         -- python ./server.py --name s2 --caps definitionProvider \
+                               --initialize-delay 1000 \
+> "$FIFO"
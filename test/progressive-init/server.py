@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Server with configurable capabilities and initialize delay.
+"""
+
+import argparse
+import time
+
+from rassumfrassum.test2 import run_toy_server, log
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+parser.add_argument('--caps', nargs='*', default=[])
+parser.add_argument('--initialize-delay', type=int, default=0)
+args = parser.parse_args()
+
+capabilities = {cap: True for cap in args.caps}
+
+def handle_initialize(msg_id, params):
+    if args.initialize_delay > 0:
+        log(args.name, f"Delaying initialize by {args.initialize_delay}ms")
+        time.sleep(args.initialize_delay / 1000.0)
+    return {
+        'capabilities': capabilities,
+        'serverInfo': {'name': args.name, 'version': '1.0.0'}
+    }
+
+def handle_definition(msg_id, params):
+    return {
+        'uri': f'file:///{args.name}.py',
+        'range': {
+            'start': {'line': 0, 'character': 0},
+            'end': {'line': 0, 'character': 1}
+        }
+    }
+
+run_toy_server(
+    name=args.name,
+    request_handlers={
+        'initialize': handle_initialize,
+        'textDocument/definition': handle_definition,
+    },
+)
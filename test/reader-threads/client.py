@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test that servers read and decoded in threads of their own get their
+diagnostics merged and requests answered as usual.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+FILES = 50
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/f0.py',
+            'languageId': 'python',
+            'version': 1,
+            'text': 'print("hello")\n'
+        }
+    })
+
+    # URI -> servers that sent diagnostics for it
+    sources: dict[str, set] = {}
+    while len(sources) < FILES or any(
+        s != {'s1', 's2', 's3'} for s in sources.values()
+    ):
+        payload = await client.read_notification(
+            'textDocument/publishDiagnostics'
+        )
+        sources.setdefault(payload['uri'], set()).update(
+            d['source'] for d in payload['diagnostics']
+        )
+    log('client', f"✓ Got diagnostics of all servers for {FILES} files")
+
+    req_id = await client.request('textDocument/hover', {
+        'textDocument': {'uri': 'file:///tmp/f0.py'},
+        'position': {'line': 0, 'character': 0}
+    })
+    msg = await client.read_response(req_id)
+    assert msg['result']['contents']['value'] == 'oh yeah ', msg
+    log('client', "✓ Got hover")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
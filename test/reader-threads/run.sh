@@ -0,0 +1,16 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+./client.py < "$FIFO" | ./../../rass --reader-threads \
+         -- python ./server.py --name s1 \
+         -- python ./server.py --name s2 \
+         -- python ./server.py --name s3 \
+> "$FIFO"
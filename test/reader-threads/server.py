@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Server publishing diagnostics for many files when a document opens.
+"""
+
+import argparse
+
+from rassumfrassum.json import write_message_sync
+from rassumfrassum.test2 import make_diagnostic, run_toy_server
+
+FILES = 50
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+def on_did_open(params):
+    for i in range(FILES):
+        write_message_sync({
+            'jsonrpc': '2.0',
+            'method': 'textDocument/publishDiagnostics',
+            'params': {
+                'uri': f'file:///tmp/f{i}.py',
+                'diagnostics': [
+                    make_diagnostic(0, 0, 5, 1, f'Error from {args.name}', args.name),
+                    make_diagnostic(1, 0, 5, 2, f'Warning from {args.name}', args.name),
+                ]
+            }
+        })
+
+run_toy_server(
+    name=args.name,
+    capabilities={'hoverProvider': True},
+    notification_handlers={'textDocument/didOpen': on_did_open},
+)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test that idempotent document queries are answered from a cache
+that is invalidated by document and workspace changes.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+URI = 'file:///tmp/test.py'
+OTHER_URI = 'file:///tmp/other.py'
+
+async def ask(client, method, params):
+    req_id = await client.request(method, params)
+    return (await client.read_response(req_id))['result']
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': URI,
+            'languageId': 'python',
+            'version': 1,
+            'text': 'hello\n'
+        }
+    })
+
+    hover = {
+        'textDocument': {'uri': URI},
+        'position': {'line': 0, 'character': 0}
+    }
+    action = {
+        'textDocument': {'uri': URI},
+        'range': {
+            'start': {'line': 0, 'character': 0},
+            'end': {'line': 0, 'character': 5}
+        },
+        'context': {'diagnostics': []}
+    }
+
+    # Single-server responses
+    r1 = await ask(client, 'textDocument/hover', hover)
+    r2 = await ask(client, 'textDocument/hover', hover)
+    assert r1['contents'] == 's1 hover #1', f"Unexpected {r1}"
+    assert r2 == r1, f"Expected cached {r1}, got {r2}"
+
+    # Aggregated responses
+    a1 = sorted(a['title'] for a in await ask(client, 'textDocument/codeAction', action))
+    a2 = sorted(a['title'] for a in await ask(client, 'textDocument/codeAction', action))
+    assert a1 == ['s1 action #1', 's2 action #1'], f"Unexpected {a1}"
+    assert a2 == a1, f"Expected cached {a1}, got {a2}"
+
+    stats = await ask(client, 'rass/stats', {})
+    log("client", f"Stats: {stats}")
+    assert stats['response-cache.hits'] == 2, f"Expected 2 hits: {stats}"
+    assert stats['response-cache.misses'] == 2, f"Expected 2 misses: {stats}"
+
+    # Editing the document invalidates its entries
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': URI, 'version': 2},
+        'contentChanges': [{'text': 'hello world\n'}]
+    })
+    r3 = await ask(client, 'textDocument/hover', hover)
+    assert r3['contents'] == 's1 hover #2', f"Expected fresh hover, got {r3}"
+
+    # Hovers also depend on other documents, so editing those
+    # invalidates them too
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': OTHER_URI,
+            'languageId': 'python',
+            'version': 1,
+            'text': 'x = 1\n'
+        }
+    })
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': OTHER_URI, 'version': 2},
+        'contentChanges': [{'text': 'x = 2\n'}]
+    })
+    # (Messages about different documents may be handled out of
+    # order: make sure the change is seen first.)
+    await ask(client, 'textDocument/hover', {
+        'textDocument': {'uri': OTHER_URI},
+        'position': {'line': 0, 'character': 0}
+    })
+    r4 = await ask(client, 'textDocument/hover', hover)
+    assert r4['contents'] == 's1 hover #4', f"Expected fresh hover, got {r4}"
+
+    # So do workspace-level changes
+    a3 = sorted(a['title'] for a in await ask(client, 'textDocument/codeAction', action))
+    await client.notify('workspace/didChangeConfiguration', {'settings': {}})
+    a4 = sorted(a['title'] for a in await ask(client, 'textDocument/codeAction', action))
+    assert a3 == ['s1 action #2', 's2 action #2'], f"Unexpected {a3}"
+    assert a4 == ['s1 action #3', 's2 action #3'], f"Unexpected {a4}"
+
+    log("client", "✓ Cache answered repeated queries and was invalidated")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
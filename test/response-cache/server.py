@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Server that numbers its hover and codeAction answers.
+"""
+
+import argparse
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+calls = {'hover': 0, 'codeAction': 0}
+
+def handle_hover(msg_id, params):
+    calls['hover'] += 1
+    return {'contents': f"{args.name} hover #{calls['hover']}"}
+
+def handle_code_action(msg_id, params):
+    calls['codeAction'] += 1
+    return [{'title': f"{args.name} action #{calls['codeAction']}"}]
+
+run_toy_server(
+    name=args.name,
+    capabilities={'hoverProvider': True, 'codeActionProvider': True},
+    request_handlers={
+        'textDocument/hover': handle_hover,
+        'textDocument/codeAction': handle_code_action,
+    },
+)
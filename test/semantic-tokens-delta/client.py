@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test that rass computes semantic tokens deltas for a server that
+only supports full semantic tokens.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+URI = 'file:///tmp/test.py'
+
+async def ask(client, method, params):
+    req_id = await client.request(method, params)
+    return (await client.read_response(req_id))['result']
+
+async def main():
+    client = await LspTestEndpoint.create()
+    init = await client.initialize()
+
+    provider = init['result']['capabilities']['semanticTokensProvider']
+    assert provider['full'] == {'delta': True}, f"No delta: {provider}"
+
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': URI,
+            'languageId': 'python',
+            'version': 1,
+            'text': 'a\nbb\nccc\ndddd\n'
+        }
+    })
+
+    full = await ask(client, 'textDocument/semanticTokens/full',
+                     {'textDocument': {'uri': URI}})
+    assert full['data'] == [0, 0, 1, 0, 0, 1, 0, 2, 0, 0,
+                            1, 0, 3, 0, 0, 1, 0, 4, 0, 0], full
+
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': URI, 'version': 2},
+        'contentChanges': [{'text': 'a\nbb\ncccccc\ndddd\n'}]
+    })
+
+    delta = await ask(client, 'textDocument/semanticTokens/full/delta', {
+        'textDocument': {'uri': URI},
+        'previousResultId': full['resultId']
+    })
+    log("client", f"Got delta {delta}")
+    assert delta['edits'] == [
+        {'start': 10, 'deleteCount': 5, 'data': [1, 0, 6, 0, 0]}
+    ], delta
+    assert delta['resultId'] != full['resultId'], delta
+
+    # Unknown previous result: full tokens
+    again = await ask(client, 'textDocument/semanticTokens/full/delta', {
+        'textDocument': {'uri': URI},
+        'previousResultId': 'bogus'
+    })
+    assert 'data' in again and 'edits' not in again, again
+
+    log("client", "✓ Semantic tokens deltas synthesized by rass")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
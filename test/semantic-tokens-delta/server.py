@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Server that only knows semanticTokens/full: one token per line.
+"""
+
+import argparse
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+texts = {}
+
+def handle_didopen(params):
+    doc = params['textDocument']
+    texts[doc['uri']] = doc['text']
+
+def handle_didchange(params):
+    texts[params['textDocument']['uri']] = params['contentChanges'][-1]['text']
+
+def handle_full(msg_id, params):
+    data = []
+    for i, line in enumerate(texts[params['textDocument']['uri']].splitlines()):
+        data += [1 if i else 0, 0, len(line), 0, 0]
+    return {'resultId': 'server-id', 'data': data}
+
+run_toy_server(
+    name=args.name,
+    capabilities={
+        'semanticTokensProvider': {
+            'legend': {'tokenTypes': ['variable'], 'tokenModifiers': []},
+            'full': True,
+        }
+    },
+    request_handlers={'textDocument/semanticTokens/full': handle_full},
+    notification_handlers={
+        'textDocument/didOpen': handle_didopen,
+        'textDocument/didChange': handle_didchange,
+    },
+)
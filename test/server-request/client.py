@@ -6,7 +6,7 @@ Test client that handles server requests.
 import asyncio
 
 from rassumfrassum.test2 import LspTestEndpoint, log
-from rassumfrassum.json import write_message
+from rassumfrassum.json import read_message, write_message
 
 async def main():
     """Send a sequence of LSP messages and handle server requests."""
@@ -14,24 +14,45 @@ async def main():
     client = await LspTestEndpoint.create()
     await client.initialize()
 
-    # After initialized, we expect server requests for workspace/configuration
-    # Handle requests from both servers
-    for i in range(2):
-        id, payload = await client.read_request('workspace/configuration')
-        log("client", f"Got server request: id={id} params={payload}")
-
-        # Send response to server request
-        response = {
-            'jsonrpc': '2.0',
-            'id': id,
-            'result': [{'pythonPath': '/usr/bin/python3'}]
-        }
-        await write_message(client.writer, response)
-        log("client", f"Responding to server request id={id}")
-
-    for i in range(2):
-        _msg = await client.read_notification('custom/requestResponseOk')
-        log("client", f"Got success notification {i+1}")
+    # After initialized, both servers ask for workspace/configuration,
+    # but the client only sees one request: rass answers the other
+    # from its cache, or with the same response.  A server's success
+    # notification may arrive before the other server's request.
+    async def expect_requests(expected):
+        requests = 0
+        oks = 0
+        while oks < 2:
+            msg = await read_message(client.reader)
+            assert msg is not None, "EOF while waiting for server requests"
+            if msg.get('method') == 'workspace/configuration':
+                id = msg['id']
+                log("client", f"Got server request: id={id} params={msg.get('params')}")
+                requests += 1
+
+                # Send response to server request
+                response = {
+                    'jsonrpc': '2.0',
+                    'id': id,
+                    'result': [{'pythonPath': '/usr/bin/python3'}]
+                }
+                await write_message(client.writer, response)
+                log("client", f"Responding to server request id={id}")
+            elif msg.get('method') == 'custom/requestResponseOk':
+                oks += 1
+                log("client", f"Got success notification {oks}")
+        assert requests == expected, f"client got {requests} requests"
+
+    await expect_requests(1)
+
+    # Asking again is answered from the cache
+    await client.notify('custom/askAgain', {})
+    await expect_requests(0)
+
+    # A configuration change invalidates rass's cache
+    await client.notify(
+        'workspace/didChangeConfiguration', {'settings': {'python': {}}}
+    )
+    await expect_requests(1)
 
     await client.shutdown()
 
@@ -23,5 +23,9 @@ def handle_initialized(params):
 
 run_toy_server(
     name=args.name,
-    notification_handlers={'initialized': handle_initialized}
+    notification_handlers={
+        'initialized': handle_initialized,
+        'workspace/didChangeConfiguration': handle_initialized,
+        'custom/askAgain': handle_initialized,
+    }
 )
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test that a crashed server fails its requests, is restarted and
+catches up with the configuration and open documents.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def definition(client):
+    req_id = await client.request('textDocument/definition', {
+        'textDocument': {'uri': 'file:///tmp/a.py'},
+        'position': {'line': 0, 'character': 0}
+    })
+    return await client.read_response(req_id)
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    await client.notify('workspace/didChangeConfiguration', {
+        'settings': {'foo': 'bar'}
+    })
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/a.py', 'languageId': 'python',
+            'version': 1, 'text': 'x = 1\n'
+        }
+    })
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': 'file:///tmp/a.py', 'version': 2},
+        'contentChanges': [{'text': 'x = 2\n'}]
+    })
+
+    # s2 crashes, and the request fails right away
+    response = await definition(client)
+    assert response['error']['code'] == -32803, response
+    log("client", f"Got error: {response['error']}")
+
+    # Until restarted, s2 isn't asked anything
+    response = await definition(client)
+    assert response['result']['uri'] == 'file:///s1.py', response
+
+    # Once restarted, it knows what it should
+    await asyncio.sleep(1)
+    response = await definition(client)
+    result = response['result']
+    assert result['uri'] == 'file:///s2.py', result
+    assert result['notifications'] == [
+        'initialized',
+        'workspace/didChangeConfiguration',
+        'textDocument/didOpen',
+    ], result
+    assert result['texts'] == {'file:///tmp/a.py': 'x = 2\n'}, result
+
+    log("client", "✓ Crashed server restarted and caught up")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
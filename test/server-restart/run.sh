@@ -0,0 +1,18 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+MARKER=$(mktemp -u)
+trap "rm -f '$FIFO' '$MARKER'" EXIT INT TERM
+
+# s2 crashes the first time it's asked for a definition
+./client.py < "$FIFO" | ./../../rass --max-restarts 1 \
+         -- python ./server.py --name s1 --caps hoverProvider \
+         -- python ./server.py --name s2 --caps definitionProvider \
+                               --crash-once "$MARKER" \
+> "$FIFO"
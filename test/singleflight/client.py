@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test that identical in-flight requests share one server round trip.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+URI = 'file:///tmp/test.py'
+
+async def main():
+    """Fire identical documentSymbol requests back to back."""
+
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': URI,
+            'languageId': 'python',
+            'version': 1,
+            'text': 'hello\n'
+        }
+    })
+
+    params = {'textDocument': {'uri': URI}}
+    id1 = await client.request('textDocument/documentSymbol', params)
+    id2 = await client.request('textDocument/documentSymbol', params)
+
+    r1 = await client.read_response(id1)
+    r2 = await client.read_response(id2)
+    names = [r1['result'][0]['name'], r2['result'][0]['name']]
+    log("client", f"Got {names}")
+    assert names == ['call1', 'call1'], f"Expected one shared answer, got {names}"
+
+    # A new document version means a new round trip
+    await client.notify('textDocument/didChange', {
+        'textDocument': {'uri': URI, 'version': 2},
+        'contentChanges': [{'text': 'hello world\n'}]
+    })
+    id3 = await client.request('textDocument/documentSymbol', params)
+    r3 = await client.read_response(id3)
+    name = r3['result'][0]['name']
+    assert name == 'call2', f"Expected fresh answer, got {name}"
+
+    log("client", "✓ Identical in-flight requests shared a single round trip")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Server that slowly answers documentSymbol, numbering its answers.
+"""
+
+import argparse
+import time
+
+from rassumfrassum.test2 import run_toy_server, log
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+calls = 0
+
+def handle_document_symbol(msg_id, params):
+    """Answer slowly, so that identical requests pile up in rass."""
+    global calls
+    calls += 1
+    log(args.name, f"Computing documentSymbol #{calls}")
+    time.sleep(0.3)
+    return [
+        {
+            'name': f'call{calls}',
+            'kind': 12,
+            'range': {
+                'start': {'line': 0, 'character': 0},
+                'end': {'line': 0, 'character': 5},
+            },
+            'selectionRange': {
+                'start': {'line': 0, 'character': 0},
+                'end': {'line': 0, 'character': 5},
+            },
+        }
+    ]
+
+run_toy_server(
+    name=args.name,
+    capabilities={'documentSymbolProvider': True},
+    request_handlers={'textDocument/documentSymbol': handle_document_symbol},
+)
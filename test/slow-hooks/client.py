@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test that a slow logic hook about a document holds up messages about
+that document only.
+"""
+
+import asyncio
+import time
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def open_and_hover(client, uri):
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': uri, 'languageId': 'python', 'version': 1, 'text': ''
+        }
+    })
+    return await client.request('textDocument/hover', {
+        'textDocument': {'uri': uri},
+        'position': {'line': 0, 'character': 0}
+    })
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    t0 = time.monotonic()
+    slow_id = await open_and_hover(client, 'file:///tmp/slow.py')
+    fast_id = await open_and_hover(client, 'file:///tmp/fast.py')
+
+    msg = await client.read_response(fast_id)
+    assert msg['result']['contents'] == 'open', msg
+    assert time.monotonic() - t0 < 0.5, "fast.py waited for slow.py"
+    log('client', "✓ fast.py didn't wait for slow.py")
+
+    msg = await client.read_response(slow_id)
+    assert msg['result']['contents'] == 'open', "hover overtook didOpen"
+    assert time.monotonic() - t0 >= 1
+    log('client', "✓ slow.py's hover waited for its didOpen")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,20 @@
+"""Preset whose logic is slow to handle the opening of slow.py."""
+
+import asyncio
+
+from rassumfrassum.frassum import LspLogic
+from rassumfrassum.json import JSON
+
+class SlowLogic(LspLogic):
+    async def on_client_notification(self, method: str, params: JSON):
+        if method == 'textDocument/didOpen' and params[
+            'textDocument'
+        ]['uri'].endswith('slow.py'):
+            await asyncio.sleep(1)
+        await super().on_client_notification(method, params)
+
+def servers():
+    return [['python', './server.py']]
+
+def logic_class():
+    return SlowLogic
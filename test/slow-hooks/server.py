@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Server telling in hovers whether the document was opened.
+"""
+
+from rassumfrassum.test2 import run_toy_server
+
+opened = set()
+
+def on_did_open(params):
+    opened.add(params['textDocument']['uri'])
+
+def on_hover(msg_id, params):
+    uri = params['textDocument']['uri']
+    return {'contents': 'open' if uri in opened else 'unknown'}
+
+run_toy_server(
+    name='s1',
+    capabilities={'hoverProvider': True},
+    request_handlers={'textDocument/hover': on_hover},
+    notification_handlers={'textDocument/didOpen': on_did_open},
+)
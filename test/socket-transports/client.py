@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test that rass talks to its client and to servers over Unix and TCP
+sockets.
+"""
+
+import asyncio
+import sys
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def connect(path):
+    for _ in range(100):
+        try:
+            return await asyncio.open_unix_connection(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            await asyncio.sleep(0.02)
+    raise AssertionError(f"rass isn't listening on {path}")
+
+async def main():
+    reader, writer = await connect(sys.argv[1])
+    client = LspTestEndpoint(reader, writer, 'client')
+    await client.initialize()
+
+    for method, name in [
+        ('textDocument/hover', 's1'),
+        ('textDocument/definition', 's2'),
+        ('textDocument/references', 's3'),
+    ]:
+        req_id = await client.request(method, {
+            'textDocument': {'uri': 'file:///tmp/a.py'},
+            'position': {'line': 0, 'character': 0},
+            'context': {'includeDeclaration': True},
+        })
+        response = await client.read_response(req_id)
+        assert response['result']['name'] == name, response
+        log('client', f"✓ {method} answered by {name}")
+
+    await client.shutdown()
+    writer.close()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,21 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+SOCK=$(mktemp -u)
+trap "rm -f '$SOCK'" EXIT INT TERM
+
+# The client connects over a Unix socket, s2 and s3 listen on sockets
+../../rass --listen "unix:$SOCK" \
+         -- python ./server.py --name s1 --caps hoverProvider \
+         -- python ./server.py --name s2 --caps definitionProvider \
+                               --listen 'unix:{path}' \
+         -- python ./server.py --name s3 --caps referencesProvider \
+                               --listen 'tcp:{port}' &
+RASS=$!
+
+./client.py "$SOCK"
+wait $RASS
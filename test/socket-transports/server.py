@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Server answering with its name, optionally listening on a socket
+instead of talking on stdio.
+"""
+
+import argparse
+import os
+import socket
+
+from rassumfrassum.test2 import run_toy_server, log
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+parser.add_argument('--caps', nargs='*', default=[])
+parser.add_argument('--listen', metavar='ADDRESS')
+args = parser.parse_args()
+
+if args.listen:
+    kind, where = args.listen.split(':', 1)
+    if kind == 'unix':
+        listener = socket.socket(socket.AF_UNIX)
+        listener.bind(where)
+    else:
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', int(where)))
+    listener.listen(1)
+    log(args.name, f"Listening on {args.listen}")
+    conn, _ = listener.accept()
+    # Talk on the connection as if it were stdio
+    os.dup2(conn.fileno(), 0)
+    os.dup2(conn.fileno(), 1)
+
+def answer(msg_id, params):
+    return {'name': args.name}
+
+run_toy_server(
+    name=args.name,
+    capabilities={cap: True for cap in args.caps},
+    request_handlers={
+        'textDocument/hover': answer,
+        'textDocument/definition': answer,
+        'textDocument/references': answer,
+    },
+)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Test that scheduling controls and limits from the preset are applied.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    req_id = await client.request('textDocument/definition', {
+        'textDocument': {'uri': 'file:///tmp/a.py'},
+        'position': {'line': 0, 'character': 0}
+    })
+    result = (await client.read_response(req_id))['result']
+    assert result == {'nice': 5, 'affinity': [0], 'nofile': 100}, result
+
+    log("client", "✓ Server reniced, pinned and limited")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
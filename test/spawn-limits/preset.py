@@ -0,0 +1,12 @@
+"""Preset with a reniced, pinned and limited secondary server."""
+
+def servers():
+    return [
+        ['python', './server.py', '--name', 's1'],
+        {
+            'command': ['python', './server.py', '--name', 's2'],
+            'nice': 5,
+            'affinity': [0],
+            'rlimits': {'nofile': 100},
+        },
+    ]
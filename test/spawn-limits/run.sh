@@ -0,0 +1,18 @@
+#!/bin/bash
+set -e
+set -o pipefail
+cd $(dirname "$0")
+
+export PYTHONPATH="$(cd ../.. && pwd)/src:${PYTHONPATH}"
+
+if ! python -c 'import os; os.sched_setaffinity' 2>/dev/null; then
+    echo "No CPU affinity support, skipping test" >&2
+    exit 77
+fi
+
+FIFO=$(mktemp -u)
+mkfifo "$FIFO"
+trap "rm -f '$FIFO'" EXIT INT TERM
+
+# preset.py renices s2, pins it to CPU 0 and limits its open files
+./client.py < "$FIFO" | ./../../rass ./preset.py > "$FIFO"
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Server telling its nice level, CPU affinity and open files limit, as
+seen by a thread of its own.
+"""
+
+import argparse
+import os
+import queue
+import resource
+import threading
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+# Nice level and CPU affinity belong to threads on Linux: look at
+# them from one started as early as can be
+asked, told = queue.Queue(), queue.Queue()
+
+def measure():
+    while asked.get():
+        told.put({
+            'nice': os.getpriority(os.PRIO_PROCESS, 0),
+            'affinity': sorted(os.sched_getaffinity(0)),
+            'nofile': resource.getrlimit(resource.RLIMIT_NOFILE)[0],
+        })
+
+threading.Thread(target=measure, daemon=True).start()
+
+def handle_limits(msg_id, params):
+    asked.put(True)
+    return told.get()
+
+run_toy_server(
+    name=args.name,
+    capabilities={'definitionProvider': args.name == 's2'},
+    request_handlers={'textDocument/definition': handle_limits},
+)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test that rass reports startup milestones of each server.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    req_id = await client.request('rass/stats', {})
+    stats = (await client.read_response(req_id))['result']
+    report = stats['startup-ms']
+    log("client", f"Startup report: {report}")
+
+    assert sorted(report) == ['s1', 's2'], f"Unexpected servers: {report}"
+    for name, t in report.items():
+        milestones = ['launch', 'spawn', 'initialize-request',
+                      'first-message', 'initialize']
+        assert list(t) == milestones, f"{name}: {t}"
+        times = [t[m] for m in milestones]
+        assert times == sorted(times), f"{name} out of order: {t}"
+
+    log("client", "✓ Startup timings reported")
+
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""Server for startup-timings test"""
+
+import argparse
+
+from rassumfrassum.test2 import run_toy_server
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--name', required=True)
+args = parser.parse_args()
+
+run_toy_server(name=args.name)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test that bursts of messages reach the client in fewer writes.
+"""
+
+import asyncio
+
+from rassumfrassum.test2 import LspTestEndpoint, log
+
+async def main():
+    client = await LspTestEndpoint.create()
+    await client.initialize()
+
+    await client.notify('textDocument/didOpen', {
+        'textDocument': {
+            'uri': 'file:///tmp/a.py', 'languageId': 'python',
+            'version': 1, 'text': 'x = 1\n'
+        }
+    })
+    for i in range(50):
+        msg = await client.read_notification('window/logMessage')
+        assert msg['message'] == f'message {i}', msg
+
+    req_id = await client.request('rass/stats')
+    stats = (await client.read_response(req_id))['result']
+    log('client', f"{stats['io.writes']} writes for {stats['io.frames']} frames")
+    assert stats['io.writes'] < stats['io.frames'] - 25, stats
+    assert stats['io.writes-per-frame'] < 0.75, stats
+
+    log('client', "✓ Burst coalesced")
+    await client.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main())
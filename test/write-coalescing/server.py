@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Server logging a burst of messages when a document is opened.
+"""
+
+from rassumfrassum.json import write_message_sync
+from rassumfrassum.test2 import run_toy_server
+
+BURST = 50
+
+def on_open(params):
+    for i in range(BURST):
+        write_message_sync({
+            'jsonrpc': '2.0',
+            'method': 'window/logMessage',
+            'params': {'type': 3, 'message': f'message {i}'}
+        })
+
+run_toy_server(
+    name='s1',
+    notification_handlers={'textDocument/didOpen': on_open},
+)